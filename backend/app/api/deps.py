@@ -1,7 +1,86 @@
-﻿from typing import Generator
+﻿import secrets
+from collections.abc import Callable, Hashable
+from typing import Generator
 
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+
+from app.core.cache import data_versions
 from app.core.config import get_settings, Settings
+from app.models.habit import DEFAULT_USER_ID
 
 
 def get_app_settings() -> Settings:
     return get_settings()
+
+
+def get_current_user_id(
+    x_user_id: int | None = Header(
+        None, ge=1, description="User the request acts for; only accepted with USER_ID_HEADER_ENABLED"
+    ),
+    settings: Settings = Depends(get_app_settings),
+) -> int:
+    """ID of the user whose data a request reads and writes.
+
+    This is not authentication: the X-User-Id header is only trusted when the deployment
+    turns on user_id_header_enabled because a gateway in front of the API authenticates
+    users and sets it. Otherwise every request acts for the default user, who owns all
+    pre-existing data, and a request naming a user is refused rather than answered with
+    the default user's data.
+    """
+    if x_user_id is None:
+        return DEFAULT_USER_ID
+    if not settings.user_id_header_enabled:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="X-User-Id is not accepted by this server")
+    return x_user_id
+
+
+def require_admin(
+    authorization: str | None = Header(None),
+    settings: Settings = Depends(get_app_settings),
+) -> None:
+    """Guard for /api/admin/*: requests need ``Authorization: Bearer <ADMIN_TOKEN>``.
+
+    Without a configured token the admin routes answer 404, as if they didn't exist.
+    """
+    if not settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.admin_token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def etag_headers(etag: str) -> dict[str, str]:
+    # private: responses are per user; no-cache: browsers may keep them but must revalidate
+    return {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "X-User-Id"}
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match compares weakly, so W/"x" matches "x"
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def versioned_etag(*scopes: str, salt: Callable[[int], Hashable] | None = None) -> Callable[..., str]:
+    """Dependency for read routes whose response only changes with the data in ``scopes``.
+
+    A request whose If-None-Match still holds the current tag is answered with
+    304 Not Modified before the route runs, so it costs no queries. Otherwise the tag
+    is set on the response and returned, for routes that build their own Response.
+    ``salt`` adds per-user state that changes without a write, like a snapshot's age.
+    """
+
+    def check(request: Request, response: Response, user_id: int = Depends(get_current_user_id)) -> str:
+        extra = salt(user_id) if salt is not None else None
+        etag = data_versions.etag(scopes, request.url.path, request.url.query, user_id, extra)
+        headers = etag_headers(etag)
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+        return etag
+
+    return check
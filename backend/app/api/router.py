@@ -1,6 +1,7 @@
-﻿from fastapi import APIRouter
+﻿from fastapi import APIRouter, Depends
 
-from app.api.routes import ai, analytics, export, gamification, health, habit_logs, habits
+from app.api.deps import require_admin
+from app.api.routes import admin, ai, analytics, export, gamification, health, habit_logs, habits
 
 api_router = APIRouter()
 api_router.include_router(health.router, tags=["system"])
@@ -10,3 +11,4 @@ api_router.include_router(analytics.router, prefix="/analytics", tags=["analytic
 api_router.include_router(ai.router, prefix="/ai", tags=["ai"])
 api_router.include_router(gamification.router, prefix="/gamification", tags=["gamification"])
 api_router.include_router(export.router, prefix="/export", tags=["export"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
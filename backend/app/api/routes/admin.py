@@ -0,0 +1,112 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import response_cache
+from app.core.profiling import profile_store
+from app.core.scheduler import scheduler
+from app.db.query_stats import route_query_stats
+from app.db.session import get_write_db
+from app.services.completion_index import completion_index
+from app.services.insights_service import InsightsService
+from app.services.mood_service import MoodService
+from app.services.recommendation_service import RecommendationService
+from app.services.rollup_service import RollupService
+
+router = APIRouter()
+
+
+@router.post("/rollup/rebuild", summary="Rebuild the daily check-in rollup table")
+async def rebuild_rollup(db: AsyncSession = Depends(get_write_db)) -> dict[str, int]:
+    """Recompute habit_daily_rollup from the raw habit_logs table."""
+    rows = await RollupService.rebuild(db)
+    InsightsService.invalidate_all()
+    return {"rows": rows}
+
+
+@router.post("/mood/backfill", summary="Score the mood of logs stored without one")
+async def backfill_mood(db: AsyncSession = Depends(get_write_db)) -> dict[str, int]:
+    """Store the sentiment of every log whose notes have not been scored yet."""
+    scored = await MoodService.backfill(db)
+    return {"scored": scored}
+
+
+@router.get("/cache", summary="Get response cache statistics")
+async def get_cache_stats() -> dict[str, int | float]:
+    """Entry count, hit/miss counters and evictions of the in-process response cache."""
+    return response_cache.stats()
+
+
+@router.delete("/cache", status_code=204, summary="Clear the response cache")
+async def clear_cache() -> None:
+    """Drop every cached response."""
+    response_cache.clear()
+
+
+@router.get("/completion-index", summary="Get completion bitset index statistics")
+async def get_completion_index_stats() -> dict[str, int | float]:
+    """Habits held, memory used against its budget, hit/miss counters and evictions."""
+    return completion_index.stats()
+
+
+@router.get("/insights", summary="Get progress insights snapshot statistics")
+async def get_insights_stats() -> dict[str, int]:
+    """Snapshots held, how many are stale, and pending or running recomputations."""
+    return InsightsService.stats()
+
+
+@router.get("/recommendations", summary="Get habit recommendation model statistics")
+async def get_recommendation_stats() -> dict[str, int | str | None]:
+    """Habit names and users in the current recommendation model, and when it was built."""
+    return RecommendationService.stats()
+
+
+@router.get("/jobs", summary="Get scheduled job statistics")
+async def get_job_stats() -> dict[str, dict]:
+    """Schedule, next run, run/failure/skip counters and durations of each maintenance job."""
+    return scheduler.stats()
+
+
+@router.post("/jobs/{name}/run", status_code=202, summary="Run a scheduled job now")
+async def run_job(name: str) -> dict[str, str]:
+    """Start a maintenance job in the background, outside its schedule."""
+    if name not in scheduler.jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not scheduler.run_now(name):
+        raise HTTPException(status_code=409, detail="Job is already running")
+    return {"job": name, "status": "started"}
+
+
+@router.get("/query-stats", summary="Get per-route SQL statistics")
+async def get_query_stats() -> dict[str, dict[str, int | float]]:
+    """Requests, SQL statements, DB time and rows fetched per route, most statements first."""
+    ranked = sorted(route_query_stats.items(), key=lambda item: item[1].statements, reverse=True)
+    return {route: stats.as_dict() for route, stats in ranked}
+
+
+@router.delete("/query-stats", status_code=204, summary="Reset per-route SQL statistics")
+async def reset_query_stats() -> None:
+    """Start aggregating from zero again."""
+    route_query_stats.clear()
+
+
+@router.get("/profiles", summary="List stored request profiles")
+async def list_profiles() -> dict[str, list[dict[str, str | int]]]:
+    """cProfile dumps of profiled requests, newest first."""
+    return {"profiles": await asyncio.to_thread(profile_store.list)}
+
+
+@router.get("/profiles/{name}", summary="Download a request profile")
+async def download_profile(
+    name: str,
+    summary: bool = Query(False, description="Return the top functions by cumulative time as text instead"),
+):
+    """The raw cProfile dump, for pstats or snakeviz, or a readable summary of it."""
+    path = profile_store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if summary:
+        return PlainTextResponse(await asyncio.to_thread(profile_store.summary, path))
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
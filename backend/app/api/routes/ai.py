@@ -1,12 +1,18 @@
+import time
 from typing import List
 
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel, Field, model_validator
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.api.deps import get_current_user_id, versioned_etag
+from app.core.cache import DataScope, cached
+from app.db.session import get_read_db
 from app.models.habit import Habit
 from app.services.ai_service import AIService
+from app.services.insights_service import InsightsService
+from app.services.mood_service import MoodPeriod, MoodService
+from app.services.recommendation_service import RecommendationService
 from sqlalchemy import select
 
 router = APIRouter()
@@ -16,11 +22,41 @@ class MoodAnalysisRequest(BaseModel):
     notes: str
 
 
-@router.get("/suggest-habits", summary="Get habit suggestions based on existing habits")
-async def suggest_habits(db: AsyncSession = Depends(get_db)) -> dict[str, List[dict[str, str]]]:
+class MoodBatchRequest(BaseModel):
+    notes: List[str] | None = Field(default=None, max_length=1000, description="Notes to analyze, in order")
+    habit_id: int | None = Field(default=None, description="Analyze the notes of every log of this habit instead")
+
+    @model_validator(mode="after")
+    def check_one_source(self) -> "MoodBatchRequest":
+        if (self.notes is None) == (self.habit_id is None):
+            raise ValueError("Provide either notes or habit_id")
+        return self
+
+
+def _recommendation_version(user_id: int) -> str | None:
+    """Suggestions also change when the recommendation model is rebuilt."""
+    return RecommendationService.stats()["built_at"]
+
+
+def _insights_version(user_id: int) -> float:
+    """Age of the snapshot the route will serve; with no snapshot yet, a tag that never matches."""
+    snapshot = InsightsService.get_snapshot(user_id)
+    return snapshot.computed_at if snapshot is not None else time.monotonic()
+
+
+@router.get(
+    "/suggest-habits",
+    summary="Get habit suggestions based on existing habits",
+    dependencies=[Depends(versioned_etag(DataScope.HABITS, salt=_recommendation_version))],
+)
+@cached(DataScope.HABITS, salt=_recommendation_version)
+async def suggest_habits(
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+) -> dict[str, List[dict[str, str]]]:
     """Get AI-powered habit suggestions based on user's existing habits."""
     # Get all user habits
-    result = await db.execute(select(Habit))
+    result = await db.execute(select(Habit).where(Habit.user_id == user_id))
     user_habits = result.scalars().all()
 
     suggestions = await AIService.suggest_habits(db, list(user_habits))
@@ -34,6 +70,36 @@ async def analyze_mood(request: MoodAnalysisRequest) -> dict[str, dict[str, str
     return {"analysis": analysis}
 
 
+@router.post("/analyze-mood/batch", summary="Analyze mood for many notes at once")
+async def analyze_mood_batch(
+    request: MoodBatchRequest,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+) -> dict[str, List[dict]]:
+    """Analyze a list of notes, or the notes of every log of a habit; repeated notes are analyzed once."""
+    if request.habit_id is not None:
+        return {"results": await AIService.analyze_habit_moods(db, user_id, request.habit_id)}
+    return {"results": [{"analysis": analysis} for analysis in AIService.analyze_moods(request.notes)]}
+
+
+@router.get(
+    "/mood-timeline",
+    summary="Get average mood per day or week",
+    dependencies=[Depends(versioned_etag(DataScope.HABIT_LOGS))],
+)
+@cached(DataScope.HABIT_LOGS, daily=True)
+async def get_mood_timeline(
+    period: MoodPeriod = Query(MoodPeriod.DAY, description="Bucket size"),
+    days: int = Query(90, ge=1, le=730, description="Number of days to look back"),
+    habit_id: int | None = Query(None, description="Filter by specific habit ID"),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+) -> dict[str, str | List[dict]]:
+    """Average sentiment score and label counts of noted check-ins, from the stored sentiment."""
+    timeline = await MoodService.get_timeline(db, user_id, period, days, habit_id)
+    return {"period": period.value, "timeline": timeline}
+
+
 @router.get("/motivational-quote", summary="Get a random motivational quote")
 async def get_motivational_quote() -> dict[str, dict[str, str]]:
     """Get a random motivational quote."""
@@ -41,8 +107,15 @@ async def get_motivational_quote() -> dict[str, dict[str, str]]:
     return {"quote": quote}
 
 
-@router.get("/progress-insights", summary="Get AI-generated progress insights")
-async def get_progress_insights(db: AsyncSession = Depends(get_db)) -> dict:
-    """Get AI-powered insights and recommendations based on user's habit data."""
-    insights = await AIService.generate_progress_insights(db)
+@router.get(
+    "/progress-insights",
+    summary="Get AI-generated progress insights",
+    dependencies=[Depends(versioned_etag(salt=_insights_version))],
+)
+async def get_progress_insights(user_id: int = Depends(get_current_user_id)) -> dict:
+    """Get AI-powered insights and recommendations based on user's habit data.
+
+    Served from a snapshot that is recomputed in the background after writes.
+    """
+    insights = await InsightsService.get_insights(user_id)
     return insights
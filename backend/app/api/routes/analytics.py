@@ -1,43 +1,125 @@
+from datetime import date
+from typing import Any
+
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.api.deps import get_current_user_id, versioned_etag
+from app.core.cache import DataScope, cached
+from app.db.session import get_read_db
 from app.services.analytics_service import AnalyticsService
 
 router = APIRouter()
 
 
-@router.get("/best-days", summary="Get best days for check-ins")
+@router.get(
+    "/best-days",
+    summary="Get best days for check-ins",
+    dependencies=[Depends(versioned_etag(DataScope.HABITS, DataScope.HABIT_LOGS))],
+)
+@cached(DataScope.HABITS, DataScope.HABIT_LOGS)
 async def get_best_days(
     habit_id: int | None = Query(None, description="Filter by specific habit ID"),
-    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
 ) -> dict[str, dict[str, int]]:
     """Get check-in counts by day of week."""
-    best_days = await AnalyticsService.get_best_days(db, habit_id)
+    best_days = await AnalyticsService.get_best_days(db, user_id, habit_id)
     return {"best_days": best_days}
 
 
-@router.get("/checkins-by-date", summary="Get check-ins by date")
+@router.get(
+    "/checkins-by-date",
+    summary="Get check-ins by date",
+    dependencies=[Depends(versioned_etag(DataScope.HABITS, DataScope.HABIT_LOGS))],
+)
+@cached(DataScope.HABITS, DataScope.HABIT_LOGS, daily=True)
 async def get_checkins_by_date(
     habit_id: int | None = Query(None, description="Filter by specific habit ID"),
     days: int = Query(30, ge=1, le=365, description="Number of days to look back"),
-    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
 ) -> dict[str, dict[str, int]]:
     """Get check-in counts by date for the last N days."""
-    checkins = await AnalyticsService.get_checkins_by_date(db, habit_id, days)
+    checkins = await AnalyticsService.get_checkins_by_date(db, user_id, habit_id, days)
     return {"checkins_by_date": checkins}
 
 
-@router.get("/category-stats", summary="Get statistics by category")
-async def get_category_stats(db: AsyncSession = Depends(get_db)) -> dict[str, dict[str, dict[str, int]]]:
+@router.get(
+    "/category-stats",
+    summary="Get statistics by category",
+    dependencies=[Depends(versioned_etag(DataScope.HABITS, DataScope.HABIT_LOGS))],
+)
+@cached(DataScope.HABITS, DataScope.HABIT_LOGS)
+async def get_category_stats(
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+) -> dict[str, dict[str, dict[str, int]]]:
     """Get statistics grouped by habit category."""
-    stats = await AnalyticsService.get_category_stats(db)
+    stats = await AnalyticsService.get_category_stats(db, user_id)
     return {"category_stats": stats}
 
 
-@router.get("/overall", summary="Get overall statistics")
-async def get_overall_stats(db: AsyncSession = Depends(get_db)) -> dict[str, dict[str, int | float]]:
+@router.get(
+    "/overall",
+    summary="Get overall statistics",
+    dependencies=[Depends(versioned_etag(DataScope.HABITS, DataScope.HABIT_LOGS))],
+)
+@cached(DataScope.HABITS, DataScope.HABIT_LOGS, daily=True)
+async def get_overall_stats(
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+) -> dict[str, dict[str, int | float]]:
     """Get overall statistics across all habits."""
-    stats = await AnalyticsService.get_overall_stats(db)
+    stats = await AnalyticsService.get_overall_stats(db, user_id)
     return {"overall_stats": stats}
 
+
+@router.get(
+    "/rolling-success",
+    summary="Get rolling 7/30/90-day success rates",
+    dependencies=[Depends(versioned_etag(DataScope.HABITS, DataScope.HABIT_LOGS))],
+)
+@cached(DataScope.HABITS, DataScope.HABIT_LOGS, daily=True)
+async def get_rolling_success(
+    habit_id: int | None = Query(None, description="Filter by specific habit ID"),
+    days: int = Query(90, ge=1, le=3660, description="Number of days to return"),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+) -> dict[str, Any]:
+    """Get each habit's trailing 7, 30 and 90-day success rate for every day of the period."""
+    return await AnalyticsService.get_rolling_success(db, user_id, days, habit_id)
+
+
+@router.get(
+    "/heatmap",
+    summary="Get calendar heatmaps of check-ins",
+    dependencies=[Depends(versioned_etag(DataScope.HABITS, DataScope.HABIT_LOGS))],
+)
+@cached(DataScope.HABITS, DataScope.HABIT_LOGS, daily=True)
+async def get_heatmap(
+    year: int | None = Query(None, ge=1970, le=9999, description="Last year to include (default: this year)"),
+    years: int = Query(1, ge=1, le=10, description="Number of years to include"),
+    habit_id: int | None = Query(None, description="Filter by specific habit ID"),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+) -> dict[str, list[dict[str, Any]]]:
+    """Get check-in counts for every day of one or more calendar years."""
+    heatmaps = await AnalyticsService.get_year_heatmaps(db, user_id, year or date.today().year, years, habit_id)
+    return {"heatmaps": heatmaps}
+
+
+@router.get(
+    "/week-over-week",
+    summary="Get week-over-week check-in changes",
+    dependencies=[Depends(versioned_etag(DataScope.HABITS, DataScope.HABIT_LOGS))],
+)
+@cached(DataScope.HABITS, DataScope.HABIT_LOGS, daily=True)
+async def get_week_over_week(
+    habit_id: int | None = Query(None, description="Filter by specific habit ID"),
+    weeks: int = Query(12, ge=1, le=520, description="Number of weeks to return"),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+) -> dict[str, list[dict[str, Any]]]:
+    """Get weekly check-in totals with their change on the previous week, and per-habit deltas."""
+    return await AnalyticsService.get_week_over_week(db, user_id, weeks, habit_id)
@@ -1,13 +1,15 @@
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.api.deps import etag_headers, get_current_user_id, versioned_etag
+from app.core.cache import DataScope
+from app.db.session import get_read_db
 from app.models.habit import Habit
-from app.models.habit_log import HabitLog
 from app.services.analytics_service import AnalyticsService
+from app.services.export_service import MEDIA_TYPES, ExportFormat, ExportService
 from app.services.gamification_service import GamificationService
 from sqlalchemy import select, func
 
@@ -15,31 +17,31 @@ router = APIRouter()
 
 
 @router.get("/pdf", summary="Export progress report as PDF")
-async def export_pdf(db: AsyncSession = Depends(get_db)) -> Response:
+async def export_pdf(
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
     """Generate and download a PDF progress report."""
     try:
         # Get all habits
-        habits_result = await db.execute(select(Habit))
+        habits_result = await db.execute(select(Habit).where(Habit.user_id == user_id))
         habits = habits_result.scalars().all()
 
         # Get overall stats
-        overall_stats = await AnalyticsService.get_overall_stats(db)
-        gamification_stats = await GamificationService.get_user_stats(db)
-        badges = await GamificationService.get_all_badges(db)
+        overall_stats = await AnalyticsService.get_overall_stats(db, user_id)
+        gamification_stats = await GamificationService.get_user_stats(db, user_id)
+        badges = await GamificationService.get_all_badges(db, user_id)
 
         # Generate simple HTML report (we'll convert to PDF on frontend)
         # For now, return JSON data that frontend can use to generate PDF
         from app.services.habit_log_service import HabitLogService
         
+        habit_stats = await HabitLogService.get_stats_for_habits(db, user_id, [habit.id for habit in habits])
+
         habits_data = []
         for habit in habits:
-            streak = await HabitLogService.get_streak(db, habit.id)
-            success_rate = await HabitLogService.get_success_rate(db, habit.id)
-            logs_result = await db.execute(
-                select(HabitLog).where(HabitLog.habit_id == habit.id).order_by(HabitLog.log_date.desc()).limit(10)
-            )
-            recent_logs = logs_result.scalars().all()
-            
+            stats = habit_stats[habit.id]
+
             from datetime import date
             start_date_str = habit.start_date.isoformat() if isinstance(habit.start_date, date) else str(habit.start_date)
             
@@ -49,9 +51,10 @@ async def export_pdf(db: AsyncSession = Depends(get_db)) -> Response:
                 "category": habit.category,
                 "frequency": habit.frequency,
                 "start_date": start_date_str,
-                "streak": streak,
-                "success_rate": success_rate,
-                "recent_checkins": len(recent_logs),
+                "streak": stats["streak"],
+                "success_rate": stats["success_rate"],
+                # Matches the previous "last 10 logs" window of the report
+                "recent_checkins": min(stats["total_checkins"], 10),
             })
 
         report_data = {
@@ -72,3 +75,31 @@ async def export_pdf(db: AsyncSession = Depends(get_db)) -> Response:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate report: {str(e)}")
 
+
+@router.get("/habits", summary="Stream all habits as NDJSON or CSV")
+async def export_habits(
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="Output format"),
+    user_id: int = Depends(get_current_user_id),
+    etag: str = Depends(versioned_etag(DataScope.HABITS)),
+) -> StreamingResponse:
+    """Download every habit, streamed from the database."""
+    return StreamingResponse(
+        ExportService.stream_habits(format, user_id),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="habits.{format.value}"', **etag_headers(etag)},
+    )
+
+
+@router.get("/habit-logs", summary="Stream the full check-in history as NDJSON or CSV")
+async def export_habit_logs(
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="Output format"),
+    habit_id: int | None = Query(None, description="Filter by specific habit ID"),
+    user_id: int = Depends(get_current_user_id),
+    etag: str = Depends(versioned_etag(DataScope.HABITS, DataScope.HABIT_LOGS)),
+) -> StreamingResponse:
+    """Download every habit log, streamed from the database so memory stays flat."""
+    return StreamingResponse(
+        ExportService.stream_habit_logs(format, user_id, habit_id),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="habit-logs.{format.value}"', **etag_headers(etag)},
+    )
@@ -3,19 +3,29 @@ from typing import List
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.api.deps import get_current_user_id, versioned_etag
+from app.core.cache import DataScope, cached
+from app.db.session import get_read_db, get_write_db
 from app.services.gamification_service import GamificationService
 
 router = APIRouter()
 
 
-@router.get("/stats", summary="Get user gamification stats")
-async def get_stats(db: AsyncSession = Depends(get_db)) -> dict:
+@router.get(
+    "/stats",
+    summary="Get user gamification stats",
+    dependencies=[Depends(versioned_etag(DataScope.GAMIFICATION))],
+)
+@cached(DataScope.GAMIFICATION, daily=True)
+async def get_stats(
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+) -> dict:
     """Get user XP, level, and badges."""
-    stats = await GamificationService.get_user_stats(db)
+    stats = await GamificationService.get_user_stats(db, user_id)
     
     # Get all earned badges
-    badges = await GamificationService.get_all_badges(db)
+    badges = await GamificationService.get_all_badges(db, user_id)
     
     return {
         "total_xp": stats.total_xp,
@@ -27,10 +37,13 @@ async def get_stats(db: AsyncSession = Depends(get_db)) -> dict:
 
 
 @router.post("/check-badges", summary="Check and award new badges")
-async def check_badges(db: AsyncSession = Depends(get_db)) -> dict[str, List[dict[str, str | int]] | str]:
+async def check_badges(
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_write_db),
+) -> dict[str, List[dict[str, str | int]] | str]:
     """Check for new badges and award them."""
     try:
-        new_badges = await GamificationService.check_badges(db)
+        new_badges = await GamificationService.check_badges(db, user_id)
         return {
             "new_badges": new_badges,
             "message": f"Awarded {len(new_badges)} new badge(s)!" if new_badges else "No new badges"
@@ -1,55 +1,119 @@
+import csv
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
-from app.schemas.habit_log import HabitLogCreate, HabitLogResponse, HabitLogUpdate
-from app.services.gamification_service import GamificationService
+from app.api.deps import get_current_user_id, versioned_etag
+from app.core.cache import DataScope
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, split_page
+from app.db.session import get_read_db, get_write_db
+from app.schemas.habit_log import CheckInResponse, HabitLogCreate, HabitLogResponse, HabitLogUpdate
+from app.services.checkin_service import CheckInService
 from app.services.habit_log_service import HabitLogService
+from app.services.import_service import (
+    ImportService,
+    iter_csv,
+    iter_json_array,
+    iter_ndjson,
+    iter_spooled,
+    spool_body,
+)
 
 router = APIRouter()
 
 
-@router.post("/", response_model=HabitLogResponse, status_code=status.HTTP_201_CREATED, summary="Create a new habit log")
+@router.post("/", response_model=CheckInResponse, status_code=status.HTTP_201_CREATED, summary="Create a new habit log")
 async def create_habit_log(
-    log_in: HabitLogCreate, db: AsyncSession = Depends(get_db)
-) -> HabitLogResponse:
-    """Create a new habit log entry (check-in)."""
-    log = await HabitLogService.create(db, log_in)
-    
-    # Award XP for check-in
-    checkin_xp = await GamificationService.calculate_xp_for_checkin()
-    await GamificationService.add_xp(db, checkin_xp)
-    
-    # Check for streak bonus
-    streak = await HabitLogService.get_streak(db, log_in.habit_id)
-    streak_xp = await GamificationService.calculate_xp_for_streak(streak)
-    if streak_xp > 0:
-        await GamificationService.add_xp(db, streak_xp)
-    
-    # Check for new badges
-    await GamificationService.check_badges(db)
-    
-    return HabitLogResponse.model_validate(log)
-
-
-@router.get("/habit/{habit_id}", response_model=List[HabitLogResponse], summary="Get all logs for a habit")
+    log_in: HabitLogCreate,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_write_db),
+) -> CheckInResponse:
+    """Create a new habit log entry (check-in) and award its XP, streak bonus and badges atomically."""
+    checked_in = await CheckInService.check_in(db, user_id, log_in)
+    if checked_in is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Habit not found")
+    log, rewards = checked_in
+    return CheckInResponse(**HabitLogResponse.model_validate(log).model_dump(), **rewards)
+
+
+@router.post("/bulk", summary="Import many habit logs at once")
+async def bulk_import_habit_logs(
+    request: Request,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_write_db),
+) -> dict:
+    """Import historic check-ins from a JSON array, NDJSON or CSV body.
+
+    The whole body is read before the first query. Valid rows are inserted in batches
+    and badges are awarded once at the end; invalid rows are reported by their 1-based
+    row number and skipped.
+    """
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    spooled = None
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        spooled = await spool_body(request.stream())
+        rows = iter_ndjson(iter_spooled(spooled))
+    elif content_type == "text/csv":
+        rows = iter_csv(await request.body())
+    elif content_type == "application/json":
+        rows = iter_json_array(await request.body())
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Use application/json, application/x-ndjson or text/csv",
+        )
+
+    try:
+        return await ImportService.import_logs(db, user_id, rows)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Could not parse import: {e}")
+    finally:
+        if spooled is not None:
+            spooled.close()
+
+
+@router.get(
+    "/habit/{habit_id}",
+    response_model=List[HabitLogResponse],
+    summary="Get all logs for a habit",
+    dependencies=[Depends(versioned_etag(DataScope.HABIT_LOGS))],
+)
 async def get_habit_logs(
     habit_id: int,
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(100, ge=1),
+    cursor: str | None = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
 ) -> List[HabitLogResponse]:
-    """Get all log entries for a specific habit."""
-    logs = await HabitLogService.get_by_habit_id(db, habit_id, skip=skip, limit=limit)
+    """Get log entries for a specific habit, newest first; X-Next-Cursor holds the cursor of the next page."""
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    logs = await HabitLogService.get_by_habit_id(db, user_id, habit_id, skip=skip, limit=limit + 1, after=after)
+    logs, next_cursor = split_page(logs, limit, lambda log: (log.log_date, log.id))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return [HabitLogResponse.model_validate(log) for log in logs]
 
 
-@router.get("/{log_id}", response_model=HabitLogResponse, summary="Get a habit log by ID")
-async def get_habit_log(log_id: int, db: AsyncSession = Depends(get_db)) -> HabitLogResponse:
+@router.get(
+    "/{log_id}",
+    response_model=HabitLogResponse,
+    summary="Get a habit log by ID",
+    dependencies=[Depends(versioned_etag(DataScope.HABIT_LOGS))],
+)
+async def get_habit_log(
+    log_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+) -> HabitLogResponse:
     """Get a specific habit log by ID."""
-    log = await HabitLogService.get_by_id(db, log_id)
+    log = await HabitLogService.get_by_id(db, user_id, log_id)
     if not log:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Habit log not found")
     return HabitLogResponse.model_validate(log)
@@ -59,35 +123,54 @@ async def get_habit_log(log_id: int, db: AsyncSession = Depends(get_db)) -> Habi
 async def update_habit_log(
     log_id: int,
     log_in: HabitLogUpdate,
-    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_write_db),
 ) -> HabitLogResponse:
     """Update a habit log entry."""
-    log = await HabitLogService.update(db, log_id, log_in)
+    log = await HabitLogService.update(db, user_id, log_id, log_in)
     if not log:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Habit log not found")
     return HabitLogResponse.model_validate(log)
 
 
 @router.delete("/{log_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete a habit log")
-async def delete_habit_log(log_id: int, db: AsyncSession = Depends(get_db)) -> None:
+async def delete_habit_log(
+    log_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_write_db),
+) -> None:
     """Delete a habit log entry."""
-    success = await HabitLogService.delete(db, log_id)
+    success = await HabitLogService.delete(db, user_id, log_id)
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Habit log not found")
 
 
-@router.get("/habit/{habit_id}/streak", summary="Get current streak for a habit")
-async def get_habit_streak(habit_id: int, db: AsyncSession = Depends(get_db)) -> dict[str, int]:
+@router.get(
+    "/habit/{habit_id}/streak",
+    summary="Get current streak for a habit",
+    dependencies=[Depends(versioned_etag(DataScope.HABITS, DataScope.HABIT_LOGS))],
+)
+async def get_habit_streak(
+    habit_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+) -> dict[str, int]:
     """Get the current streak count for a habit."""
-    streak = await HabitLogService.get_streak(db, habit_id)
+    streak = await HabitLogService.get_streak(db, user_id, habit_id)
     return {"habit_id": habit_id, "streak": streak}
 
 
-@router.get("/habit/{habit_id}/success-rate", summary="Get success rate for a habit")
+@router.get(
+    "/habit/{habit_id}/success-rate",
+    summary="Get success rate for a habit",
+    dependencies=[Depends(versioned_etag(DataScope.HABITS, DataScope.HABIT_LOGS))],
+)
 async def get_habit_success_rate(
-    habit_id: int, db: AsyncSession = Depends(get_db)
+    habit_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
 ) -> dict[str, int | float]:
     """Get the success rate (percentage) for a habit."""
-    success_rate = await HabitLogService.get_success_rate(db, habit_id)
+    success_rate = await HabitLogService.get_success_rate(db, user_id, habit_id)
     return {"habit_id": habit_id, "success_rate": success_rate}
 
@@ -1,9 +1,12 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.api.deps import get_current_user_id, versioned_etag
+from app.core.cache import DataScope
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, split_page
+from app.db.session import get_read_db, get_write_db
 from app.schemas.habit import HabitCreate, HabitResponse, HabitUpdate
 from app.services.habit_service import HabitService
 
@@ -11,27 +14,56 @@ router = APIRouter()
 
 
 @router.post("/", response_model=HabitResponse, status_code=status.HTTP_201_CREATED, summary="Create a new habit")
-async def create_habit(habit_in: HabitCreate, db: AsyncSession = Depends(get_db)) -> HabitResponse:
+async def create_habit(
+    habit_in: HabitCreate,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_write_db),
+) -> HabitResponse:
     """Create a new habit."""
-    habit = await HabitService.create(db, habit_in)
+    habit = await HabitService.create(db, user_id, habit_in)
     return HabitResponse.model_validate(habit)
 
 
-@router.get("/", response_model=List[HabitResponse], summary="Get all habits")
+@router.get(
+    "/",
+    response_model=List[HabitResponse],
+    summary="Get all habits",
+    dependencies=[Depends(versioned_etag(DataScope.HABITS))],
+)
 async def get_habits(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(100, ge=1),
+    cursor: str | None = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
 ) -> List[HabitResponse]:
-    """Get all habits with pagination."""
-    habits = await HabitService.get_all(db, skip=skip, limit=limit)
+    """Get habits, newest first; X-Next-Cursor holds the cursor of the next page."""
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    habits = await HabitService.get_all(db, user_id, skip=skip, limit=limit + 1, after=after)
+    habits, next_cursor = split_page(habits, limit, lambda habit: (habit.created_at, habit.id))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return [HabitResponse.model_validate(habit) for habit in habits]
 
 
-@router.get("/{habit_id}", response_model=HabitResponse, summary="Get a habit by ID")
-async def get_habit(habit_id: int, db: AsyncSession = Depends(get_db)) -> HabitResponse:
+@router.get(
+    "/{habit_id}",
+    response_model=HabitResponse,
+    summary="Get a habit by ID",
+    dependencies=[Depends(versioned_etag(DataScope.HABITS))],
+)
+async def get_habit(
+    habit_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+) -> HabitResponse:
     """Get a specific habit by ID."""
-    habit = await HabitService.get_by_id(db, habit_id)
+    habit = await HabitService.get_by_id(db, user_id, habit_id)
     if not habit:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Habit not found")
     return HabitResponse.model_validate(habit)
@@ -41,19 +73,24 @@ async def get_habit(habit_id: int, db: AsyncSession = Depends(get_db)) -> HabitR
 async def update_habit(
     habit_id: int,
     habit_in: HabitUpdate,
-    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_write_db),
 ) -> HabitResponse:
     """Update a habit."""
-    habit = await HabitService.update(db, habit_id, habit_in)
+    habit = await HabitService.update(db, user_id, habit_id, habit_in)
     if not habit:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Habit not found")
     return HabitResponse.model_validate(habit)
 
 
 @router.delete("/{habit_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete a habit")
-async def delete_habit(habit_id: int, db: AsyncSession = Depends(get_db)) -> None:
+async def delete_habit(
+    habit_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_write_db),
+) -> None:
     """Delete a habit."""
-    success = await HabitService.delete(db, habit_id)
+    success = await HabitService.delete(db, user_id, habit_id)
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Habit not found")
 
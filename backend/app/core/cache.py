@@ -0,0 +1,135 @@
+import functools
+import hashlib
+import secrets
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from datetime import date
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.metrics import register_cache
+
+
+class DataScope:
+    """Groups of tables whose writes invalidate cached responses."""
+
+    HABITS = "habits"
+    HABIT_LOGS = "habit_logs"
+    GAMIFICATION = "gamification"
+
+
+class DataVersions:
+    """In-process version counters, bumped by the services after every committed write."""
+
+    def __init__(self) -> None:
+        self._versions: dict[str, int] = {}
+        self._epoch = secrets.token_hex(8)
+
+    def bump(self, *scopes: str) -> None:
+        for scope in scopes:
+            self._versions[scope] = self._versions.get(scope, 0) + 1
+
+    def get(self, *scopes: str) -> tuple[int, ...]:
+        return tuple(self._versions.get(scope, 0) for scope in scopes)
+
+    def etag(self, scopes: tuple[str, ...], *parts: Hashable) -> str:
+        """Strong ETag of a response that only changes with ``scopes``, ``parts`` and the date.
+
+        Counters restart from zero with the process, so a per-process epoch keeps tags
+        from earlier runs (and other workers) from matching. The date is included
+        because streaks and day windows move on at midnight without a write.
+        """
+        key = repr((self._epoch, self.get(*scopes), date.today().toordinal(), parts))
+        return '"' + hashlib.blake2b(key.encode(), digest_size=12).hexdigest() + '"'
+
+
+class ResponseCache:
+    """LRU cache with a per-entry TTL and hit/miss counters."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """Return ``(found, value)``; expired entries count as misses."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_settings = get_settings()
+data_versions = DataVersions()
+response_cache = ResponseCache(_settings.cache_max_entries, _settings.cache_ttl_seconds)
+register_cache("response", response_cache.stats)
+
+
+def cached(*scopes: str, daily: bool = False, salt: Callable[[int], Hashable] | None = None) -> Callable:
+    """Cache a route's result until the data in ``scopes`` changes or the TTL expires.
+
+    The key is the route, its parameters (the DB session excluded) and the current
+    versions of ``scopes``, so a write makes older entries unreachable and they age out.
+    ``daily`` routes, whose results are relative to today (streaks, day and week
+    windows), also key on the date so nothing computed before midnight is served after it.
+    ``salt`` is called with the route's ``user_id`` and keys on state that changes
+    without a write, like versioned_etag's.
+    """
+
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _settings.cache_enabled:
+                return await func(*args, **kwargs)
+
+            params = tuple(sorted((name, value) for name, value in kwargs.items() if not isinstance(value, AsyncSession)))
+            key = (func.__module__, func.__qualname__, params, data_versions.get(*scopes))
+            if daily:
+                key += (date.today().toordinal(),)
+            if salt is not None:
+                key += (salt(kwargs.get("user_id")),)
+            found, value = response_cache.get(key)
+            if found:
+                return value
+
+            value = await func(*args, **kwargs)
+            response_cache.set(key, value)
+            return value
+
+        return wrapper
+
+    return decorator
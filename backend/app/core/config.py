@@ -10,6 +10,71 @@ class Settings(BaseSettings):
     app_version: str = "0.1.0"
     debug: bool = True
     database_url: str = "sqlite+aiosqlite:///./habit_hero.db"
+    # Log every SQL statement; separate from debug, which is on by default
+    db_echo: bool = False
+
+    # There is no authentication. With this on, an X-User-Id header picks whose data a
+    # request uses, so any caller can act as any user: only turn it on behind a gateway
+    # that authenticates users and sets the header itself. Off, every request acts for
+    # the default user and requests sending the header are refused.
+    user_id_header_enabled: bool = False
+    # Bearer token for /api/admin/*; while unset the admin routes answer 404
+    admin_token: str | None = None
+
+    # SQLite: writes go through one dedicated connection, reads through a WAL pool
+    sqlite_split_engines: bool = True
+    sqlite_read_pool_size: int = 5
+    sqlite_busy_timeout_ms: int = 5000
+    # How long a request waits for the writer connection before it is answered 503
+    sqlite_writer_timeout_seconds: float = 5.0
+    sqlite_cache_size_kib: int = 20000
+    sqlite_mmap_size: int = 268435456
+
+    # In-process response cache for read-heavy dashboard endpoints
+    cache_enabled: bool = True
+    cache_max_entries: int = 512
+    cache_ttl_seconds: float = 300.0
+
+    # Progress insights snapshots: recomputed this long after the last write, and on
+    # the next read once older than the max age (streaks move on at midnight)
+    insights_refresh_delay_seconds: float = 2.0
+    insights_max_age_seconds: float = 300.0
+    insights_snapshot_max_users: int = 1024
+
+    # In-process scheduler for nightly rollups, midnight rollovers and cache pre-warming
+    scheduler_enabled: bool = True
+    scheduler_jitter_seconds: float = 30.0
+    nightly_rollup_hour: int = 3
+    cache_prewarm_interval_seconds: float = 60.0
+
+    # Memory budget of the per-habit completion bitsets behind success rates
+    completion_index_max_bytes: int = 8 * 1024 * 1024
+
+    # Habit recommendations: names held by at least min_users users take part, the
+    # most popular max_items of them; each keeps its top neighbours
+    recommendation_min_users: int = 2
+    recommendation_max_items: int = 2000
+    recommendation_neighbours: int = 20
+    recommendation_refresh_seconds: float = 900.0
+
+    # Per-route SQL statement/time totals for /admin/query-stats; headers are only added in debug mode
+    query_stats_enabled: bool = False
+    # Also count fetched rows. This buffers every ORM SELECT result while a request is
+    # tracked, doubling memory for large reads and defeating yield_per: debugging only
+    query_stats_count_rows: bool = False
+
+    # Prometheus text-format /metrics: request, SQL, pool and cache telemetry
+    metrics_enabled: bool = True
+
+    # Opt-in cProfile of single requests, asked for with an X-Profile: 1 header (when
+    # allowed) or sampled at this rate. The profiler sees the whole event loop thread,
+    # so requests running alongside a profiled one show up in its profile too.
+    profile_header_enabled: bool = False
+    profile_sample_rate: float = 0.0
+    profile_dir: str = "./profiles"
+    profile_max_files: int = 200
+    # Requests slower than this are logged with their SQL breakdown; 0 turns it off
+    slow_request_threshold_ms: float = 1000.0
 
 
 @lru_cache
@@ -0,0 +1,216 @@
+import math
+from bisect import bisect_left
+from collections.abc import Callable, Iterator, Mapping, Sequence
+
+# Seconds; request latencies, and the finer scale SQL statements and pool waits live on
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """A named family of time series, one per combination of label values."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterator[tuple[str, Sequence[str], Sequence[str], float]]:
+        """(sample name, label names, label values, value) of every series."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.type}"]
+        for name, labelnames, values, value in self.samples():
+            lines.append(f"{name}{_format_labels(labelnames, values)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[tuple[str, Sequence[str], Sequence[str], float]]:
+        for labels, value in sorted(self._values.items()):
+            yield self.name, self.labelnames, labels, value
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def samples(self) -> Iterator[tuple[str, Sequence[str], Sequence[str], float]]:
+        for labels, value in sorted(self._values.items()):
+            yield self.name, self.labelnames, labels, value
+
+
+class Histogram(Metric):
+    """Observations counted into fixed upper-bound buckets, plus their sum and count."""
+
+    type = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: count per bucket (not cumulative, the last one is +Inf), then the sum
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self) -> Iterator[tuple[str, Sequence[str], Sequence[str], float]]:
+        bucket_labelnames = self.labelnames + ("le",)
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", bucket_labelnames, labels + (_format_value(bound),), cumulative
+            yield f"{self.name}_sum", self.labelnames, labels, total[0]
+            yield f"{self.name}_count", self.labelnames, labels, cumulative
+
+
+class CallbackMetric(Metric):
+    """Series read from live state at scrape time, e.g. pool sizes or cache counters."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        type: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Mapping[LabelValues, float]],
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.type = type
+        self.collect = collect
+
+    def samples(self) -> Iterator[tuple[str, Sequence[str], Sequence[str], float]]:
+        for labels, value in sorted(self.collect().items()):
+            yield self.name, self.labelnames, labels, value
+
+
+class MetricsRegistry:
+    """Every metric of the process, rendered in the Prometheus text exposition format."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        type: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Mapping[LabelValues, float]],
+    ) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, type, labelnames, collect))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+# stats() of every cache exposed through the cache_* metrics, by cache name
+_caches: dict[str, Callable[[], Mapping[str, int | float]]] = {}
+
+
+def register_cache(name: str, stats: Callable[[], Mapping[str, int | float]]) -> None:
+    """Expose a cache's ``stats()`` hits, misses, evictions and hit_ratio under ``cache="name"``."""
+    _caches[name] = stats
+
+
+def _cache_stat(key: str) -> Callable[[], dict[LabelValues, float]]:
+    return lambda: {(name,): stats()[key] for name, stats in _caches.items()}
+
+
+registry.callback("cache_hits_total", "Lookups answered from the cache", "counter", ("cache",), _cache_stat("hits"))
+registry.callback(
+    "cache_misses_total", "Lookups the cache could not answer", "counter", ("cache",), _cache_stat("misses")
+)
+registry.callback(
+    "cache_evictions_total",
+    "Entries dropped to stay within the cache's budget",
+    "counter",
+    ("cache",),
+    _cache_stat("evictions"),
+)
+registry.callback(
+    "cache_hit_ratio", "Share of lookups answered from the cache since startup", "gauge", ("cache",), _cache_stat("hit_ratio")
+)
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status code", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "Time until the response headers are ready, by route template",
+    ("method", "route"),
+)
+http_requests_in_progress = registry.gauge("http_requests_in_progress", "HTTP requests being handled", ("method",))
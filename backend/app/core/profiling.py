@@ -0,0 +1,97 @@
+import cProfile
+import io
+import pstats
+import random
+import re
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from app.core.config import get_settings
+from app.db.query_stats import QueryStats
+
+settings = get_settings()
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Names the store writes; anything else in the directory is neither listed nor served
+_PROFILE_NAME = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9]{6}-[A-Z]+-[A-Za-z0-9_.-]*\.prof$")
+
+
+def _slug(route_path: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", route_path).strip("_")[:80] or "root"
+
+
+class ProfileStore:
+    """cProfile dumps in a local directory, keeping only the newest ``max_files``."""
+
+    def __init__(self, directory: str, max_files: int) -> None:
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+    def save(self, profile: cProfile.Profile, method: str, route_path: str) -> str:
+        """Write ``profile`` and rotate out the oldest dumps; returns the profile's name."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = f"{datetime.now().strftime('%Y%m%dT%H%M%S-%f')}-{method}-{_slug(route_path)}.prof"
+        profile.dump_stats(self.directory / name)
+        for old in self.list()[self.max_files :]:
+            (self.directory / old["name"]).unlink(missing_ok=True)
+        return name
+
+    def list(self) -> list[dict[str, str | int]]:
+        """Stored profiles, newest first."""
+        if not self.directory.is_dir():
+            return []
+        profiles = [
+            {"name": path.name, "bytes": path.stat().st_size}
+            for path in self.directory.iterdir()
+            if _PROFILE_NAME.match(path.name)
+        ]
+        # Names start with their timestamp
+        return sorted(profiles, key=lambda profile: profile["name"], reverse=True)
+
+    def path(self, name: str) -> Path | None:
+        """Location of a stored profile, or None for unknown (or unsafe) names."""
+        if not _PROFILE_NAME.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    @staticmethod
+    def summary(path: Path, limit: int = 40) -> str:
+        """The ``limit`` most expensive functions by cumulative time, as pstats prints them."""
+        output = io.StringIO()
+        pstats.Stats(str(path), stream=output).sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
+
+
+def should_profile(header_value: str | None) -> bool:
+    """Whether to profile a request: asked for by header (when allowed) or picked by the sample rate."""
+    if settings.profile_header_enabled and header_value is not None and header_value.lower() in ("1", "true", "yes"):
+        return True
+    return settings.profile_sample_rate > 0 and random.random() < settings.profile_sample_rate
+
+
+def sql_breakdown(stats: QueryStats, limit: int = 10) -> list[tuple[str, int, float]]:
+    """(statement, executions, total seconds) of the statements that took the most time."""
+    totals: defaultdict[str, list] = defaultdict(lambda: [0, 0.0])
+    for statement, elapsed in stats.statement_log:
+        total = totals[" ".join(statement.split())]
+        total[0] += 1
+        total[1] += elapsed
+    ranked = sorted(totals.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+    return [(statement, count, elapsed) for statement, (count, elapsed) in ranked]
+
+
+def log_slow_request(method: str, route_path: str, elapsed: float, stats: QueryStats, profile_name: str | None) -> None:
+    profiled = f", profile {profile_name}" if profile_name else ""
+    print(
+        f"Slow request {method} {route_path}: {elapsed * 1000:.1f} ms, "
+        f"{stats.statements} SQL statements in {stats.db_time * 1000:.1f} ms{profiled}"
+    )
+    for statement, count, total in sql_breakdown(stats):
+        print(f"  {total * 1000:9.1f} ms  {count:4}x  {statement[:200]}")
+
+
+profile_store = ProfileStore(settings.profile_dir, settings.profile_max_files)
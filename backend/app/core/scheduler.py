@@ -0,0 +1,184 @@
+import asyncio
+import contextvars
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+JobFunc = Callable[[], Awaitable[object]]
+
+
+@dataclass(frozen=True)
+class IntervalSchedule:
+    """Run every ``seconds``, counted from the previous planned start."""
+
+    seconds: float
+
+    def next_after(self, moment: datetime) -> datetime:
+        return moment + timedelta(seconds=self.seconds)
+
+    def describe(self) -> str:
+        return f"every {self.seconds:g}s"
+
+
+@dataclass(frozen=True)
+class CronSchedule:
+    """Run at ``minute`` past ``hour`` on ``weekday`` (Monday is 0), local time; None matches any."""
+
+    minute: int = 0
+    hour: int | None = None
+    weekday: int | None = None
+
+    def next_after(self, moment: datetime) -> datetime:
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # At most 8 days of day/hour skips before a match
+        while True:
+            if self.weekday is not None and candidate.weekday() != self.weekday:
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif self.hour is not None and candidate.hour != self.hour:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute != self.minute:
+                candidate += timedelta(minutes=(self.minute - candidate.minute) % 60)
+            else:
+                return candidate
+
+    def describe(self) -> str:
+        fields = [str(self.minute), "*" if self.hour is None else str(self.hour), "*", "*"]
+        fields.append("*" if self.weekday is None else str((self.weekday + 1) % 7))
+        return "cron " + " ".join(fields)
+
+
+Schedule = IntervalSchedule | CronSchedule
+
+
+@dataclass
+class JobStats:
+    """Run counters and timings of one job."""
+
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    total_duration: float = 0.0
+    max_duration: float = 0.0
+    last_duration: float | None = None
+    last_started_at: datetime | None = None
+    last_error: str | None = None
+
+    def as_dict(self) -> dict[str, int | float | str | None]:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "avg_duration_ms": round(self.total_duration / self.runs * 1000, 3) if self.runs else 0.0,
+            "max_duration_ms": round(self.max_duration * 1000, 3),
+            "last_duration_ms": None if self.last_duration is None else round(self.last_duration * 1000, 3),
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_error": self.last_error,
+        }
+
+
+@dataclass
+class Job:
+    name: str
+    func: JobFunc
+    schedule: Schedule
+    jitter_seconds: float = 0.0
+    stats: JobStats = field(default_factory=JobStats)
+    next_run_at: datetime | None = None
+    running: asyncio.Task | None = None
+
+
+class Scheduler:
+    """Runs registered coroutines on interval or cron-like schedules inside the event loop.
+
+    A job never overlaps itself: a run that comes due while the previous one is still
+    going is skipped and counted. Runs are delayed by a random jitter of up to
+    ``jitter_seconds`` so several processes don't hit the database at the same instant.
+    """
+
+    def __init__(self) -> None:
+        self.jobs: dict[str, Job] = {}
+        self._loops: list[asyncio.Task] = []
+
+    def add_job(self, name: str, func: JobFunc, schedule: Schedule, jitter_seconds: float = 0.0) -> Job:
+        if name in self.jobs:
+            raise ValueError(f"Job {name!r} is already registered")
+        job = Job(name, func, schedule, jitter_seconds)
+        self.jobs[name] = job
+        if self._loops:
+            self._loops.append(asyncio.create_task(self._run_loop(job)))
+        return job
+
+    def start(self) -> None:
+        """Start a timing loop per job; call from the running event loop."""
+        if not self._loops:
+            self._loops = [asyncio.create_task(self._run_loop(job)) for job in self.jobs.values()]
+
+    async def stop(self) -> None:
+        """Stop the timing loops and cancel runs still in progress."""
+        tasks = self._loops + [job.running for job in self.jobs.values() if job.running]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loops = []
+        for job in self.jobs.values():
+            job.next_run_at = None
+
+    def run_now(self, name: str) -> bool:
+        """Start a job outside its schedule. False if it is already running.
+
+        Raises KeyError for unknown jobs.
+        """
+        return self._launch(self.jobs[name])
+
+    async def _run_loop(self, job: Job) -> None:
+        planned = datetime.now()
+        while True:
+            planned = job.schedule.next_after(max(planned, datetime.now()))
+            job.next_run_at = planned + timedelta(seconds=random.uniform(0, job.jitter_seconds))
+            await asyncio.sleep(max(0.0, (job.next_run_at - datetime.now()).total_seconds()))
+            if not self._launch(job):
+                job.stats.skipped += 1
+
+    def _launch(self, job: Job) -> bool:
+        if job.running is not None:
+            return False
+        # A fresh context, so a run started from a request is not tracked as part of it
+        job.running = asyncio.create_task(self._execute(job), context=contextvars.Context())
+        return True
+
+    async def _execute(self, job: Job) -> None:
+        job.stats.last_started_at = datetime.now()
+        started = time.perf_counter()
+        try:
+            await job.func()
+        except asyncio.CancelledError:
+            # Interrupted by shutdown; not counted as a run
+            job.running = None
+            raise
+        except Exception as e:
+            job.stats.failures += 1
+            job.stats.last_error = f"{type(e).__name__}: {e}"
+            print(f"Error running scheduled job {job.name}: {e}")
+
+        duration = time.perf_counter() - started
+        job.stats.runs += 1
+        job.stats.total_duration += duration
+        job.stats.max_duration = max(job.stats.max_duration, duration)
+        job.stats.last_duration = duration
+        job.running = None
+
+    def stats(self) -> dict[str, dict]:
+        return {
+            name: {
+                "schedule": job.schedule.describe(),
+                "running": job.running is not None,
+                "next_run_at": job.next_run_at.isoformat() if job.next_run_at else None,
+                **job.stats.as_dict(),
+            }
+            for name, job in self.jobs.items()
+        }
+
+
+scheduler = Scheduler()
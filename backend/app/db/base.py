@@ -1,11 +1,22 @@
-from app.models import Base
+import logging
+
+from app.db.migrations import pending_data_migrations, run_data_migrations, run_migrations
 from app.models.gamification import UserStats  # Ensure UserStats is imported
 
+logger = logging.getLogger(__name__)
+
 
 async def init_db():
     """Initialize database tables."""
-    from app.db.session import _engine
+    from app.db.session import SessionLocal, _engine
 
     async with _engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        applied = await conn.run_sync(run_migrations)
+        pending = await conn.run_sync(pending_data_migrations)
 
+    # Derived tables for databases created before they existed are backfilled once
+    if pending:
+        async with SessionLocal() as session:
+            applied += await run_data_migrations(session, pending)
+    if applied:
+        logger.info("Applied schema migrations: %s", applied)
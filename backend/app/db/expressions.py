@@ -0,0 +1,49 @@
+from sqlalchemy import Date, Integer, cast, func, literal
+
+
+def weekday_expression(dialect_name: str, column):
+    """SQL expression for Python's weekday() (0=Monday, 6=Sunday), or None if unsupported."""
+    if dialect_name == "sqlite":
+        # strftime('%w') is 0=Sunday, 6=Saturday
+        return (cast(func.strftime("%w", column), Integer) + 6) % 7
+    if dialect_name == "postgresql":
+        # ISO day of week is 1=Monday, 7=Sunday
+        return cast(func.extract("isodow", column), Integer) - 1
+    if dialect_name in ("mysql", "mariadb"):
+        return func.weekday(column)
+    return None
+
+
+def week_start_expression(dialect_name: str, column):
+    """SQL expression for the Monday of a date's ISO week, or None if unsupported."""
+    if dialect_name == "sqlite":
+        # 'weekday 0' moves forward to Sunday (or stays), six days back is that week's Monday
+        return func.date(column, "weekday 0", "-6 days")
+    if dialect_name == "postgresql":
+        return cast(func.date_trunc("week", column), Date)
+    if dialect_name in ("mysql", "mariadb"):
+        return func.subdate(column, func.weekday(column))
+    return None
+
+
+def date_expression(dialect_name: str, column):
+    """SQL expression truncating a timestamp to its calendar date, or None if unsupported."""
+    if dialect_name == "sqlite":
+        return func.date(column)
+    if dialect_name in ("postgresql", "mysql", "mariadb"):
+        return cast(column, Date)
+    return None
+
+
+def day_ordinal_expression(dialect_name: str, column):
+    """SQL expression for Python's date.toordinal() (0001-01-01 is 1), or None if unsupported."""
+    if dialect_name == "sqlite":
+        # Julian day 1721425.5 is midnight of 0001-01-01
+        return cast(func.julianday(column) - 1721424.5, Integer)
+    if dialect_name == "postgresql":
+        # date - date is a day count
+        return column - literal("0001-01-01", Date) + 1
+    if dialect_name in ("mysql", "mariadb"):
+        # TO_DAYS('0001-01-01') is 366
+        return func.to_days(column) - 365
+    return None
@@ -0,0 +1,93 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.metrics import FAST_BUCKETS, registry
+
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time by engine and statement type",
+    ("engine", "operation"),
+    FAST_BUCKETS,
+)
+db_query_errors_total = registry.counter(
+    "db_query_errors_total", "SQL statements that raised, by engine", ("engine",)
+)
+db_pool_checkout_wait_seconds = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection (including connecting), by engine",
+    ("engine",),
+    FAST_BUCKETS,
+)
+
+# Pools of every instrumented engine, by engine label, read at scrape time
+_pools: dict[str, object] = {}
+
+_OPERATIONS = frozenset(("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA", "BEGIN", "COMMIT", "ROLLBACK"))
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip()[:16].split(None, 1)
+    operation = keyword[0].upper() if keyword else ""
+    return operation if operation in _OPERATIONS else "OTHER"
+
+
+def _pool_stat(method: str) -> dict[tuple[str, ...], float]:
+    # NullPool and StaticPool keep no counts
+    return {(name,): getattr(pool, method)() for name, pool in _pools.items() if hasattr(pool, method)}
+
+
+registry.callback(
+    "db_pool_size", "Connections the pool keeps open", "gauge", ("engine",), lambda: _pool_stat("size")
+)
+registry.callback(
+    "db_pool_checked_out",
+    "Connections currently handed out by the pool",
+    "gauge",
+    ("engine",),
+    lambda: _pool_stat("checkedout"),
+)
+registry.callback(
+    "db_pool_overflow",
+    "Connections open beyond the pool size (negative while the pool is not full yet)",
+    "gauge",
+    ("engine",),
+    lambda: _pool_stat("overflow"),
+)
+
+
+def install_metrics_hooks(engine: AsyncEngine, name: str) -> None:
+    """Time every statement and pool checkout of ``engine`` into the metrics labelled ``engine=name``."""
+    sync_engine = engine.sync_engine
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+        db_query_duration_seconds.observe(elapsed, name, _operation(statement))
+
+    def handle_error(exception_context) -> None:
+        starts = exception_context.connection.info.get("metrics_query_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
+        db_query_errors_total.inc(name)
+
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(sync_engine, "handle_error", handle_error)
+
+    # The pool has no "before checkout" event, so its connect() is timed directly
+    pool = sync_engine.pool
+    pool_connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return pool_connect()
+        finally:
+            db_pool_checkout_wait_seconds.observe(time.perf_counter() - started, name)
+
+    pool.connect = timed_connect
+    _pools[name] = pool
@@ -0,0 +1,159 @@
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import Column, Connection, Integer, MetaData, Table, bindparam, func, insert, inspect, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.expressions import date_expression
+from app.models import Base, Habit, HabitDailyRollup, HabitLog
+from app.models.gamification import UserStats
+
+# create_all builds new tables but never alters existing ones, so each schema change
+# to an existing table gets a numbered migration here. Never renumber or edit a
+# migration once released; append a new one instead.
+
+_version_metadata = MetaData()
+schema_version = Table("schema_version", _version_metadata, Column("version", Integer, primary_key=True))
+
+
+def _add_column(connection: Connection, table: Table, column_name: str) -> None:
+    """Add a model column to an existing table, unless it is already there."""
+    existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    if column_name in existing:
+        return
+    column = table.c[column_name]
+    column_type = column.type.compile(dialect=connection.dialect)
+    default = f" DEFAULT {column.server_default.arg}" if column.server_default is not None else ""
+    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}{default}"))
+
+
+def _add_user_stats_counters(connection: Connection) -> None:
+    """Counter columns that let badges and stats skip table scans."""
+    for column_name in ("habit_count", "category_count", "total_checkins", "week_checkins", "week_start", "max_streak"):
+        _add_column(connection, UserStats.__table__, column_name)
+
+
+def _add_habit_log_day(connection: Connection) -> None:
+    """Denormalized habit_logs.log_day plus composite (habit_id, date) indexes."""
+    table = HabitLog.__table__
+    _add_column(connection, table, "log_day")
+
+    day = date_expression(connection.dialect.name, table.c.log_date)
+    if day is not None:
+        connection.execute(update(table).where(table.c.log_day.is_(None)).values(log_day=day))
+    else:
+        # No date expression for this dialect: compute the days in Python
+        rows = connection.execute(select(table.c.id, table.c.log_date).where(table.c.log_day.is_(None))).all()
+        if rows:
+            connection.execute(
+                update(table).where(table.c.id == bindparam("row_id")).values(log_day=bindparam("day")),
+                [{"row_id": row_id, "day": log_date.date()} for row_id, log_date in rows],
+            )
+
+    for index in table.indexes:
+        if index.name in ("ix_habit_logs_habit_id_log_date", "ix_habit_logs_habit_id_log_day"):
+            index.create(connection, checkfirst=True)
+
+    # The composite indexes lead on habit_id, so its single-column index is redundant
+    existing_indexes = {index["name"] for index in inspect(connection).get_indexes(table.name)}
+    if "ix_habit_logs_habit_id" in existing_indexes:
+        on_table = f" ON {table.name}" if connection.dialect.name in ("mysql", "mariadb") else ""
+        connection.execute(text(f"DROP INDEX ix_habit_logs_habit_id{on_table}"))
+
+
+def _add_user_ids(connection: Connection) -> None:
+    """user_id on habits, logs, rollups and stats; existing rows belong to the default user."""
+    tables = (Habit.__table__, HabitLog.__table__, HabitDailyRollup.__table__, UserStats.__table__)
+    for table in tables:
+        _add_column(connection, table, "user_id")
+
+    # One stats row per user: keep the row single-user installs have always read
+    stats = UserStats.__table__
+    kept = select(func.min(stats.c.id)).group_by(stats.c.user_id)
+    connection.execute(stats.delete().where(stats.c.id.not_in(kept)))
+
+    for table in tables:
+        for index in table.indexes:
+            if "user_id" in index.columns:
+                index.create(connection, checkfirst=True)
+
+
+def _add_log_sentiment(connection: Connection) -> None:
+    """Stored sentiment of habit log notes; migration 5 scores existing notes."""
+    for column_name in ("sentiment", "sentiment_score"):
+        _add_column(connection, HabitLog.__table__, column_name)
+
+
+async def _backfill_derived_data(session: AsyncSession) -> None:
+    """Rollups, streak states, badge counters and log moods for data written before they existed."""
+    from app.services.gamification_service import GamificationService
+    from app.services.mood_service import MoodService
+    from app.services.rollup_service import RollupService
+    from app.services.streak_service import StreakService
+
+    await RollupService.rebuild_if_empty(session)
+    await StreakService.backfill_missing(session)
+    await GamificationService.rebuild_all_counters(session)
+    await session.commit()
+    await MoodService.backfill(session)
+
+
+MIGRATIONS: list[tuple[int, Callable[[Connection], None]]] = [
+    (1, _add_user_stats_counters),
+    (2, _add_habit_log_day),
+    (3, _add_user_ids),
+    (4, _add_log_sentiment),
+]
+
+# One-time rebuilds of derived data through the services, numbered in the same sequence
+# as MIGRATIONS and run by init_db once the schema is current. Each must be safe to
+# re-run: one interrupted before it was recorded runs again on the next start.
+DATA_MIGRATIONS: list[tuple[int, Callable[[AsyncSession], Awaitable[None]]]] = [
+    (5, _backfill_derived_data),
+]
+LATEST_VERSION = max(version for version, _ in MIGRATIONS + DATA_MIGRATIONS)
+
+
+def run_migrations(connection: Connection) -> list[int]:
+    """Create missing tables and bring existing ones up to date. Returns the versions applied.
+
+    A database without any tables yet gets the current schema from create_all and is
+    stamped with the latest version; older databases run every migration they lack.
+    """
+    fresh = not inspect(connection).has_table(HabitLog.__tablename__)
+    Base.metadata.create_all(connection)
+    _version_metadata.create_all(connection)
+
+    current = connection.execute(select(func.max(schema_version.c.version))).scalar() or 0
+    if fresh:
+        # Nothing to backfill either, so the data migrations are recorded as done
+        versions = {LATEST_VERSION} | {version for version, _ in DATA_MIGRATIONS}
+        recorded = set(connection.execute(select(schema_version.c.version)).scalars())
+        if versions - recorded:
+            connection.execute(insert(schema_version), [{"version": version} for version in sorted(versions - recorded)])
+        return []
+
+    applied = []
+    for version, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        migrate(connection)
+        connection.execute(insert(schema_version).values(version=version))
+        applied.append(version)
+    return applied
+
+
+def pending_data_migrations(connection: Connection) -> list[tuple[int, Callable[[AsyncSession], Awaitable[None]]]]:
+    """Data migrations not yet recorded in schema_version, in order."""
+    recorded = set(connection.execute(select(schema_version.c.version)).scalars())
+    return [(version, migrate) for version, migrate in DATA_MIGRATIONS if version not in recorded]
+
+
+async def run_data_migrations(session: AsyncSession, pending: list[tuple[int, Callable]]) -> list[int]:
+    """Run ``pending`` data migrations, recording each once it has committed. Returns their versions."""
+    applied = []
+    for version, migrate in pending:
+        await migrate(session)
+        await session.execute(insert(schema_version).values(version=version))
+        await session.commit()
+        applied.append(version)
+    return applied
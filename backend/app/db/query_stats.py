@@ -0,0 +1,124 @@
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import ORMExecuteState, Session
+
+
+@dataclass
+class QueryStats:
+    """SQL statements, DB time and rows fetched (if counted) by one unit of work (usually a request)."""
+
+    statements: int = 0
+    db_time: float = 0.0
+    rows: int = 0
+    statement_log: list[tuple[str, float]] = field(default_factory=list)
+
+
+@dataclass
+class RouteQueryStats:
+    """Totals for one route across all tracked requests."""
+
+    requests: int = 0
+    statements: int = 0
+    db_time: float = 0.0
+    rows: int = 0
+    max_statements: int = 0
+
+    def add(self, stats: QueryStats) -> None:
+        self.requests += 1
+        self.statements += stats.statements
+        self.db_time += stats.db_time
+        self.rows += stats.rows
+        self.max_statements = max(self.max_statements, stats.statements)
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {
+            "requests": self.requests,
+            "statements": self.statements,
+            "avg_statements": round(self.statements / self.requests, 2) if self.requests else 0.0,
+            "max_statements": self.max_statements,
+            "db_time_ms": round(self.db_time * 1000, 3),
+            "rows": self.rows,
+        }
+
+
+# Every collector active in the current context; nested collectors all see each statement
+_active: ContextVar[tuple[QueryStats, ...]] = ContextVar("query_stats", default=())
+route_query_stats: defaultdict[str, RouteQueryStats] = defaultdict(RouteQueryStats)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect query statistics for everything executed inside the block."""
+    stats = QueryStats()
+    token = _active.set(_active.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """Fail with AssertionError if the block runs more than ``limit`` SQL statements.
+
+    Meant for tests guarding endpoints against N+1 regressions::
+
+        with assert_max_queries(5):
+            response = await client.get("/api/ai/progress-insights")
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.statements > limit:
+        statements = "\n".join(f"  {statement}" for statement, _ in stats.statement_log)
+        raise AssertionError(f"Expected at most {limit} SQL statements, got {stats.statements}:\n{statements}")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _active.get():
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    collectors = _active.get()
+    if not collectors:
+        return
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    for stats in collectors:
+        stats.statements += 1
+        stats.db_time += elapsed
+        stats.statement_log.append((statement, elapsed))
+
+
+def _count_fetched_rows(orm_execute_state: ORMExecuteState):
+    """Buffer SELECT results to count their rows; streamed results are left alone.
+
+    Only installed with ``count_rows``: buffering copies every result a tracked request reads.
+    """
+    collectors = _active.get()
+    if (
+        not collectors
+        or not orm_execute_state.is_select
+        or orm_execute_state.execution_options.get("stream_results")
+        or orm_execute_state.execution_options.get("yield_per")
+    ):
+        return None
+
+    frozen = orm_execute_state.invoke_statement().freeze()
+    for stats in collectors:
+        stats.rows += len(frozen.data)
+    return frozen()
+
+
+def install_query_hooks(engine: AsyncEngine, count_rows: bool = False) -> None:
+    """Attach the statement timing hooks to an engine, and with ``count_rows`` the row counter to ORM sessions."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    if count_rows and not event.contains(Session, "do_orm_execute", _count_fetched_rows):
+        event.listen(Session, "do_orm_execute", _count_fetched_rows)
@@ -1,15 +1,97 @@
 ﻿from collections.abc import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
+from app.db.metrics import install_metrics_hooks
+from app.db.query_stats import install_query_hooks
+
+
+def _is_file_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def _apply_sqlite_pragmas(engine: AsyncEngine, settings: Settings) -> None:
+    """Set WAL mode and cache/timeout pragmas on every new connection of ``engine``."""
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # WAL makes NORMAL durable across application crashes, without an fsync per commit
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.close()
+
+
+def _create_engines(settings: Settings) -> tuple[AsyncEngine, AsyncEngine]:
+    """Build the (writer, reader) engines; other databases share one engine for both."""
+    if not (_is_file_sqlite(settings.database_url) and settings.sqlite_split_engines):
+        engine = create_async_engine(settings.database_url, echo=settings.db_echo)
+        return engine, engine
+
+    # SQLite allows one writer at a time: a single pooled connection queues writers in
+    # the pool instead of failing with "database is locked", while WAL lets the reader
+    # pool keep serving snapshots during a write. aiosqlite defaults to NullPool, so
+    # pooling is asked for explicitly.
+    writer = create_async_engine(
+        settings.database_url,
+        echo=settings.db_echo,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.sqlite_writer_timeout_seconds,
+    )
+    reader = create_async_engine(
+        settings.database_url,
+        echo=settings.db_echo,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.sqlite_read_pool_size,
+        max_overflow=0,
+    )
+    for engine in (writer, reader):
+        _apply_sqlite_pragmas(engine, settings)
+    return writer, reader
 
 
 _settings = get_settings()
-_engine = create_async_engine(_settings.database_url, echo=_settings.debug)
+_engine, _read_engine = _create_engines(_settings)
+install_query_hooks(_engine, count_rows=_settings.query_stats_count_rows)
+if _read_engine is not _engine:
+    install_query_hooks(_read_engine, count_rows=_settings.query_stats_count_rows)
+if _settings.metrics_enabled:
+    install_metrics_hooks(_engine, "writer" if _read_engine is not _engine else "default")
+    if _read_engine is not _engine:
+        install_metrics_hooks(_read_engine, "reader")
 SessionLocal = async_sessionmaker(bind=_engine, expire_on_commit=False)
+ReadSessionLocal = async_sessionmaker(bind=_read_engine, expire_on_commit=False)
+
 
+async def get_write_db() -> AsyncGenerator[AsyncSession, None]:
+    """Session on the writer engine, for routes that change data.
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    With split SQLite engines this is the one writer connection, held from a route's
+    first query until its session closes. A route must therefore read its whole request
+    body before that first query: declared body parameters are, but anything read from
+    ``request.stream()`` has to be spooled first, or a slow upload stalls every writer.
+    Requests that wait longer than sqlite_writer_timeout_seconds get a 503.
+    """
     async with SessionLocal() as session:
         yield session
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Session on the reader pool, for routes that only read.
+
+    Reads that lazily build derived state for legacy rows may still commit; SQLite
+    then waits up to busy_timeout for the writer rather than failing.
+    """
+    async with ReadSessionLocal() as session:
+        yield session
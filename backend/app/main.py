@@ -1,12 +1,24 @@
-﻿from contextlib import asynccontextmanager
+﻿import asyncio
+import cProfile
+import time
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from app.api.router import api_router
+from app.core import metrics
 from app.core.config import get_settings
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.profiling import PROFILE_HEADER, PROFILE_ID_HEADER, log_slow_request, profile_store, should_profile
+from app.core.scheduler import scheduler
 from app.db.base import init_db
+from app.db.query_stats import route_query_stats, track_queries
+from app.services.insights_service import InsightsService
+from app.services.maintenance_service import MaintenanceService
 
 settings = get_settings()
 
@@ -23,11 +35,91 @@ class HTTPSRedirectMiddleware(BaseHTTPMiddleware):
         return response
 
 
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    """Count the SQL statements, DB time and rows of each request and aggregate them per route."""
+    async def dispatch(self, request: Request, call_next):
+        with track_queries() as stats:
+            response = await call_next(request)
+
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", request.url.path)
+        route_query_stats[f"{request.method} {route_path}"].add(stats)
+
+        if settings.debug:
+            response.headers["X-DB-Query-Count"] = str(stats.statements)
+            response.headers["X-DB-Time-Ms"] = f"{stats.db_time * 1000:.3f}"
+            if settings.query_stats_count_rows:
+                response.headers["X-DB-Rows"] = str(stats.rows)
+        return response
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    """Count requests and time them per route template for /metrics."""
+    async def dispatch(self, request: Request, call_next):
+        metrics.http_requests_in_progress.inc(request.method)
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.http_requests_in_progress.dec(request.method)
+            # Templates rather than raw paths keep the number of series bounded
+            route = request.scope.get("route")
+            route_path = getattr(route, "path", "<unmatched>")
+            metrics.http_request_duration_seconds.observe(elapsed, request.method, route_path)
+            metrics.http_requests_total.inc(request.method, route_path, str(status_code))
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """Profile opted-in or sampled requests, and log slow requests with their SQL breakdown."""
+    # cProfile hooks the whole thread, so only one request is profiled at a time
+    profiling = False
+
+    async def dispatch(self, request: Request, call_next):
+        profile = None
+        if not ProfilingMiddleware.profiling and should_profile(request.headers.get(PROFILE_HEADER)):
+            ProfilingMiddleware.profiling = True
+            profile = cProfile.Profile()
+
+        started = time.perf_counter()
+        with track_queries() as stats:
+            try:
+                if profile is not None:
+                    profile.enable()
+                response = await call_next(request)
+            finally:
+                if profile is not None:
+                    profile.disable()
+                    ProfilingMiddleware.profiling = False
+        elapsed = time.perf_counter() - started
+
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", request.url.path)
+        profile_name = None
+        if profile is not None:
+            profile_name = await asyncio.to_thread(profile_store.save, profile, request.method, route_path)
+            response.headers[PROFILE_ID_HEADER] = profile_name
+        if settings.slow_request_threshold_ms > 0 and elapsed * 1000 >= settings.slow_request_threshold_ms:
+            log_slow_request(request.method, route_path, elapsed, stats, profile_name)
+        return response
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup."""
+    """Initialize database and start the maintenance scheduler on startup."""
     await init_db()
+    if settings.scheduler_enabled:
+        if not scheduler.jobs:
+            MaintenanceService.register_jobs(scheduler)
+        scheduler.start()
+        # Suggestions use the static catalog until the first model is built
+        scheduler.run_now("recommendation_refresh")
     yield
+    await scheduler.stop()
+    await InsightsService.shutdown()
 
 
 app = FastAPI(
@@ -40,6 +132,15 @@ app = FastAPI(
 # Add HTTPS redirect fix middleware (before CORS)
 app.add_middleware(HTTPSRedirectMiddleware)
 
+if settings.query_stats_enabled:
+    app.add_middleware(QueryStatsMiddleware)
+
+if settings.profile_header_enabled or settings.profile_sample_rate > 0 or settings.slow_request_threshold_ms > 0:
+    app.add_middleware(ProfilingMiddleware)
+
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -51,12 +152,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, PROFILE_ID_HEADER, "ETag"],
 )
 
 
+@app.exception_handler(PoolTimeoutError)
+async def database_busy(request: Request, exc: PoolTimeoutError) -> JSONResponse:
+    """No database connection freed up within the pool timeout (the SQLite writer is busy)."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The database is busy, try again shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.get("/", summary="API root")
 def read_root() -> dict[str, str]:
     return {"message": "Habit Hero API"}
 
 
+if settings.metrics_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    async def read_metrics() -> Response:
+        """Prometheus scrape target."""
+        return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 app.include_router(api_router, prefix="/api")
@@ -1,5 +1,16 @@
-from app.models.habit import Base, Habit, HabitCategory, HabitFrequency
+from app.models.habit import DEFAULT_USER_ID, Base, Habit, HabitCategory, HabitFrequency
+from app.models.habit_daily_rollup import HabitDailyRollup
 from app.models.habit_log import HabitLog
+from app.models.habit_streak import HabitStreak
 
-__all__ = ["Base", "Habit", "HabitCategory", "HabitFrequency", "HabitLog"]
+__all__ = [
+    "DEFAULT_USER_ID",
+    "Base",
+    "Habit",
+    "HabitCategory",
+    "HabitDailyRollup",
+    "HabitFrequency",
+    "HabitLog",
+    "HabitStreak",
+]
 
@@ -1,16 +1,26 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import Column, Date, DateTime, Integer, String
 
-from app.models.habit import Base
+from app.models.habit import DEFAULT_USER_ID, Base
 
 
 class UserStats(Base):
     __tablename__ = "user_stats"
 
     id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(
+        Integer, nullable=False, unique=True, index=True, default=DEFAULT_USER_ID, server_default=str(DEFAULT_USER_ID)
+    )
     total_xp = Column(Integer, nullable=False, default=0)
     level = Column(Integer, nullable=False, default=1)
     badges_earned = Column(String, nullable=True)  # JSON string of badge IDs
+    # Counters maintained by the habit and log services for badge checks
+    habit_count = Column(Integer, nullable=False, default=0, server_default="0")
+    category_count = Column(Integer, nullable=False, default=0, server_default="0")
+    total_checkins = Column(Integer, nullable=False, default=0, server_default="0")
+    week_checkins = Column(Integer, nullable=False, default=0, server_default="0")
+    week_start = Column(Date, nullable=True)  # Monday of the week counted in week_checkins
+    max_streak = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
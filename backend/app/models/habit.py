@@ -2,15 +2,20 @@ from datetime import date, datetime
 from enum import Enum
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Column, Date, DateTime, Enum as SQLEnum, Integer, String, Text
+from sqlalchemy import Column, Date, DateTime, Enum as SQLEnum, Index, Integer, String, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
 if TYPE_CHECKING:
+    from app.models.habit_daily_rollup import HabitDailyRollup
     from app.models.habit_log import HabitLog
+    from app.models.habit_streak import HabitStreak
 
 Base = declarative_base()
 
+# Owner of every row created before habits had a user, and of requests that name no user
+DEFAULT_USER_ID = 1
+
 
 class HabitFrequency(str, Enum):
     DAILY = "daily"
@@ -28,8 +33,14 @@ class HabitCategory(str, Enum):
 
 class Habit(Base):
     __tablename__ = "habits"
+    __table_args__ = (
+        # Listings page on (created_at, id) within one user's habits
+        Index("ix_habits_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_habits_user_id_category", "user_id", "category"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, default=DEFAULT_USER_ID, server_default=str(DEFAULT_USER_ID))
     name = Column(String(200), nullable=False, index=True)
     frequency = Column(SQLEnum(HabitFrequency), nullable=False, default=HabitFrequency.DAILY)
     category = Column(SQLEnum(HabitCategory), nullable=False, default=HabitCategory.HEALTH)
@@ -40,4 +51,6 @@ class Habit(Base):
 
     # Relationship
     logs = relationship("HabitLog", back_populates="habit", cascade="all, delete-orphan")
+    streak = relationship("HabitStreak", back_populates="habit", uselist=False, cascade="all, delete-orphan")
+    daily_rollups = relationship("HabitDailyRollup", back_populates="habit", cascade="all, delete-orphan")
 
@@ -0,0 +1,26 @@
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Index, Integer
+from sqlalchemy.orm import relationship
+
+from app.models.habit import DEFAULT_USER_ID, Base
+
+if TYPE_CHECKING:
+    from app.models.habit import Habit
+
+
+class HabitDailyRollup(Base):
+    """Per-habit, per-day check-in totals kept in sync with habit_logs on every write."""
+
+    __tablename__ = "habit_daily_rollup"
+    __table_args__ = (Index("ix_habit_daily_rollup_user_id_day", "user_id", "day"),)
+
+    habit_id = Column(Integer, ForeignKey("habits.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, nullable=False, default=DEFAULT_USER_ID, server_default=str(DEFAULT_USER_ID))
+    day = Column(Date, primary_key=True, index=True)
+    checkin_count = Column(Integer, nullable=False, default=0)
+    first_log_at = Column(DateTime, nullable=False)
+    last_log_at = Column(DateTime, nullable=False)
+
+    # Relationship
+    habit = relationship("Habit", back_populates="daily_rollups")
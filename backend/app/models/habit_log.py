@@ -1,24 +1,47 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import relationship, validates
 
-from app.models.habit import Base
+from app.models.habit import DEFAULT_USER_ID, Base
 
 if TYPE_CHECKING:
     from app.models.habit import Habit
 
 
+def _default_log_day(context) -> date:
+    """Day of the row's log_date, for inserts that don't set log_day themselves."""
+    log_date = context.get_current_parameters().get("log_date")
+    return (log_date or datetime.utcnow()).date()
+
+
 class HabitLog(Base):
     __tablename__ = "habit_logs"
+    __table_args__ = (
+        # Per-habit queries filter on habit_id, then range or sort on the date
+        Index("ix_habit_logs_habit_id_log_date", "habit_id", "log_date"),
+        Index("ix_habit_logs_habit_id_log_day", "habit_id", "log_day"),
+        Index("ix_habit_logs_user_id_log_date", "user_id", "log_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    habit_id = Column(Integer, ForeignKey("habits.id", ondelete="CASCADE"), nullable=False, index=True)
+    habit_id = Column(Integer, ForeignKey("habits.id", ondelete="CASCADE"), nullable=False)
+    # Copied from the habit so user-wide queries don't need a join
+    user_id = Column(Integer, nullable=False, default=DEFAULT_USER_ID, server_default=str(DEFAULT_USER_ID))
     log_date = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    # Denormalized log_date.date(), kept in step by the validator below
+    log_day = Column(Date, nullable=False, default=_default_log_day)
     notes = Column(Text, nullable=True)
+    # Mood of the notes, set whenever they are written; NULL for logs without notes
+    sentiment = Column(String(16), nullable=True)
+    sentiment_score = Column(Float, nullable=True)  # -confidence, 0 or +confidence
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
     # Relationship
     habit = relationship("Habit", back_populates="logs")
 
+    @validates("log_date")
+    def _sync_log_day(self, key: str, value: datetime) -> datetime:
+        self.log_day = value.date() if value is not None else None
+        return value
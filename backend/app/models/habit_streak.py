@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer
+from sqlalchemy.orm import relationship
+
+from app.models.habit import Base
+
+if TYPE_CHECKING:
+    from app.models.habit import Habit
+
+
+class HabitStreak(Base):
+    """Persisted streak state for a habit, maintained on every log write."""
+
+    __tablename__ = "habit_streaks"
+
+    habit_id = Column(Integer, ForeignKey("habits.id", ondelete="CASCADE"), primary_key=True)
+    current_streak = Column(Integer, nullable=False, default=0)
+    longest_streak = Column(Integer, nullable=False, default=0)
+    # First day of the most recent period (day or ISO week) with a check-in
+    last_period_start = Column(Date, nullable=True)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationship
+    habit = relationship("Habit", back_populates="streak")
@@ -1,7 +1,8 @@
 from app.schemas.habit import HabitCreate, HabitResponse, HabitUpdate
-from app.schemas.habit_log import HabitLogCreate, HabitLogResponse, HabitLogUpdate
+from app.schemas.habit_log import CheckInResponse, HabitLogCreate, HabitLogResponse, HabitLogUpdate
 
 __all__ = [
+    "CheckInResponse",
     "HabitCreate",
     "HabitResponse",
     "HabitUpdate",
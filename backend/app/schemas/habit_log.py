@@ -1,27 +1,68 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+# Clients whose clock runs this far ahead of the server have their "now" taken as now
+LOG_DATE_MAX_SKEW = timedelta(minutes=5)
+
+
+def _to_naive_utc(value: datetime | None) -> datetime | None:
+    """Log dates are stored as naive UTC, like the utcnow() default; convert offset-aware input."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _not_in_future(value: datetime | None) -> datetime | None:
+    """Naive UTC log date of a new or moved check-in, which can't be in the future.
+
+    Streaks only count periods up to today's, so a future check-in would end them early.
+    """
+    value = _to_naive_utc(value)
+    if value is None:
+        return value
+    now = datetime.utcnow()
+    if value > now + LOG_DATE_MAX_SKEW:
+        raise ValueError("log_date can't be in the future")
+    return min(value, now)
 
 
 class HabitLogBase(BaseModel):
     log_date: datetime = Field(default_factory=datetime.utcnow, description="Date and time of the log entry")
     notes: str | None = Field(default=None, max_length=2000, description="Optional notes for this check-in")
 
+    _normalize_log_date = field_validator("log_date")(_to_naive_utc)
+
 
 class HabitLogCreate(HabitLogBase):
     habit_id: int = Field(..., description="ID of the habit this log belongs to")
 
+    _check_log_date = field_validator("log_date")(_not_in_future)
+
 
 class HabitLogResponse(HabitLogBase):
     id: int
     habit_id: int
+    sentiment: str | None = Field(default=None, description="Mood of the notes: positive, negative or neutral")
+    sentiment_score: float | None = Field(default=None, description="Signed mood confidence, from -0.9 to 0.9")
     created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class CheckInResponse(HabitLogResponse):
+    streak: int = Field(..., description="Current streak of the habit after this check-in")
+    xp_awarded: int = Field(..., description="XP earned by this check-in, including streak and badge bonuses")
+    total_xp: int
+    level: int
+    xp_to_next_level: int
+    new_badges: list[dict[str, str | int]] = Field(default_factory=list, description="Badges unlocked by this check-in")
+
+
 class HabitLogUpdate(BaseModel):
     log_date: datetime | None = None
     notes: str | None = Field(default=None, max_length=2000)
 
+    _check_log_date = field_validator("log_date")(_not_in_future)
+
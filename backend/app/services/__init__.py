@@ -1,8 +1,30 @@
 from app.services.ai_service import AIService
 from app.services.analytics_service import AnalyticsService
+from app.services.checkin_service import CheckInService
+from app.services.export_service import ExportService
 from app.services.gamification_service import GamificationService
 from app.services.habit_log_service import HabitLogService
 from app.services.habit_service import HabitService
+from app.services.import_service import ImportService
+from app.services.insights_service import InsightsService
+from app.services.mood_service import MoodService
+from app.services.recommendation_service import RecommendationService
+from app.services.rollup_service import RollupService
+from app.services.streak_service import StreakService
 
-__all__ = ["HabitService", "HabitLogService", "AnalyticsService", "AIService", "GamificationService"]
+__all__ = [
+    "HabitService",
+    "HabitLogService",
+    "AnalyticsService",
+    "AIService",
+    "CheckInService",
+    "ExportService",
+    "GamificationService",
+    "ImportService",
+    "InsightsService",
+    "MoodService",
+    "RecommendationService",
+    "RollupService",
+    "StreakService",
+]
 
@@ -1,9 +1,65 @@
+import hashlib
+import re
+from collections.abc import Iterable
 from typing import List
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import ResponseCache
 from app.models.habit import Habit, HabitCategory
+from app.models.habit_log import HabitLog
+from app.services.recommendation_service import RecommendationService
+
+
+POSITIVE_KEYWORDS = (
+    "great", "good", "excellent", "amazing", "wonderful", "happy", "proud", "excited",
+    "motivated", "energetic", "grateful", "blessed", "accomplished", "satisfied", "confident",
+)
+NEGATIVE_KEYWORDS = (
+    "bad", "difficult", "hard", "struggled", "tired", "stressed", "anxious", "frustrated",
+    "disappointed", "sad", "exhausted", "overwhelmed", "worried", "challenging",
+)
+
+# One pass over the note finds every keyword; \b keeps "bad" from matching "badminton"
+_MOOD_KEYWORD_ORDER = {keyword: index for index, keyword in enumerate(POSITIVE_KEYWORDS + NEGATIVE_KEYWORDS)}
+_MOOD_KEYWORD_PATTERN = re.compile(r"\b(" + "|".join(map(re.escape, _MOOD_KEYWORD_ORDER)) + r")\b")
+
+# Static catalog, used when the recommendation model has too little data for a user
+CATEGORY_SUGGESTIONS = {
+    HabitCategory.HEALTH: [
+        {"name": "Drink 8 glasses of water", "category": "health", "frequency": "daily"},
+        {"name": "Take vitamins", "category": "health", "frequency": "daily"},
+        {"name": "Get 8 hours of sleep", "category": "health", "frequency": "daily"},
+    ],
+    HabitCategory.FITNESS: [
+        {"name": "30-minute walk", "category": "fitness", "frequency": "daily"},
+        {"name": "Stretching routine", "category": "fitness", "frequency": "daily"},
+        {"name": "Strength training", "category": "fitness", "frequency": "weekly"},
+    ],
+    HabitCategory.LEARNING: [
+        {"name": "Read for 30 minutes", "category": "learning", "frequency": "daily"},
+        {"name": "Practice a new skill", "category": "learning", "frequency": "daily"},
+        {"name": "Watch educational content", "category": "learning", "frequency": "weekly"},
+    ],
+    HabitCategory.MENTAL_HEALTH: [
+        {"name": "Meditation", "category": "mental_health", "frequency": "daily"},
+        {"name": "Journaling", "category": "mental_health", "frequency": "daily"},
+        {"name": "Gratitude practice", "category": "mental_health", "frequency": "daily"},
+    ],
+    HabitCategory.PRODUCTIVITY: [
+        {"name": "Plan your day", "category": "productivity", "frequency": "daily"},
+        {"name": "Review weekly goals", "category": "productivity", "frequency": "weekly"},
+        {"name": "Organize workspace", "category": "productivity", "frequency": "weekly"},
+    ],
+    HabitCategory.WORK: [
+        {"name": "Take regular breaks", "category": "work", "frequency": "daily"},
+        {"name": "Review daily tasks", "category": "work", "frequency": "daily"},
+    ],
+}
+
+# Analyses keyed by the SHA-1 of the note; the analysis of a given text never changes
+mood_cache = ResponseCache(max_entries=4096, ttl_seconds=float("inf"))
 
 
 class AIService:
@@ -12,55 +68,23 @@ class AIService:
     @staticmethod
     async def suggest_habits(db: AsyncSession, user_habits: List[Habit]) -> List[dict[str, str]]:
         """Suggest new habits based on existing habits and categories."""
-        suggestions = []
+        # Habits that people with similar habits keep up come first
+        suggestions = RecommendationService.recommend([habit.name for habit in user_habits])
 
         # Get all existing categories
         existing_categories = {habit.category for habit in user_habits}
 
-        # Category-based suggestions
-        category_suggestions = {
-            HabitCategory.HEALTH: [
-                {"name": "Drink 8 glasses of water", "category": "health", "frequency": "daily"},
-                {"name": "Take vitamins", "category": "health", "frequency": "daily"},
-                {"name": "Get 8 hours of sleep", "category": "health", "frequency": "daily"},
-            ],
-            HabitCategory.FITNESS: [
-                {"name": "30-minute walk", "category": "fitness", "frequency": "daily"},
-                {"name": "Stretching routine", "category": "fitness", "frequency": "daily"},
-                {"name": "Strength training", "category": "fitness", "frequency": "weekly"},
-            ],
-            HabitCategory.LEARNING: [
-                {"name": "Read for 30 minutes", "category": "learning", "frequency": "daily"},
-                {"name": "Practice a new skill", "category": "learning", "frequency": "daily"},
-                {"name": "Watch educational content", "category": "learning", "frequency": "weekly"},
-            ],
-            HabitCategory.MENTAL_HEALTH: [
-                {"name": "Meditation", "category": "mental_health", "frequency": "daily"},
-                {"name": "Journaling", "category": "mental_health", "frequency": "daily"},
-                {"name": "Gratitude practice", "category": "mental_health", "frequency": "daily"},
-            ],
-            HabitCategory.PRODUCTIVITY: [
-                {"name": "Plan your day", "category": "productivity", "frequency": "daily"},
-                {"name": "Review weekly goals", "category": "productivity", "frequency": "weekly"},
-                {"name": "Organize workspace", "category": "productivity", "frequency": "weekly"},
-            ],
-            HabitCategory.WORK: [
-                {"name": "Take regular breaks", "category": "work", "frequency": "daily"},
-                {"name": "Review daily tasks", "category": "work", "frequency": "daily"},
-            ],
-        }
-
         # Suggest habits from categories the user doesn't have yet
         for category in HabitCategory:
-            if category not in existing_categories and category in category_suggestions:
-                suggestions.extend(category_suggestions[category][:2])  # Top 2 from each category
+            if category not in existing_categories and category in CATEGORY_SUGGESTIONS:
+                suggestions.extend(CATEGORY_SUGGESTIONS[category][:2])  # Top 2 from each category
 
         # Also suggest complementary habits for existing categories
         for habit in user_habits[:3]:  # Look at top 3 habits
-            if habit.category in category_suggestions:
+            if habit.category in CATEGORY_SUGGESTIONS:
                 # Get suggestions that aren't already in user's habits
                 existing_names = {h.name.lower() for h in user_habits}
-                for suggestion in category_suggestions[habit.category]:
+                for suggestion in CATEGORY_SUGGESTIONS[habit.category]:
                     if suggestion["name"].lower() not in existing_names:
                         suggestions.append(suggestion)
                         break
@@ -84,23 +108,10 @@ class AIService:
         if not notes:
             return {"sentiment": "neutral", "confidence": 0.0, "keywords": []}
 
-        notes_lower = notes.lower()
-
-        # Positive keywords
-        positive_keywords = [
-            "great", "good", "excellent", "amazing", "wonderful", "happy", "proud", "excited",
-            "motivated", "energetic", "grateful", "blessed", "accomplished", "satisfied", "confident"
-        ]
-
-        # Negative keywords
-        negative_keywords = [
-            "bad", "difficult", "hard", "struggled", "tired", "stressed", "anxious", "frustrated",
-            "disappointed", "sad", "exhausted", "overwhelmed", "worried", "challenging"
-        ]
-
-        # Count matches
-        positive_count = sum(1 for word in positive_keywords if word in notes_lower)
-        negative_count = sum(1 for word in negative_keywords if word in notes_lower)
+        # Distinct whole-word keyword matches, in keyword-list order
+        found_keywords = sorted(set(_MOOD_KEYWORD_PATTERN.findall(notes.lower())), key=_MOOD_KEYWORD_ORDER.__getitem__)
+        positive_count = sum(1 for keyword in found_keywords if keyword in POSITIVE_KEYWORDS)
+        negative_count = len(found_keywords) - positive_count
 
         # Determine sentiment
         if positive_count > negative_count:
@@ -113,19 +124,40 @@ class AIService:
             sentiment = "neutral"
             confidence = 0.5
 
-        # Extract found keywords
-        found_keywords = []
-        all_keywords = positive_keywords + negative_keywords
-        for keyword in all_keywords:
-            if keyword in notes_lower:
-                found_keywords.append(keyword)
-
         return {
             "sentiment": sentiment,
             "confidence": round(confidence, 2),
             "keywords": found_keywords[:5],  # Top 5 keywords
         }
 
+    @staticmethod
+    def analyze_moods(notes: Iterable[str]) -> List[dict[str, str | float]]:
+        """Analyze many notes, reusing earlier results for notes with the same content."""
+        results = []
+        for note in notes:
+            key = hashlib.sha1(note.encode()).digest()
+            found, analysis = mood_cache.get(key)
+            if not found:
+                analysis = AIService.analyze_mood_from_notes(note)
+                mood_cache.set(key, analysis)
+            results.append({**analysis, "keywords": list(analysis["keywords"])})
+        return results
+
+    @staticmethod
+    async def analyze_habit_moods(db: AsyncSession, user_id: int, habit_id: int) -> List[dict]:
+        """Analyze the notes of every log of one of a user's habits, oldest first."""
+        result = await db.execute(
+            select(HabitLog.id, HabitLog.log_date, HabitLog.notes)
+            .where(HabitLog.habit_id == habit_id, HabitLog.user_id == user_id, HabitLog.notes.is_not(None))
+            .order_by(HabitLog.log_date, HabitLog.id)
+        )
+        rows = result.all()
+        analyses = AIService.analyze_moods(row.notes for row in rows)
+        return [
+            {"log_id": row.id, "log_date": row.log_date.isoformat(), "analysis": analysis}
+            for row, analysis in zip(rows, analyses)
+        ]
+
     @staticmethod
     def get_motivational_quote() -> dict[str, str]:
         """Get a random motivational quote."""
@@ -168,17 +200,14 @@ class AIService:
         return random.choice(quotes)
 
     @staticmethod
-    async def generate_progress_insights(db: AsyncSession) -> dict[str, str | List[dict[str, str]]]:
-        """Generate AI-powered insights about user's habit progress."""
+    async def generate_progress_insights(db: AsyncSession, user_id: int) -> dict[str, str | List[dict[str, str]]]:
+        """Generate AI-powered insights about a user's habit progress."""
         try:
-            from app.models.habit_log import HabitLog
             from app.services.habit_log_service import HabitLogService
             from app.services.analytics_service import AnalyticsService
-            from sqlalchemy import select, func
-            from datetime import datetime, timedelta
 
             # Get all habits
-            habits_result = await db.execute(select(Habit))
+            habits_result = await db.execute(select(Habit).where(Habit.user_id == user_id))
             habits = habits_result.scalars().all()
 
             if not habits:
@@ -197,19 +226,18 @@ class AIService:
             insights = []
             recommendations = []
 
+            # Streaks, success rates and check-in counts for every habit at once
+            habit_stats = await HabitLogService.get_stats_for_habits(db, user_id, [habit.id for habit in habits])
+
             # Analyze streaks
             try:
                 max_streak = 0
                 best_habit = None
                 for habit in habits:
-                    try:
-                        streak = await HabitLogService.get_streak(db, habit.id)
-                        if streak > max_streak:
-                            max_streak = streak
-                            best_habit = habit
-                    except Exception as e:
-                        print(f"Error getting streak for habit {habit.id}: {e}")
-                        continue
+                    streak = habit_stats[habit.id]["streak"]
+                    if streak > max_streak:
+                        max_streak = streak
+                        best_habit = habit
 
                 if max_streak >= 7 and best_habit:
                     insights.append({
@@ -233,15 +261,11 @@ class AIService:
                 low_success_habits = []
                 high_success_habits = []
                 for habit in habits:
-                    try:
-                        success_rate = await HabitLogService.get_success_rate(db, habit.id)
-                        if success_rate < 50:
-                            low_success_habits.append((habit, success_rate))
-                        elif success_rate >= 80:
-                            high_success_habits.append((habit, success_rate))
-                    except Exception as e:
-                        print(f"Error getting success rate for habit {habit.id}: {e}")
-                        continue
+                    success_rate = habit_stats[habit.id]["success_rate"]
+                    if success_rate < 50:
+                        low_success_habits.append((habit, success_rate))
+                    elif success_rate >= 80:
+                        high_success_habits.append((habit, success_rate))
 
                 if low_success_habits:
                     habit, rate = min(low_success_habits, key=lambda x: x[1])
@@ -270,13 +294,12 @@ class AIService:
 
             # Analyze check-in patterns
             try:
-                logs_result = await db.execute(select(HabitLog))
-                all_logs = logs_result.scalars().all()
-                
-                if all_logs:
+                total_checkins = sum(stats["total_checkins"] for stats in habit_stats.values())
+
+                if total_checkins:
                     # Get best days
                     try:
-                        best_days_data = await AnalyticsService.get_best_days(db)
+                        best_days_data = await AnalyticsService.get_best_days(db, user_id)
                         if best_days_data and len(best_days_data) > 0:
                             best_day = max(best_days_data.items(), key=lambda x: x[1])
                             if best_day[1] > 0:
@@ -289,22 +312,21 @@ class AIService:
                     except Exception as e:
                         print(f"Error getting best days: {e}")
 
-                # Analyze recent activity
-                week_ago = datetime.now() - timedelta(days=7)
-                recent_logs = [log for log in all_logs if log.log_date >= week_ago]
-                
-                if len(recent_logs) >= 7:
+                # Analyze recent activity (check-ins over the last 7 days)
+                recent_checkins = sum(stats["recent_checkins"] for stats in habit_stats.values())
+
+                if recent_checkins >= 7:
                     insights.append({
                         "type": "success",
                         "title": "Perfect Week!",
-                        "message": f"You've completed {len(recent_logs)} check-ins this week. You're on track for the 'Perfect Week' badge!",
+                        "message": f"You've completed {recent_checkins} check-ins this week. You're on track for the 'Perfect Week' badge!",
                         "icon": "🎉"
                     })
-                elif len(recent_logs) < 3:
+                elif recent_checkins < 3:
                     insights.append({
                         "type": "warning",
                         "title": "Low Activity",
-                        "message": f"Only {len(recent_logs)} check-ins this week. Try to check in more consistently to build momentum!",
+                        "message": f"Only {recent_checkins} check-ins this week. Try to check in more consistently to build momentum!",
                         "icon": "📊"
                     })
                     recommendations.append({
@@ -342,15 +364,8 @@ class AIService:
             # Predict success likelihood
             if habits:
                 try:
-                    success_rates = []
-                    for habit in habits:
-                        try:
-                            rate = await HabitLogService.get_success_rate(db, habit.id)
-                            success_rates.append(rate)
-                        except Exception as e:
-                            print(f"Error getting success rate for habit {habit.id}: {e}")
-                            continue
-                    
+                    success_rates = [stats["success_rate"] for stats in habit_stats.values()]
+
                     if success_rates:
                         avg_success = sum(success_rates) / len(success_rates)
                 
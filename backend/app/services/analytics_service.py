@@ -1,35 +1,72 @@
+import calendar
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import date, timedelta
+from itertools import chain
+from typing import Any
 
+import numpy as np
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.habit_log import HabitLog
+from app.db.expressions import day_ordinal_expression, weekday_expression
+from app.models.habit import Habit, HabitFrequency
+from app.models.habit_daily_rollup import HabitDailyRollup
+
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Trailing windows, in days, of the rolling success curves
+ROLLING_WINDOWS = (7, 30, 90)
+
+
+def _to_json_floats(values: np.ndarray) -> list[float | None]:
+    """Round to one decimal and turn NaN (no data) into None."""
+    rounded = np.round(values, 1)
+    return np.where(np.isnan(rounded), None, rounded).tolist()
 
 
 class AnalyticsService:
+    """Dashboard analytics, read from the habit_daily_rollup table rather than raw logs."""
+
+    @staticmethod
+    async def get_best_days(db: AsyncSession, user_id: int, habit_id: int | None = None) -> dict[str, int]:
+        """Get a user's check-in counts by day of week."""
+        weekday = weekday_expression(db.bind.dialect.name, HabitDailyRollup.day)
+        if weekday is None:
+            return await AnalyticsService._get_best_days_python(db, user_id, habit_id)
+
+        query = (
+            select(weekday.label("weekday"), func.sum(HabitDailyRollup.checkin_count).label("checkins"))
+            .where(HabitDailyRollup.user_id == user_id)
+        )
+
+        if habit_id:
+            query = query.where(HabitDailyRollup.habit_id == habit_id)
+
+        try:
+            result = await db.execute(query.group_by(weekday).order_by(weekday))
+            return {DAY_NAMES[int(row.weekday)]: row.checkins for row in result.all()}
+        except Exception as e:
+            print(f"Error in get_best_days: {e}")
+            return {}
+
     @staticmethod
-    async def get_best_days(db: AsyncSession, habit_id: int | None = None) -> dict[str, int]:
-        """Get check-in counts by day of week."""
-        query = select(HabitLog.log_date)
+    async def _get_best_days_python(db: AsyncSession, user_id: int, habit_id: int | None = None) -> dict[str, int]:
+        """Fallback for dialects without a weekday expression: count in Python."""
+        query = select(HabitDailyRollup.day, HabitDailyRollup.checkin_count).where(HabitDailyRollup.user_id == user_id)
 
         if habit_id:
-            query = query.where(HabitLog.habit_id == habit_id)
+            query = query.where(HabitDailyRollup.habit_id == habit_id)
 
         try:
             result = await db.execute(query)
-            logs = result.scalars().all()
 
             # Count by day of week (0=Monday, 6=Sunday in Python)
             day_counts = defaultdict(int)
-            day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
 
-            for log_date in logs:
-                if log_date:
-                    # Python weekday(): 0=Monday, 6=Sunday
-                    day_num = log_date.weekday()
-                    day_name = day_names[day_num]
-                    day_counts[day_name] += 1
+            for day, checkin_count in result.all():
+                # Python weekday(): 0=Monday, 6=Sunday
+                day_counts[DAY_NAMES[day.weekday()]] += checkin_count
 
             return dict(day_counts)
         except Exception as e:
@@ -38,48 +75,42 @@ class AnalyticsService:
 
     @staticmethod
     async def get_checkins_by_date(
-        db: AsyncSession, habit_id: int | None = None, days: int = 30
+        db: AsyncSession, user_id: int, habit_id: int | None = None, days: int = 30
     ) -> dict[str, int]:
-        """Get check-in counts by date for the last N days."""
-        start_date = datetime.now() - timedelta(days=days)
-        
-        query = select(HabitLog.log_date).where(HabitLog.log_date >= start_date)
+        """Get a user's check-in counts by date for the last N days."""
+        start_date = date.today() - timedelta(days=days)
+
+        query = (
+            select(HabitDailyRollup.day, func.sum(HabitDailyRollup.checkin_count).label("checkins"))
+            .where(HabitDailyRollup.user_id == user_id, HabitDailyRollup.day >= start_date)
+        )
 
         if habit_id:
-            query = query.where(HabitLog.habit_id == habit_id)
+            query = query.where(HabitDailyRollup.habit_id == habit_id)
 
         try:
-            result = await db.execute(query)
-            logs = result.scalars().all()
-
-            # Count by date
-            date_counts = defaultdict(int)
-            for log_date in logs:
-                if log_date:
-                    date_str = log_date.date().isoformat()
-                    date_counts[date_str] += 1
-
-            return dict(date_counts)
+            result = await db.execute(query.group_by(HabitDailyRollup.day).order_by(HabitDailyRollup.day))
+            return {row.day.isoformat(): row.checkins for row in result.all()}
         except Exception as e:
             print(f"Error in get_checkins_by_date: {e}")
             return {}
 
     @staticmethod
-    async def get_category_stats(db: AsyncSession) -> dict[str, dict[str, int]]:
-        """Get statistics grouped by habit category."""
+    async def get_category_stats(db: AsyncSession, user_id: int) -> dict[str, dict[str, int]]:
+        """Get a user's statistics grouped by habit category."""
         from app.models.habit import Habit
 
         try:
             # Get all habits with their categories
-            habits_query = select(Habit.id, Habit.category)
+            habits_query = select(Habit.id, Habit.category).where(Habit.user_id == user_id)
             habits_result = await db.execute(habits_query)
             habits = habits_result.all()
 
             # Get log counts per habit
             logs_query = select(
-                HabitLog.habit_id,
-                func.count(HabitLog.id).label("log_count")
-            ).group_by(HabitLog.habit_id)
+                HabitDailyRollup.habit_id,
+                func.sum(HabitDailyRollup.checkin_count).label("log_count")
+            ).where(HabitDailyRollup.user_id == user_id).group_by(HabitDailyRollup.habit_id)
             logs_result = await db.execute(logs_query)
             log_counts = {row.habit_id: row.log_count for row in logs_result.all()}
 
@@ -97,23 +128,27 @@ class AnalyticsService:
             return {}
 
     @staticmethod
-    async def get_overall_stats(db: AsyncSession) -> dict[str, int | float]:
-        """Get overall statistics across all habits."""
+    async def get_overall_stats(db: AsyncSession, user_id: int) -> dict[str, int | float]:
+        """Get overall statistics across all of a user's habits."""
         from app.models.habit import Habit
 
         try:
             # Total habits
-            habits_result = await db.execute(select(func.count(Habit.id)))
+            habits_result = await db.execute(select(func.count(Habit.id)).where(Habit.user_id == user_id))
             total_habits = habits_result.scalar() or 0
 
             # Total check-ins
-            logs_result = await db.execute(select(func.count(HabitLog.id)))
+            logs_result = await db.execute(
+                select(func.sum(HabitDailyRollup.checkin_count)).where(HabitDailyRollup.user_id == user_id)
+            )
             total_checkins = logs_result.scalar() or 0
 
-            # Total check-ins this week
-            week_start = datetime.now() - timedelta(days=datetime.now().weekday())
+            # Total check-ins this week (since Monday)
+            week_start = date.today() - timedelta(days=date.today().weekday())
             week_logs_result = await db.execute(
-                select(func.count(HabitLog.id)).where(HabitLog.log_date >= week_start)
+                select(func.sum(HabitDailyRollup.checkin_count)).where(
+                    HabitDailyRollup.user_id == user_id, HabitDailyRollup.day >= week_start
+                )
             )
             week_checkins = week_logs_result.scalar() or 0
 
@@ -129,3 +164,178 @@ class AnalyticsService:
                 "total_checkins": 0,
                 "week_checkins": 0,
             }
+
+    @staticmethod
+    async def _load_checkin_days(
+        db: AsyncSession, user_id: int, since: date, habit_id: int | None = None
+    ) -> tuple[list, np.ndarray, np.ndarray, np.ndarray]:
+        """A user's habits and their check-in days since ``since`` as parallel arrays.
+
+        Returns the habits (ordered by id) and, per day with check-ins, the position of its
+        habit in that list, its date ordinal and its check-in count, sorted by habit and day.
+        """
+        habits_query = select(Habit.id, Habit.name, Habit.frequency, Habit.start_date).where(Habit.user_id == user_id)
+        if habit_id:
+            habits_query = habits_query.where(Habit.id == habit_id)
+        habits_result = await db.execute(habits_query.order_by(Habit.id))
+        habits = habits_result.all()
+
+        day = day_ordinal_expression(db.bind.dialect.name, HabitDailyRollup.day)
+        days_query = select(
+            HabitDailyRollup.habit_id,
+            day if day is not None else HabitDailyRollup.day,
+            HabitDailyRollup.checkin_count,
+        ).where(HabitDailyRollup.user_id == user_id, HabitDailyRollup.day >= since)
+        if habit_id:
+            days_query = days_query.where(HabitDailyRollup.habit_id == habit_id)
+
+        # Plain tuples through a Core connection: this can be years of rows
+        connection = await db.connection()
+        days_result = await connection.execute(days_query.order_by(HabitDailyRollup.habit_id, HabitDailyRollup.day))
+        rows = days_result.all()
+        if day is None:
+            rows = [(row_habit_id, log_day.toordinal(), count) for row_habit_id, log_day, count in rows]
+        columns = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=3 * len(rows)).reshape(-1, 3)
+
+        habit_ids = np.array([habit.id for habit in habits], dtype=np.int64)
+        row_habit_ids, ordinals, counts = columns[:, 0], columns[:, 1], columns[:, 2]
+        return habits, np.searchsorted(habit_ids, row_habit_ids), ordinals, counts
+
+    @staticmethod
+    async def get_rolling_success(
+        db: AsyncSession, user_id: int, days: int = 90, habit_id: int | None = None
+    ) -> dict[str, Any]:
+        """Trailing 7/30/90-day success rate of each habit, for every one of the last ``days`` days.
+
+        A day's rate is the share of the window's days (since the habit started) that had a
+        check-in; weekly habits count weeks with a check-in against the weeks in the window.
+        Days before a habit started have no rate (None).
+        """
+        end = date.today().toordinal()
+        first = end - days + 1
+        origin = first - max(ROLLING_WINDOWS)
+        habits, habit_positions, ordinals, _ = await AnalyticsService._load_checkin_days(
+            db, user_id, date.fromordinal(origin), habit_id
+        )
+
+        start_ordinals = np.array([habit.start_date.toordinal() for habit in habits], dtype=np.int64)
+        weekly = np.array([habit.frequency == HabitFrequency.WEEKLY for habit in habits], dtype=bool)
+
+        # Check-ins before a habit started never count, and can't claim its first week either
+        started = ordinals >= start_ordinals[habit_positions]
+        habit_positions, ordinals = habit_positions[started], ordinals[started]
+
+        # Weekly habits: only the first check-in of each week (ordinal 1 is a Monday) counts
+        weeks = (ordinals - 1) // 7
+        _, first_in_week = np.unique(np.stack([habit_positions, weeks]), axis=1, return_index=True)
+        counted = ~weekly[habit_positions]
+        counted[first_in_week] = True
+
+        done = np.zeros((len(habits), end - origin + 1), dtype=np.int32)
+        done[habit_positions[counted], ordinals[counted] - origin] = 1
+        cumulative = np.concatenate([np.zeros((len(habits), 1), dtype=np.int32), np.cumsum(done, axis=1)], axis=1)
+
+        day_ordinals = np.arange(first, end + 1)
+        columns = day_ordinals - origin + 1
+        rolling = {}
+        for window in ROLLING_WINDOWS:
+            completed = cumulative[:, columns] - cumulative[:, columns - window]
+            eligible = np.clip(day_ordinals[None, :] - start_ordinals[:, None] + 1, 0, window)
+            expected = np.where(weekly[:, None], np.ceil(eligible / 7), eligible)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rates = np.where(expected > 0, np.minimum(100.0, completed / expected * 100), np.nan)
+            rolling[window] = rates
+
+        return {
+            "start_date": date.fromordinal(first).isoformat(),
+            "end_date": date.fromordinal(end).isoformat(),
+            "windows": list(ROLLING_WINDOWS),
+            "habits": [
+                {
+                    "habit_id": habit.id,
+                    "name": habit.name,
+                    "rolling_success": {str(window): _to_json_floats(rolling[window][position]) for window in ROLLING_WINDOWS},
+                }
+                for position, habit in enumerate(habits)
+            ],
+        }
+
+    @staticmethod
+    async def get_year_heatmaps(
+        db: AsyncSession, user_id: int, year: int, years: int = 1, habit_id: int | None = None
+    ) -> list[dict[str, Any]]:
+        """Check-ins per calendar day for ``years`` years ending with ``year``, oldest first.
+
+        ``first_weekday`` (0 = Monday) of each year lets a client lay the days out in week columns.
+        """
+        origin = date(year - years + 1, 1, 1).toordinal()
+        _, _, ordinals, counts = await AnalyticsService._load_checkin_days(
+            db, user_id, date.fromordinal(origin), habit_id
+        )
+        end = date(year, 12, 31).toordinal()
+        in_range = ordinals <= end
+        per_day = np.bincount(ordinals[in_range] - origin, weights=counts[in_range], minlength=end - origin + 1)
+
+        heatmaps = []
+        offset = 0
+        for heatmap_year in range(year - years + 1, year + 1):
+            length = 366 if calendar.isleap(heatmap_year) else 365
+            counts_of_year = per_day[offset : offset + length].astype(np.int64)
+            heatmaps.append({
+                "year": heatmap_year,
+                "first_weekday": date(heatmap_year, 1, 1).weekday(),
+                "total": int(counts_of_year.sum()),
+                "max": int(counts_of_year.max()),
+                "active_days": int(np.count_nonzero(counts_of_year)),
+                "counts": counts_of_year.tolist(),
+            })
+            offset += length
+        return heatmaps
+
+    @staticmethod
+    async def get_week_over_week(
+        db: AsyncSession, user_id: int, weeks: int = 12, habit_id: int | None = None
+    ) -> dict[str, Any]:
+        """Check-ins per week (Monday to Sunday) for the last ``weeks`` weeks, with the change on the
+        week before, plus this week against last week for every habit. The current week is partial.
+        """
+        this_week = date.today() - timedelta(days=date.today().weekday())
+        origin = this_week.toordinal() - 7 * weeks
+        habits, habit_positions, ordinals, counts = await AnalyticsService._load_checkin_days(
+            db, user_id, date.fromordinal(origin), habit_id
+        )
+
+        week_positions = (ordinals - origin) // 7
+        in_range = week_positions <= weeks
+        totals = np.bincount(week_positions[in_range], weights=counts[in_range], minlength=weeks + 1)
+        deltas = np.diff(totals)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            changes = np.where(totals[:-1] > 0, deltas / totals[:-1] * 100, np.nan)
+
+        per_habit = np.bincount(
+            habit_positions[in_range] * (weeks + 1) + week_positions[in_range],
+            weights=counts[in_range],
+            minlength=len(habits) * (weeks + 1),
+        ).reshape(len(habits), weeks + 1)
+
+        return {
+            "weeks": [
+                {
+                    "week_start": date.fromordinal(origin + 7 * (position + 1)).isoformat(),
+                    "checkins": int(totals[position + 1]),
+                    "delta": int(deltas[position]),
+                    "change_pct": change,
+                }
+                for position, change in enumerate(_to_json_floats(changes))
+            ],
+            "habits": [
+                {
+                    "habit_id": habit.id,
+                    "name": habit.name,
+                    "this_week": int(per_habit[position, -1]),
+                    "last_week": int(per_habit[position, -2]),
+                    "delta": int(per_habit[position, -1] - per_habit[position, -2]),
+                }
+                for position, habit in enumerate(habits)
+            ],
+        }
@@ -0,0 +1,31 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import DataScope, data_versions
+from app.models.habit_log import HabitLog
+from app.schemas.habit_log import HabitLogCreate
+from app.services.completion_index import completion_index
+from app.services.gamification_service import GamificationService
+from app.services.insights_service import InsightsService
+from app.services.habit_log_service import HabitLogService
+
+
+class CheckInService:
+    """Records a check-in and all of its rewards in a single transaction."""
+
+    @staticmethod
+    async def check_in(db: AsyncSession, user_id: int, log_in: HabitLogCreate) -> tuple[HabitLog, dict] | None:
+        """Create the log, award check-in and streak XP and any new badges, then commit once.
+
+        Returns None if the habit doesn't exist or belongs to another user.
+        """
+        staged = await HabitLogService.stage_create(db, user_id, log_in)
+        if staged is None:
+            return None
+        log, streak = staged
+        rewards = await GamificationService.award_checkin(db, user_id, streak)
+        await db.commit()
+        data_versions.bump(DataScope.HABIT_LOGS, DataScope.GAMIFICATION)
+        InsightsService.mark_stale(user_id)
+        completion_index.record_checkin(log.habit_id, log.log_day)
+        await db.refresh(log)
+        return log, {"streak": streak, **rewards}
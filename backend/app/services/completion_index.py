@@ -0,0 +1,164 @@
+import sys
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import date, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.metrics import register_cache
+from app.models.habit import Habit, HabitFrequency
+from app.models.habit_daily_rollup import HabitDailyRollup
+
+settings = get_settings()
+
+# Habits written to while not loaded are remembered up to this many, then forgotten wholesale
+_MAX_WRITE_MARKS = 10000
+
+
+class HabitCompletion:
+    """Which days, and which ISO weeks, of one habit have a check-in.
+
+    Bit ``n`` of ``days`` is the n-th day from the Monday of the start week, bit ``n`` of
+    ``weeks`` the n-th week. Days before ``start_date`` are never set, so counting bits
+    counts exactly the check-ins a success rate expects.
+    """
+
+    __slots__ = ("origin", "start_offset", "days", "weeks")
+
+    def __init__(self, start_date: date) -> None:
+        monday = start_date - timedelta(days=start_date.weekday())
+        self.origin = monday.toordinal()
+        self.start_offset = start_date.toordinal() - self.origin
+        self.days = 0
+        self.weeks = 0
+
+    def add(self, day: date) -> None:
+        offset = day.toordinal() - self.origin
+        if offset >= self.start_offset:
+            self.days |= 1 << offset
+            self.weeks |= 1 << (offset // 7)
+
+    def completed_periods(self, frequency: HabitFrequency) -> int:
+        """Days (daily habits) or weeks (weekly habits) with at least one check-in."""
+        return (self.days if frequency == HabitFrequency.DAILY else self.weeks).bit_count()
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.days) + sys.getsizeof(self.weeks) + sys.getsizeof(self)
+
+
+class CompletionIndex:
+    """In-memory per-habit completion bitsets, loaded on first use and kept under a byte budget.
+
+    Check-ins are folded in after their transaction commits; anything else that changes a
+    habit's days (deletes, date moves, imports, start date changes) invalidates it so the
+    next read reloads it from the rollup table.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[int, HabitCompletion] = OrderedDict()
+        self._bytes = 0
+        self._writes = 0
+        self._write_marks: dict[int, int] = {}
+        self._marks_floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get_many(self, db: AsyncSession, habits: Iterable[Habit]) -> dict[int, HabitCompletion]:
+        """Bitsets of ``habits``, loading the missing ones with a single query."""
+        found: dict[int, HabitCompletion] = {}
+        missing: dict[int, Habit] = {}
+        for habit in habits:
+            entry = self._entries.get(habit.id)
+            if entry is not None:
+                self._entries.move_to_end(habit.id)
+                self.hits += 1
+                found[habit.id] = entry
+            else:
+                self.misses += 1
+                missing[habit.id] = habit
+
+        if missing:
+            writes_before_load = self._writes
+            loaded = {habit_id: HabitCompletion(habit.start_date) for habit_id, habit in missing.items()}
+            result = await db.execute(
+                select(HabitDailyRollup.habit_id, HabitDailyRollup.day).where(HabitDailyRollup.habit_id.in_(missing))
+            )
+            for habit_id, day in result.all():
+                loaded[habit_id].add(day)
+
+            for habit_id, entry in loaded.items():
+                found[habit_id] = entry
+                # A write that landed while loading may be missing from what was read
+                if max(self._marks_floor, self._write_marks.get(habit_id, 0)) <= writes_before_load:
+                    self._store(habit_id, entry)
+        return found
+
+    async def get(self, db: AsyncSession, habit: Habit) -> HabitCompletion:
+        return (await self.get_many(db, [habit]))[habit.id]
+
+    def record_checkin(self, habit_id: int, day: date) -> None:
+        """Fold a committed check-in into the habit's bitset."""
+        entry = self._entries.get(habit_id)
+        if entry is None:
+            self._mark_write(habit_id)
+            return
+        self._bytes -= entry.nbytes()
+        entry.add(day)
+        self._bytes += entry.nbytes()
+        self._evict_over_budget()
+
+    def invalidate(self, *habit_ids: int) -> None:
+        """Drop bitsets whose days changed in ways other than a new check-in."""
+        for habit_id in habit_ids:
+            entry = self._entries.pop(habit_id, None)
+            if entry is not None:
+                self._bytes -= entry.nbytes()
+            self._mark_write(habit_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+        self._write_marks.clear()
+        self._marks_floor = self._writes
+
+    def _mark_write(self, habit_id: int) -> None:
+        self._writes += 1
+        if len(self._write_marks) >= _MAX_WRITE_MARKS:
+            self._write_marks.clear()
+            self._marks_floor = self._writes
+        self._write_marks[habit_id] = self._writes
+
+    def _store(self, habit_id: int, entry: HabitCompletion) -> None:
+        self._write_marks.pop(habit_id, None)
+        previous = self._entries.pop(habit_id, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes()
+        self._entries[habit_id] = entry
+        self._bytes += entry.nbytes()
+        self._evict_over_budget()
+
+    def _evict_over_budget(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.nbytes()
+            self.evictions += 1
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "habits": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+completion_index = CompletionIndex(settings.completion_index_max_bytes)
+register_cache("completion_index", completion_index.stats)
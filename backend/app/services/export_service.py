@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Sequence
+from enum import Enum
+
+from pydantic import BaseModel
+from sqlalchemy import select
+
+from app.db.session import ReadSessionLocal
+from app.models.habit import Habit
+from app.models.habit_log import HabitLog
+from app.schemas.habit import HabitResponse
+from app.schemas.habit_log import HabitLogResponse
+
+# Rows fetched per server-side cursor batch, and written per yielded chunk
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def _csv_chunk(rows: Sequence[Sequence]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+class ExportService:
+    """Streams full-history exports straight from a database cursor, one batch at a time.
+
+    Each generator opens its own session because it keeps running after the route
+    (and its request-scoped session) has returned.
+    """
+
+    @staticmethod
+    async def _stream(query, schema: type[BaseModel], export_format: ExportFormat) -> AsyncIterator[str]:
+        fields = list(schema.model_fields)
+        if export_format == ExportFormat.CSV:
+            # Header goes out before the first query so clients see bytes immediately
+            yield _csv_chunk([fields])
+
+        async with ReadSessionLocal() as session:
+            result = await session.stream_scalars(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            async for partition in result.partitions():
+                records = [schema.model_validate(obj).model_dump(mode="json") for obj in partition]
+                if export_format == ExportFormat.CSV:
+                    yield _csv_chunk([[record[field] for field in fields] for record in records])
+                else:
+                    yield "".join(json.dumps(record) + "\n" for record in records)
+
+    @staticmethod
+    def stream_habits(export_format: ExportFormat, user_id: int) -> AsyncIterator[str]:
+        """All of a user's habits, oldest first."""
+        query = select(Habit).where(Habit.user_id == user_id).order_by(Habit.id)
+        return ExportService._stream(query, HabitResponse, export_format)
+
+    @staticmethod
+    def stream_habit_logs(
+        export_format: ExportFormat, user_id: int, habit_id: int | None = None
+    ) -> AsyncIterator[str]:
+        """A user's complete habit log history, optionally for one habit, in log order."""
+        query = select(HabitLog).where(HabitLog.user_id == user_id).order_by(HabitLog.log_date, HabitLog.id)
+        if habit_id:
+            query = query.where(HabitLog.habit_id == habit_id)
+        return ExportService._stream(query, HabitLogResponse, export_format)
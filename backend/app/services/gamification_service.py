@@ -1,12 +1,15 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import List
 
-from sqlalchemy import select
+from sqlalchemy import case, distinct, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.habit import Habit
-from app.models.habit_log import HabitLog
+from app.core.cache import DataScope, data_versions
+from app.models.habit import Habit, HabitCategory
+from app.models.habit_daily_rollup import HabitDailyRollup
+from app.models.habit_streak import HabitStreak
 from app.models.gamification import UserStats
+from app.services.streak_service import StreakService
 
 
 class BadgeType:
@@ -52,31 +55,205 @@ class GamificationService:
         return 0
 
     @staticmethod
-    async def get_user_stats(db: AsyncSession) -> UserStats:
-        """Get or create user stats."""
+    async def get_user_stats(db: AsyncSession, user_id: int) -> UserStats:
+        """Get or create a user's stats."""
         try:
-            result = await db.execute(select(UserStats).limit(1))
-            stats = result.scalar_one_or_none()
-
-            if not stats:
-                stats = UserStats(total_xp=0, level=1, badges_earned=None)
-                db.add(stats)
+            stats, created = await GamificationService._get_or_create_stats(db, user_id)
+            if created:
                 await db.commit()
+                data_versions.bump(DataScope.GAMIFICATION)
                 await db.refresh(stats)
 
             return stats
         except Exception as e:
             # If table doesn't exist, create a new stats record
-            stats = UserStats(total_xp=0, level=1, badges_earned=None)
+            stats = UserStats(user_id=user_id, total_xp=0, level=1, badges_earned=None)
             db.add(stats)
             await db.commit()
+            data_versions.bump(DataScope.GAMIFICATION)
             await db.refresh(stats)
             return stats
 
     @staticmethod
-    async def add_xp(db: AsyncSession, xp_amount: int) -> UserStats:
-        """Add XP and update level."""
-        stats = await GamificationService.get_user_stats(db)
+    async def _get_or_create_stats(db: AsyncSession, user_id: int) -> tuple[UserStats, bool]:
+        """Get a user's stats row without committing; a new row gets its counters built from current data."""
+        result = await db.execute(select(UserStats).where(UserStats.user_id == user_id))
+        stats = result.scalar_one_or_none()
+        if stats:
+            return stats, False
+
+        stats = UserStats(user_id=user_id, total_xp=0, level=1, badges_earned=None)
+        db.add(stats)
+        await GamificationService._fill_counters(db, stats)
+        await db.flush()
+        return stats, True
+
+    @staticmethod
+    def _current_week_start() -> date:
+        """Monday of the current ISO week."""
+        today = date.today()
+        return today - timedelta(days=today.weekday())
+
+    @staticmethod
+    async def reset_week_counters(db: AsyncSession) -> int:
+        """Start a new week for every user whose week counter belongs to an earlier week. Returns how many."""
+        week_start = GamificationService._current_week_start()
+        result = await db.execute(
+            update(UserStats)
+            .where((UserStats.week_start < week_start) | UserStats.week_start.is_(None))
+            .values(week_checkins=0, week_start=week_start)
+        )
+        await db.commit()
+        data_versions.bump(DataScope.GAMIFICATION)
+        return result.rowcount
+
+    @staticmethod
+    async def _max_current_streak(db: AsyncSession, user_id: int) -> int:
+        """Longest streak that is still alive across a user's habits, from the stored streak states."""
+        result = await db.execute(
+            select(HabitStreak, Habit.frequency)
+            .join(Habit, Habit.id == HabitStreak.habit_id)
+            .where(Habit.user_id == user_id)
+        )
+        return max(
+            (StreakService.current_streak(row.HabitStreak, row.frequency) for row in result.all()),
+            default=0,
+        )
+
+    @staticmethod
+    async def _category_in_use(
+        db: AsyncSession, user_id: int, category: HabitCategory, exclude_habit_id: int | None = None
+    ) -> bool:
+        """Whether any (other) habit of the user uses the given category."""
+        query = select(Habit.id).where(Habit.user_id == user_id, Habit.category == category)
+        if exclude_habit_id is not None:
+            query = query.where(Habit.id != exclude_habit_id)
+        result = await db.execute(query.limit(1))
+        return result.first() is not None
+
+    @staticmethod
+    async def _fill_counters(db: AsyncSession, stats: UserStats) -> None:
+        """Set every badge counter on ``stats`` from aggregates over its user's current data."""
+        habits_result = await db.execute(
+            select(func.count(Habit.id), func.count(distinct(Habit.category))).where(Habit.user_id == stats.user_id)
+        )
+        stats.habit_count, stats.category_count = habits_result.one()
+
+        week_start = GamificationService._current_week_start()
+        checkins_result = await db.execute(
+            select(
+                func.sum(HabitDailyRollup.checkin_count),
+                func.sum(case((HabitDailyRollup.day >= week_start, HabitDailyRollup.checkin_count), else_=0)),
+            ).where(HabitDailyRollup.user_id == stats.user_id)
+        )
+        total_checkins, week_checkins = checkins_result.one()
+        stats.total_checkins = total_checkins or 0
+        stats.week_checkins = week_checkins or 0
+        stats.week_start = week_start
+
+        stats.max_streak = await GamificationService._max_current_streak(db, stats.user_id)
+
+    @staticmethod
+    async def rebuild_counters(db: AsyncSession, user_id: int) -> UserStats:
+        """Recompute all of a user's badge counters from the database."""
+        stats, created = await GamificationService._get_or_create_stats(db, user_id)
+        if not created:
+            await GamificationService._fill_counters(db, stats)
+        await db.commit()
+        data_versions.bump(DataScope.GAMIFICATION)
+        return stats
+
+    @staticmethod
+    async def rebuild_all_counters(db: AsyncSession) -> int:
+        """Recompute the badge counters of every user with habits or stats. Returns how many users."""
+        result = await db.execute(select(Habit.user_id).union(select(UserStats.user_id)))
+        user_ids = result.scalars().all()
+        for user_id in user_ids:
+            await GamificationService.rebuild_counters(db, user_id)
+        return len(user_ids)
+
+    @staticmethod
+    def _count_week_checkins(stats: UserStats, day: date, delta: int) -> None:
+        """Apply a check-in change on ``day`` to the current-week counter, rolling it over if needed."""
+        week_start = GamificationService._current_week_start()
+        if stats.week_start != week_start:
+            stats.week_start = week_start
+            stats.week_checkins = 0
+        if day >= week_start:
+            stats.week_checkins = max(0, stats.week_checkins + delta)
+
+    # The record_* hooks run after the change is flushed. If the stats row has to be
+    # created there, its counters are built from data that already includes the change.
+
+    @staticmethod
+    async def record_checkin(db: AsyncSession, user_id: int, log_date: datetime, habit_streak: int) -> None:
+        """Update counters for a new check-in; ``habit_streak`` is the habit's streak after it."""
+        stats, created = await GamificationService._get_or_create_stats(db, user_id)
+        if created:
+            return
+
+        stats.total_checkins += 1
+        GamificationService._count_week_checkins(stats, log_date.date(), 1)
+        stats.max_streak = max(stats.max_streak, habit_streak)
+
+    @staticmethod
+    async def record_checkin_removed(db: AsyncSession, user_id: int, log_date: datetime) -> None:
+        """Update counters for a deleted check-in."""
+        stats, created = await GamificationService._get_or_create_stats(db, user_id)
+        if created:
+            return
+
+        stats.total_checkins = max(0, stats.total_checkins - 1)
+        GamificationService._count_week_checkins(stats, log_date.date(), -1)
+        stats.max_streak = await GamificationService._max_current_streak(db, user_id)
+
+    @staticmethod
+    async def record_habit_added(db: AsyncSession, habit: Habit) -> None:
+        """Update counters for a new habit."""
+        stats, created = await GamificationService._get_or_create_stats(db, habit.user_id)
+        if created:
+            return
+
+        stats.habit_count += 1
+        if not await GamificationService._category_in_use(db, habit.user_id, habit.category, exclude_habit_id=habit.id):
+            stats.category_count += 1
+
+    @staticmethod
+    async def record_habit_changed(db: AsyncSession, habit: Habit, old_category: HabitCategory) -> None:
+        """Update counters after a habit's category, frequency or start date changed."""
+        stats, created = await GamificationService._get_or_create_stats(db, habit.user_id)
+        if created:
+            return
+
+        if habit.category != old_category:
+            if not await GamificationService._category_in_use(db, habit.user_id, old_category):
+                stats.category_count = max(0, stats.category_count - 1)
+            if not await GamificationService._category_in_use(
+                db, habit.user_id, habit.category, exclude_habit_id=habit.id
+            ):
+                stats.category_count += 1
+        stats.max_streak = await GamificationService._max_current_streak(db, habit.user_id)
+
+    @staticmethod
+    async def record_habit_removed(
+        db: AsyncSession, user_id: int, category: HabitCategory, checkins: int, week_checkins: int
+    ) -> None:
+        """Update counters for a deleted habit and the check-ins deleted with it."""
+        stats, created = await GamificationService._get_or_create_stats(db, user_id)
+        if created:
+            return
+
+        stats.habit_count = max(0, stats.habit_count - 1)
+        if not await GamificationService._category_in_use(db, user_id, category):
+            stats.category_count = max(0, stats.category_count - 1)
+        stats.total_checkins = max(0, stats.total_checkins - checkins)
+        if stats.week_start == GamificationService._current_week_start():
+            stats.week_checkins = max(0, stats.week_checkins - week_checkins)
+        stats.max_streak = await GamificationService._max_current_streak(db, user_id)
+
+    @staticmethod
+    def _apply_xp(stats: UserStats, xp_amount: int) -> None:
+        """Add XP to the stats row and update the level, without committing."""
         stats.total_xp += xp_amount
 
         # Calculate level (100 XP per level)
@@ -85,115 +262,96 @@ class GamificationService:
             stats.level = new_level
 
         stats.updated_at = datetime.utcnow()
+
+    @staticmethod
+    async def add_xp(db: AsyncSession, user_id: int, xp_amount: int) -> UserStats:
+        """Add XP and update level."""
+        stats = await GamificationService.get_user_stats(db, user_id)
+        GamificationService._apply_xp(stats, xp_amount)
         await db.commit()
+        data_versions.bump(DataScope.GAMIFICATION)
         await db.refresh(stats)
         return stats
 
     @staticmethod
-    async def check_badges(db: AsyncSession) -> List[dict[str, str | int]]:
-        """Check and award badges based on user progress."""
-        try:
-            stats = await GamificationService.get_user_stats(db)
-            earned_badges = []
-
-            # Get existing badges
-            existing_badges = set()
-            if stats.badges_earned:
-                try:
-                    import json
-                    existing_badges = set(json.loads(stats.badges_earned))
-                except (json.JSONDecodeError, TypeError):
-                    existing_badges = set()
-
-            # Check habit count
-            try:
-                habits_result = await db.execute(select(Habit))
-                habits = habits_result.scalars().all()
-                if len(habits) >= 1 and BadgeType.FIRST_HABIT not in existing_badges:
-                    earned_badges.append(BadgeType.FIRST_HABIT)
-            except Exception as e:
-                print(f"Error checking habits: {e}")
-                habits = []
-
-            # Check total check-ins
-            try:
-                logs_result = await db.execute(select(HabitLog))
-                total_checkins = len(logs_result.scalars().all())
-                if total_checkins >= 100 and BadgeType.CHECKIN_100 not in existing_badges:
-                    earned_badges.append(BadgeType.CHECKIN_100)
-                elif total_checkins >= 50 and BadgeType.CHECKIN_50 not in existing_badges:
-                    earned_badges.append(BadgeType.CHECKIN_50)
-                elif total_checkins >= 10 and BadgeType.CHECKIN_10 not in existing_badges:
-                    earned_badges.append(BadgeType.CHECKIN_10)
-            except Exception as e:
-                print(f"Error checking check-ins: {e}")
-
-            # Check streaks (get max streak from all habits)
-            max_streak = 0
-            try:
-                from app.services.habit_log_service import HabitLogService
-                for habit in habits:
-                    try:
-                        streak = await HabitLogService.get_streak(db, habit.id)
-                        max_streak = max(max_streak, streak)
-                    except Exception as e:
-                        print(f"Error checking streak for habit {habit.id}: {e}")
-                        continue
-
-                if max_streak >= 100 and BadgeType.STREAK_100 not in existing_badges:
-                    earned_badges.append(BadgeType.STREAK_100)
-                elif max_streak >= 30 and BadgeType.STREAK_30 not in existing_badges:
-                    earned_badges.append(BadgeType.STREAK_30)
-                elif max_streak >= 7 and BadgeType.STREAK_7 not in existing_badges:
-                    earned_badges.append(BadgeType.STREAK_7)
-            except Exception as e:
-                print(f"Error checking streaks: {e}")
-
-            # Check perfect week
-            try:
-                week_start = datetime.now() - timedelta(days=datetime.now().weekday())
-                week_logs = await db.execute(
-                    select(HabitLog).where(HabitLog.log_date >= week_start)
-                )
-                week_checkins = len(week_logs.scalars().all())
-                if week_checkins >= 7 and BadgeType.PERFECT_WEEK not in existing_badges:
-                    earned_badges.append(BadgeType.PERFECT_WEEK)
-            except Exception as e:
-                print(f"Error checking perfect week: {e}")
-
-            # Check category master
+    def _award_badges(stats: UserStats) -> List[str]:
+        """Award every badge the counters qualify for, plus its XP, without committing."""
+        earned_badges = []
+
+        # Get existing badges
+        existing_badges = set()
+        if stats.badges_earned:
             try:
-                categories = {habit.category for habit in habits}
-                if len(categories) >= 6 and BadgeType.CATEGORY_MASTER not in existing_badges:
-                    earned_badges.append(BadgeType.CATEGORY_MASTER)
-            except Exception as e:
-                print(f"Error checking categories: {e}")
+                import json
+                existing_badges = set(json.loads(stats.badges_earned))
+            except (json.JSONDecodeError, TypeError):
+                existing_badges = set()
+
+        # Check habit count
+        if stats.habit_count >= 1 and BadgeType.FIRST_HABIT not in existing_badges:
+            earned_badges.append(BadgeType.FIRST_HABIT)
+
+        # Check total check-ins
+        total_checkins = stats.total_checkins
+        if total_checkins >= 100 and BadgeType.CHECKIN_100 not in existing_badges:
+            earned_badges.append(BadgeType.CHECKIN_100)
+        elif total_checkins >= 50 and BadgeType.CHECKIN_50 not in existing_badges:
+            earned_badges.append(BadgeType.CHECKIN_50)
+        elif total_checkins >= 10 and BadgeType.CHECKIN_10 not in existing_badges:
+            earned_badges.append(BadgeType.CHECKIN_10)
+
+        # Check streaks (max current streak across all habits)
+        max_streak = stats.max_streak
+        if max_streak >= 100 and BadgeType.STREAK_100 not in existing_badges:
+            earned_badges.append(BadgeType.STREAK_100)
+        elif max_streak >= 30 and BadgeType.STREAK_30 not in existing_badges:
+            earned_badges.append(BadgeType.STREAK_30)
+        elif max_streak >= 7 and BadgeType.STREAK_7 not in existing_badges:
+            earned_badges.append(BadgeType.STREAK_7)
+
+        # Check perfect week (the counter only applies to the week it was started in)
+        week_checkins = stats.week_checkins if stats.week_start == GamificationService._current_week_start() else 0
+        if week_checkins >= 7 and BadgeType.PERFECT_WEEK not in existing_badges:
+            earned_badges.append(BadgeType.PERFECT_WEEK)
+
+        # Check category master
+        if stats.category_count >= len(HabitCategory) and BadgeType.CATEGORY_MASTER not in existing_badges:
+            earned_badges.append(BadgeType.CATEGORY_MASTER)
+
+        # Award new badges and their XP
+        if earned_badges:
+            import json
+            all_badges = existing_badges.union(set(earned_badges))
+            stats.badges_earned = json.dumps(list(all_badges))
+            total_xp = sum(BADGE_DEFINITIONS[badge]["xp"] for badge in earned_badges if badge in BADGE_DEFINITIONS)
+            GamificationService._apply_xp(stats, total_xp)
+
+        return earned_badges
+
+    @staticmethod
+    def _badge_details(badge_ids: List[str]) -> List[dict[str, str | int]]:
+        """Badge definitions for the given badge IDs."""
+        return [
+            {
+                "id": badge_id,
+                **BADGE_DEFINITIONS[badge_id],
+            }
+            for badge_id in badge_ids if badge_id in BADGE_DEFINITIONS
+        ]
 
-            # Award new badges
+    @staticmethod
+    async def check_badges(db: AsyncSession, user_id: int) -> List[dict[str, str | int]]:
+        """Check and award badges based on user progress."""
+        try:
+            stats = await GamificationService.get_user_stats(db, user_id)
+            earned_badges = GamificationService._award_badges(stats)
             if earned_badges:
-                import json
-                all_badges = existing_badges.union(set(earned_badges))
-                stats.badges_earned = json.dumps(list(all_badges))
-                stats.updated_at = datetime.utcnow()
                 await db.commit()
+                data_versions.bump(DataScope.GAMIFICATION)
                 await db.refresh(stats)
 
-                # Award XP for new badges
-                try:
-                    total_xp = sum(BADGE_DEFINITIONS[badge]["xp"] for badge in earned_badges if badge in BADGE_DEFINITIONS)
-                    if total_xp > 0:
-                        await GamificationService.add_xp(db, total_xp)
-                except Exception as e:
-                    print(f"Error awarding XP: {e}")
-
             # Return badge details
-            return [
-                {
-                    "id": badge_id,
-                    **BADGE_DEFINITIONS[badge_id],
-                }
-                for badge_id in earned_badges if badge_id in BADGE_DEFINITIONS
-            ]
+            return GamificationService._badge_details(earned_badges)
         except Exception as e:
             import traceback
             print(f"Error in check_badges: {e}")
@@ -201,9 +359,49 @@ class GamificationService:
             return []
 
     @staticmethod
-    async def get_all_badges(db: AsyncSession) -> List[dict[str, str | int]]:
-        """Get all earned badges."""
-        stats = await GamificationService.get_user_stats(db)
+    async def award_checkin(db: AsyncSession, user_id: int, streak: int) -> dict[str, int | List[dict[str, str | int]]]:
+        """Award check-in XP, streak bonus and any new badges, without committing."""
+        stats, _ = await GamificationService._get_or_create_stats(db, user_id)
+
+        xp_before = stats.total_xp
+        checkin_xp = await GamificationService.calculate_xp_for_checkin()
+        streak_xp = await GamificationService.calculate_xp_for_streak(streak)
+        GamificationService._apply_xp(stats, checkin_xp + streak_xp)
+        new_badges = GamificationService._award_badges(stats)
+
+        return {
+            "xp_awarded": stats.total_xp - xp_before,
+            "total_xp": stats.total_xp,
+            "level": stats.level,
+            "xp_to_next_level": 100 - (stats.total_xp % 100),
+            "new_badges": GamificationService._badge_details(new_badges),
+        }
+
+    @staticmethod
+    async def award_import(db: AsyncSession, user_id: int) -> dict[str, int | List[dict[str, str | int]]]:
+        """Refresh counters after a bulk import and award the badges they now qualify for, without committing.
+
+        Imported history earns no check-in XP, so importing it again (or importing made-up
+        history) can't raise XP and levels; only the one-off badge bonuses apply.
+        """
+        stats, created = await GamificationService._get_or_create_stats(db, user_id)
+        if not created:
+            await GamificationService._fill_counters(db, stats)
+
+        xp_before = stats.total_xp
+        new_badges = GamificationService._award_badges(stats)
+
+        return {
+            "xp_awarded": stats.total_xp - xp_before,
+            "total_xp": stats.total_xp,
+            "level": stats.level,
+            "new_badges": GamificationService._badge_details(new_badges),
+        }
+
+    @staticmethod
+    async def get_all_badges(db: AsyncSession, user_id: int) -> List[dict[str, str | int]]:
+        """Get all badges a user has earned."""
+        stats = await GamificationService.get_user_stats(db, user_id)
         if not stats.badges_earned:
             return []
 
@@ -1,155 +1,259 @@
 from datetime import date, datetime, timedelta
 from typing import Sequence
 
-from sqlalchemy import select
+from sqlalchemy import and_, case, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import DataScope, data_versions
 from app.models.habit import Habit, HabitFrequency
 from app.models.habit_log import HabitLog
+from app.models.habit_streak import HabitStreak
 from app.schemas.habit_log import HabitLogCreate, HabitLogUpdate
+from app.services.completion_index import completion_index
+from app.services.gamification_service import GamificationService
+from app.services.insights_service import InsightsService
+from app.services.mood_service import MoodService
+from app.services.rollup_service import RollupService
+from app.services.streak_service import StreakService, period_length, period_start
 
 
 class HabitLogService:
     @staticmethod
-    async def create(db: AsyncSession, log_in: HabitLogCreate) -> HabitLog:
-        """Create a new habit log entry."""
+    async def create(db: AsyncSession, user_id: int, log_in: HabitLogCreate) -> HabitLog | None:
+        """Create a new habit log entry; None if the habit isn't one of the user's."""
+        staged = await HabitLogService.stage_create(db, user_id, log_in)
+        if staged is None:
+            return None
+        log, _ = staged
+        await db.commit()
+        data_versions.bump(DataScope.HABIT_LOGS)
+        InsightsService.mark_stale(user_id)
+        completion_index.record_checkin(log.habit_id, log.log_day)
+        await db.refresh(log)
+        return log
+
+    @staticmethod
+    async def stage_create(db: AsyncSession, user_id: int, log_in: HabitLogCreate) -> tuple[HabitLog, int] | None:
+        """Add a log and update the derived tables without committing.
+
+        Returns the log and its habit's streak, or None if the habit isn't one of the user's.
+        """
+        habit = await db.get(Habit, log_in.habit_id)
+        if not habit or habit.user_id != user_id:
+            return None
+
         log = HabitLog(
-            habit_id=log_in.habit_id,
+            habit_id=habit.id,
+            user_id=user_id,
             log_date=log_in.log_date,
             notes=log_in.notes,
         )
+        MoodService.apply(log)
         db.add(log)
-        await db.commit()
-        await db.refresh(log)
-        return log
+        await RollupService.record_checkin(db, user_id, log.habit_id, log.log_date)
+
+        state = await StreakService.record_checkin(db, habit, log.log_date.date())
+        streak = StreakService.current_streak(state, habit.frequency)
+        await GamificationService.record_checkin(db, user_id, log.log_date, streak)
+        await db.flush()
+        return log, streak
 
     @staticmethod
-    async def get_by_id(db: AsyncSession, log_id: int) -> HabitLog | None:
-        """Get a habit log by ID."""
-        result = await db.execute(select(HabitLog).where(HabitLog.id == log_id))
+    async def get_by_id(db: AsyncSession, user_id: int, log_id: int) -> HabitLog | None:
+        """Get one of a user's habit logs by ID."""
+        result = await db.execute(select(HabitLog).where(HabitLog.id == log_id, HabitLog.user_id == user_id))
         return result.scalar_one_or_none()
 
     @staticmethod
     async def get_by_habit_id(
-        db: AsyncSession, habit_id: int, skip: int = 0, limit: int = 100
+        db: AsyncSession,
+        user_id: int,
+        habit_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: tuple[datetime, int] | None = None,
     ) -> Sequence[HabitLog]:
-        """Get all logs for a specific habit."""
-        result = await db.execute(
+        """Get logs for one of a user's habits, newest first.
+
+        ``after`` is the ``(log_date, id)`` of the last log of the previous page and
+        seeks along the (habit_id, log_date) index; ``skip`` is kept for older clients.
+        """
+        query = (
             select(HabitLog)
-            .where(HabitLog.habit_id == habit_id)
-            .order_by(HabitLog.log_date.desc())
-            .offset(skip)
-            .limit(limit)
+            .where(HabitLog.habit_id == habit_id, HabitLog.user_id == user_id)
+            .order_by(HabitLog.log_date.desc(), HabitLog.id.desc())
         )
+        if after is not None:
+            log_date, log_id = after
+            query = query.where(
+                or_(HabitLog.log_date < log_date, and_(HabitLog.log_date == log_date, HabitLog.id < log_id))
+            )
+        elif skip:
+            query = query.offset(skip)
+        result = await db.execute(query.limit(limit))
         return result.scalars().all()
 
     @staticmethod
-    async def update(db: AsyncSession, log_id: int, log_in: HabitLogUpdate) -> HabitLog | None:
-        """Update a habit log."""
-        log = await HabitLogService.get_by_id(db, log_id)
+    async def update(db: AsyncSession, user_id: int, log_id: int, log_in: HabitLogUpdate) -> HabitLog | None:
+        """Update one of a user's habit logs."""
+        log = await HabitLogService.get_by_id(db, user_id, log_id)
         if not log:
             return None
 
         update_data = log_in.model_dump(exclude_unset=True)
         if update_data:
+            old_log_date = log.log_date
             for key, value in update_data.items():
                 setattr(log, key, value)
+            if "notes" in update_data:
+                MoodService.apply(log)
+
+            if log.log_date != old_log_date:
+                await db.flush()
+                await RollupService.record_removal(db, log.habit_id, old_log_date)
+                await RollupService.record_checkin(db, user_id, log.habit_id, log.log_date)
+
+                habit = await db.get(Habit, log.habit_id)
+                streak = 0
+                if habit:
+                    state = await StreakService.get_state(db, habit.id)
+                    if log.log_date.date() != old_log_date.date():
+                        await StreakService.record_removal(db, habit, old_log_date.date())
+                        state = await StreakService.record_checkin(db, habit, log.log_date.date())
+                    if state:
+                        streak = StreakService.current_streak(state, habit.frequency)
+                await GamificationService.record_checkin_removed(db, user_id, old_log_date)
+                await GamificationService.record_checkin(db, user_id, log.log_date, streak)
+
             await db.commit()
+            data_versions.bump(DataScope.HABIT_LOGS)
+            InsightsService.mark_stale(user_id)
+            if "log_date" in update_data:
+                completion_index.invalidate(log.habit_id)
             await db.refresh(log)
 
         return log
 
     @staticmethod
-    async def delete(db: AsyncSession, log_id: int) -> bool:
-        """Delete a habit log."""
-        log = await HabitLogService.get_by_id(db, log_id)
+    async def delete(db: AsyncSession, user_id: int, log_id: int) -> bool:
+        """Delete one of a user's habit logs."""
+        log = await HabitLogService.get_by_id(db, user_id, log_id)
         if not log:
             return False
 
+        habit = await db.get(Habit, log.habit_id)
         await db.delete(log)
+        await db.flush()
+        await RollupService.record_removal(db, log.habit_id, log.log_date)
+        if habit:
+            await StreakService.record_removal(db, habit, log.log_date.date())
+        await GamificationService.record_checkin_removed(db, user_id, log.log_date)
+
         await db.commit()
+        data_versions.bump(DataScope.HABIT_LOGS)
+        InsightsService.mark_stale(user_id)
+        completion_index.invalidate(log.habit_id)
         return True
 
     @staticmethod
-    async def get_streak(db: AsyncSession, habit_id: int) -> int:
-        """Calculate the current streak for a habit."""
-        # Get the habit to check its frequency
-        habit_result = await db.execute(select(Habit).where(Habit.id == habit_id))
-        habit = habit_result.scalar_one_or_none()
-        if not habit:
-            return 0
-
-        # Get all logs for this habit, ordered by date descending
-        logs_result = await db.execute(
-            select(HabitLog)
-            .where(HabitLog.habit_id == habit_id)
-            .order_by(HabitLog.log_date.desc())
+    async def get_streak(db: AsyncSession, user_id: int, habit_id: int) -> int:
+        """Get the current streak for one of a user's habits from its persisted streak state."""
+        result = await db.execute(
+            select(HabitStreak, Habit.frequency)
+            .join(Habit, Habit.id == HabitStreak.habit_id)
+            .where(HabitStreak.habit_id == habit_id, Habit.user_id == user_id)
         )
-        logs = logs_result.scalars().all()
+        row = result.first()
+        if row:
+            return StreakService.current_streak(row.HabitStreak, row.frequency)
 
-        if not logs:
+        # No state yet (habit predates the streak table): build it once
+        habit = await db.get(Habit, habit_id)
+        if not habit or habit.user_id != user_id:
             return 0
+        state = await StreakService.recompute(db, habit)
+        await db.commit()
+        return StreakService.current_streak(state, habit.frequency)
+
+    @staticmethod
+    def _calculate_success_rate(frequency: HabitFrequency, start_date: date, actual: int) -> float:
+        """Turn a count of completed periods into a percentage of the periods since start_date."""
+        end_date = date.today()
+        if start_date > end_date:
+            return 0.0
+
+        # Periods are bucketed like the completion bitsets: days, or ISO weeks (Monday to
+        # Sunday), so a range straddling week boundaries expects every week it touches
+        first, last = period_start(start_date, frequency), period_start(end_date, frequency)
+        expected = (last - first) // period_length(frequency) + 1
 
-        # Convert log dates to date objects (without time)
-        log_dates = {log.log_date.date() for log in logs}
-
-        # Calculate streak
-        streak = 0
-        current_date = date.today()
-
-        if habit.frequency == HabitFrequency.DAILY:
-            # For daily habits, check consecutive days
-            while current_date >= habit.start_date:
-                if current_date in log_dates:
-                    streak += 1
-                    current_date -= timedelta(days=1)
-                else:
-                    break
-        else:
-            # For weekly habits, check consecutive weeks
-            while current_date >= habit.start_date:
-                # Get the start of the week (Monday)
-                week_start = current_date - timedelta(days=current_date.weekday())
-                # Check if there's any log in this week
-                week_logs = [d for d in log_dates if week_start <= d < week_start + timedelta(days=7)]
-                if week_logs:
-                    streak += 1
-                    current_date = week_start - timedelta(days=1)
-                else:
-                    break
-
-        return streak
+        # Check-ins dated after today still count as completed periods
+        return min(100.0, round((actual / expected) * 100, 2))
 
     @staticmethod
-    async def get_success_rate(db: AsyncSession, habit_id: int) -> float:
+    async def get_success_rate(db: AsyncSession, user_id: int, habit_id: int) -> float:
         """Calculate success rate (percentage of expected check-ins completed)."""
-        habit_result = await db.execute(select(Habit).where(Habit.id == habit_id))
+        habit_result = await db.execute(select(Habit).where(Habit.id == habit_id, Habit.user_id == user_id))
         habit = habit_result.scalar_one_or_none()
         if not habit:
             return 0.0
 
-        start_date = habit.start_date
-        end_date = date.today()
+        # Days (or weeks) with a check-in since start_date, from the completion bitsets
+        completion = await completion_index.get(db, habit)
+        actual = completion.completed_periods(habit.frequency)
 
-        # Calculate expected check-ins
-        if habit.frequency == HabitFrequency.DAILY:
-            expected = (end_date - start_date).days + 1
-        else:
-            # Weekly: count number of weeks
-            weeks = ((end_date - start_date).days // 7) + 1
-            expected = weeks
+        return HabitLogService._calculate_success_rate(habit.frequency, habit.start_date, actual)
 
-        if expected == 0:
-            return 0.0
+    @staticmethod
+    async def get_stats_for_habits(
+        db: AsyncSession, user_id: int, habit_ids: Sequence[int], recent_days: int = 7
+    ) -> dict[int, dict[str, int | float | datetime | None]]:
+        """Get streak, success rate and check-in counts for many of a user's habits in a fixed number of queries."""
+        if not habit_ids:
+            return {}
 
-        # Get actual check-ins
+        habits_result = await db.execute(
+            select(Habit, HabitStreak)
+            .outerjoin(HabitStreak, HabitStreak.habit_id == Habit.id)
+            .where(Habit.id.in_(habit_ids), Habit.user_id == user_id)
+        )
+        habit_rows = habits_result.all()
+
+        # Log counts are grouped per habit; success rates come from the completion bitsets
+        completions = await completion_index.get_many(db, [habit for habit, _ in habit_rows])
+        recent_since = datetime.now() - timedelta(days=recent_days)
         logs_result = await db.execute(
-            select(HabitLog).where(
-                HabitLog.habit_id == habit_id,
-                HabitLog.log_date >= datetime.combine(start_date, datetime.min.time()),
+            select(
+                HabitLog.habit_id,
+                func.count(HabitLog.id).label("total_checkins"),
+                func.sum(case((HabitLog.log_date >= recent_since, 1), else_=0)).label("recent_checkins"),
+                func.max(HabitLog.log_date).label("last_checkin"),
             )
+            .where(HabitLog.habit_id.in_(habit_ids), HabitLog.user_id == user_id)
+            .group_by(HabitLog.habit_id)
         )
-        actual = len(logs_result.scalars().all())
+        log_stats = {row.habit_id: row for row in logs_result.all()}
+
+        stats: dict[int, dict[str, int | float | datetime | None]] = {}
+        built_states = False
+        for habit, state in habit_rows:
+            if state is None:
+                # Habit predates the streak table: build its state once
+                state = await StreakService.recompute(db, habit)
+                built_states = True
 
-        return round((actual / expected) * 100, 2) if expected > 0 else 0.0
+            row = log_stats.get(habit.id)
+            stats[habit.id] = {
+                "streak": StreakService.current_streak(state, habit.frequency),
+                "success_rate": HabitLogService._calculate_success_rate(
+                    habit.frequency, habit.start_date, completions[habit.id].completed_periods(habit.frequency)
+                ),
+                "total_checkins": row.total_checkins if row else 0,
+                "recent_checkins": row.recent_checkins if row else 0,
+                "last_checkin": row.last_checkin if row else None,
+            }
+
+        if built_states:
+            await db.commit()
 
+        return stats
@@ -1,18 +1,25 @@
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from typing import Sequence
 
-from sqlalchemy import select, update
+from sqlalchemy import and_, case, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import DataScope, data_versions
 from app.models.habit import Habit
+from app.models.habit_daily_rollup import HabitDailyRollup
 from app.schemas.habit import HabitCreate, HabitUpdate
+from app.services.completion_index import completion_index
+from app.services.gamification_service import GamificationService
+from app.services.insights_service import InsightsService
+from app.services.streak_service import StreakService
 
 
 class HabitService:
     @staticmethod
-    async def create(db: AsyncSession, habit_in: HabitCreate) -> Habit:
-        """Create a new habit."""
+    async def create(db: AsyncSession, user_id: int, habit_in: HabitCreate) -> Habit:
+        """Create a new habit for a user."""
         habit = Habit(
+            user_id=user_id,
             name=habit_in.name,
             frequency=habit_in.frequency,
             category=habit_in.category,
@@ -20,46 +27,98 @@ class HabitService:
             description=habit_in.description,
         )
         db.add(habit)
+        await db.flush()
+        await GamificationService.record_habit_added(db, habit)
         await db.commit()
+        data_versions.bump(DataScope.HABITS)
+        InsightsService.mark_stale(user_id)
         await db.refresh(habit)
         return habit
 
     @staticmethod
-    async def get_by_id(db: AsyncSession, habit_id: int) -> Habit | None:
-        """Get a habit by ID."""
-        result = await db.execute(select(Habit).where(Habit.id == habit_id))
+    async def get_by_id(db: AsyncSession, user_id: int, habit_id: int) -> Habit | None:
+        """Get one of a user's habits by ID."""
+        result = await db.execute(select(Habit).where(Habit.id == habit_id, Habit.user_id == user_id))
         return result.scalar_one_or_none()
 
     @staticmethod
-    async def get_all(db: AsyncSession, skip: int = 0, limit: int = 100) -> Sequence[Habit]:
-        """Get all habits with pagination."""
-        result = await db.execute(select(Habit).offset(skip).limit(limit).order_by(Habit.created_at.desc()))
+    async def get_all(
+        db: AsyncSession,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: tuple[datetime, int] | None = None,
+    ) -> Sequence[Habit]:
+        """Get a user's habits, newest first.
+
+        ``after`` is the ``(created_at, id)`` of the last habit of the previous page; it
+        seeks straight to the next page, while ``skip`` is kept for older clients.
+        """
+        query = (
+            select(Habit)
+            .where(Habit.user_id == user_id)
+            .order_by(Habit.created_at.desc(), Habit.id.desc())
+        )
+        if after is not None:
+            created_at, habit_id = after
+            query = query.where(
+                or_(Habit.created_at < created_at, and_(Habit.created_at == created_at, Habit.id < habit_id))
+            )
+        elif skip:
+            query = query.offset(skip)
+        result = await db.execute(query.limit(limit))
         return result.scalars().all()
 
     @staticmethod
-    async def update(db: AsyncSession, habit_id: int, habit_in: HabitUpdate) -> Habit | None:
-        """Update a habit."""
-        habit = await HabitService.get_by_id(db, habit_id)
+    async def update(db: AsyncSession, user_id: int, habit_id: int, habit_in: HabitUpdate) -> Habit | None:
+        """Update one of a user's habits."""
+        habit = await HabitService.get_by_id(db, user_id, habit_id)
         if not habit:
             return None
 
         update_data = habit_in.model_dump(exclude_unset=True)
         if update_data:
+            old_category = habit.category
             update_data["updated_at"] = datetime.utcnow()
             await db.execute(update(Habit).where(Habit.id == habit_id).values(**update_data))
+            await db.refresh(habit)
+            if "frequency" in update_data or "start_date" in update_data:
+                # Streak periods depend on both, so rebuild the stored state
+                await StreakService.recompute(db, habit)
+            await GamificationService.record_habit_changed(db, habit, old_category)
             await db.commit()
+            data_versions.bump(DataScope.HABITS)
+            InsightsService.mark_stale(user_id)
+            if "start_date" in update_data:
+                completion_index.invalidate(habit_id)
             await db.refresh(habit)
 
         return habit
 
     @staticmethod
-    async def delete(db: AsyncSession, habit_id: int) -> bool:
-        """Delete a habit."""
-        habit = await HabitService.get_by_id(db, habit_id)
+    async def delete(db: AsyncSession, user_id: int, habit_id: int) -> bool:
+        """Delete one of a user's habits."""
+        habit = await HabitService.get_by_id(db, user_id, habit_id)
         if not habit:
             return False
 
+        # Check-ins deleted along with the habit, for the gamification counters
+        week_start = date.today() - timedelta(days=date.today().weekday())
+        checkins_result = await db.execute(
+            select(
+                func.sum(HabitDailyRollup.checkin_count),
+                func.sum(case((HabitDailyRollup.day >= week_start, HabitDailyRollup.checkin_count), else_=0)),
+            ).where(HabitDailyRollup.habit_id == habit_id)
+        )
+        checkins, week_checkins = checkins_result.one()
+
+        category = habit.category
         await db.delete(habit)
+        await db.flush()
+        await GamificationService.record_habit_removed(db, user_id, category, checkins or 0, week_checkins or 0)
         await db.commit()
+        data_versions.bump(DataScope.HABITS, DataScope.HABIT_LOGS)
+        InsightsService.mark_stale(user_id)
+        completion_index.invalidate(habit_id)
         return True
 
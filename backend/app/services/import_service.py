@@ -0,0 +1,154 @@
+import csv
+import io
+import json
+import tempfile
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import IO, Any
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import DataScope, data_versions
+from app.models.habit import Habit
+from app.models.habit_log import HabitLog
+from app.schemas.habit_log import HabitLogCreate
+from app.services.completion_index import completion_index
+from app.services.gamification_service import GamificationService
+from app.services.insights_service import InsightsService
+from app.services.mood_service import MoodService
+from app.services.rollup_service import RollupService
+from app.services.streak_service import StreakService
+
+# Rows inserted per executemany batch
+IMPORT_CHUNK_SIZE = 1000
+# Streamed bodies are kept in memory up to this size, then spooled to a temporary file
+SPOOL_MAX_MEMORY = 1024 * 1024
+SPOOL_READ_SIZE = 64 * 1024
+
+
+async def spool_body(chunks: AsyncIterable[bytes]) -> IO[bytes]:
+    """Read a streamed request body to the end, before the import opens its transaction.
+
+    The writer engine has a single connection, so an upload read inside the transaction
+    would hold it, and every other write would wait, for as long as the client takes to send.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    async for chunk in chunks:
+        spooled.write(chunk)
+    spooled.seek(0)
+    return spooled
+
+
+async def iter_spooled(spooled: IO[bytes]) -> AsyncIterator[bytes]:
+    """Chunks of a body read by spool_body."""
+    while chunk := spooled.read(SPOOL_READ_SIZE):
+        yield chunk
+
+
+async def iter_json_array(body: bytes) -> AsyncIterator[Any]:
+    """Rows of a JSON array body."""
+    rows = json.loads(body or b"[]")
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array of habit logs")
+    for row in rows:
+        yield row
+
+
+async def iter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """Rows of an NDJSON body read in chunks; a line that is not valid JSON yields its ValueError."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    yield e
+    if buffer.strip():
+        try:
+            yield json.loads(buffer)
+        except ValueError as e:
+            yield e
+
+
+async def iter_csv(body: bytes) -> AsyncIterator[Any]:
+    """Rows of a CSV body with a header line (habit_id, log_date, notes); empty cells are omitted."""
+    reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+    for row in reader:
+        yield {key: value for key, value in row.items() if key and value not in (None, "")}
+
+
+class ImportService:
+    """Bulk import of historic check-ins without the per-check-in reward pipeline."""
+
+    @staticmethod
+    async def import_logs(db: AsyncSession, user_id: int, rows: AsyncIterable[Any]) -> dict:
+        """Validate and insert a user's logs in batches, then refresh streaks, rollups and gamification once."""
+        habit_ids_result = await db.execute(select(Habit.id).where(Habit.user_id == user_id))
+        known_habit_ids = set(habit_ids_result.scalars().all())
+
+        errors = []
+        inserted = 0
+        touched_habit_ids = set()
+        batch = []
+        row_number = 0
+
+        async for row in rows:
+            row_number += 1
+            if isinstance(row, Exception):
+                errors.append({"row": row_number, "errors": [f"Invalid JSON: {row}"]})
+                continue
+            try:
+                log_in = HabitLogCreate.model_validate(row)
+            except ValidationError as e:
+                errors.append({
+                    "row": row_number,
+                    "errors": [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()],
+                })
+                continue
+            if log_in.habit_id not in known_habit_ids:
+                errors.append({"row": row_number, "errors": [f"habit_id: Habit {log_in.habit_id} not found"]})
+                continue
+
+            sentiment, sentiment_score = MoodService.score(log_in.notes)
+            batch.append({
+                "habit_id": log_in.habit_id,
+                "user_id": user_id,
+                "log_date": log_in.log_date,
+                "log_day": log_in.log_date.date(),
+                "notes": log_in.notes,
+                "sentiment": sentiment,
+                "sentiment_score": sentiment_score,
+            })
+            touched_habit_ids.add(log_in.habit_id)
+            if len(batch) >= IMPORT_CHUNK_SIZE:
+                await db.execute(insert(HabitLog), batch)
+                inserted += len(batch)
+                batch = []
+
+        if batch:
+            await db.execute(insert(HabitLog), batch)
+            inserted += len(batch)
+
+        rewards = {"xp_awarded": 0, "new_badges": []}
+        if inserted:
+            # One recompute of every derived table for the habits that received logs
+            await RollupService.stage_rebuild(db, touched_habit_ids)
+            habits_result = await db.execute(select(Habit).where(Habit.id.in_(touched_habit_ids)))
+            for habit in habits_result.scalars().all():
+                await StreakService.recompute(db, habit)
+            rewards = await GamificationService.award_import(db, user_id)
+            await db.commit()
+            data_versions.bump(DataScope.HABIT_LOGS, DataScope.GAMIFICATION)
+            InsightsService.mark_stale(user_id)
+            completion_index.invalidate(*touched_habit_ids)
+
+        return {
+            "inserted": inserted,
+            "failed": len(errors),
+            "errors": errors,
+            **rewards,
+        }
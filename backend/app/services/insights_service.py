@@ -0,0 +1,168 @@
+import asyncio
+import contextvars
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.core.config import get_settings
+from app.db.session import ReadSessionLocal
+from app.services.ai_service import AIService
+
+settings = get_settings()
+
+
+@dataclass
+class InsightsSnapshot:
+    """Progress insights of one user as of ``computed_at`` (monotonic clock)."""
+
+    insights: dict
+    computed_at: float
+
+
+# Latest snapshot per user, least recently read first
+_snapshots: OrderedDict[int, InsightsSnapshot] = OrderedDict()
+# Users written to since their snapshot was computed
+_dirty: set[int] = set()
+# Debounce timers and running recomputations per user
+_timers: dict[int, asyncio.TimerHandle] = {}
+_refreshing: dict[int, asyncio.Task] = {}
+
+
+class InsightsService:
+    """Serves progress insights from per-user snapshots that are recomputed in the background.
+
+    Writes mark a user's snapshot stale and schedule a debounced recomputation; reads
+    return the latest snapshot straight away (stale-while-revalidate). Only a user's
+    very first read waits for the computation.
+    """
+
+    @staticmethod
+    async def get_insights(user_id: int) -> dict:
+        """The user's latest insights, refreshing them in the background if they are stale."""
+        snapshot = InsightsService.get_snapshot(user_id)
+        if snapshot is None:
+            return await asyncio.shield(InsightsService._start_refresh(user_id))
+        return snapshot.insights
+
+    @staticmethod
+    def get_snapshot(user_id: int) -> InsightsSnapshot | None:
+        """The user's current snapshot, starting a background refresh if it is stale; None before the first one."""
+        snapshot = _snapshots.get(user_id)
+        if snapshot is None:
+            return None
+
+        _snapshots.move_to_end(user_id)
+        is_stale = user_id in _dirty or time.monotonic() - snapshot.computed_at > settings.insights_max_age_seconds
+        # A pending debounce timer will refresh the snapshot shortly anyway
+        if is_stale and user_id not in _timers:
+            InsightsService._start_refresh(user_id, background=True)
+        return snapshot
+
+    @staticmethod
+    def mark_stale(user_id: int) -> None:
+        """Record a committed write for the user and debounce the recomputation of their insights."""
+        if user_id not in _snapshots and user_id not in _refreshing:
+            # Nobody has read this user's insights yet; the first read computes them
+            return
+
+        _dirty.add(user_id)
+        timer = _timers.pop(user_id, None)
+        if timer is not None:
+            timer.cancel()
+        _timers[user_id] = asyncio.get_running_loop().call_later(
+            settings.insights_refresh_delay_seconds,
+            InsightsService._on_timer,
+            user_id,
+            context=contextvars.Context(),
+        )
+
+    @staticmethod
+    def _on_timer(user_id: int) -> None:
+        _timers.pop(user_id, None)
+        InsightsService._start_refresh(user_id)
+
+    @staticmethod
+    def _start_refresh(user_id: int, background: bool = False) -> asyncio.Task:
+        """Start recomputing the user's snapshot unless a recomputation is already running.
+
+        Background recomputations run in an empty context so their queries are not
+        counted against whichever request happened to trigger them.
+        """
+        task = _refreshing.get(user_id)
+        if task is None:
+            context = contextvars.Context() if background else None
+            task = asyncio.create_task(InsightsService._refresh(user_id), context=context)
+            _refreshing[user_id] = task
+            task.add_done_callback(lambda _: InsightsService._on_refreshed(user_id))
+        return task
+
+    @staticmethod
+    async def _refresh(user_id: int) -> dict:
+        # Writes landing from here on are not guaranteed to be seen, so they re-mark the user
+        _dirty.discard(user_id)
+        async with ReadSessionLocal() as session:
+            insights = await AIService.generate_progress_insights(session, user_id)
+
+        _snapshots[user_id] = InsightsSnapshot(insights, time.monotonic())
+        _snapshots.move_to_end(user_id)
+        while len(_snapshots) > settings.insights_snapshot_max_users:
+            evicted_user_id, _ = _snapshots.popitem(last=False)
+            _dirty.discard(evicted_user_id)
+        return insights
+
+    @staticmethod
+    def _on_refreshed(user_id: int) -> None:
+        task = _refreshing.pop(user_id)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            print(f"Error refreshing progress insights for user {user_id}: {task.exception()}")
+            _dirty.add(user_id)
+            return
+
+        # Catch up with writes that arrived during the computation and whose timer already fired
+        if user_id in _dirty and user_id in _snapshots and user_id not in _timers:
+            InsightsService._start_refresh(user_id, background=True)
+
+    @staticmethod
+    def invalidate_all() -> None:
+        """Mark every snapshot stale, e.g. after maintenance that rewrote derived tables."""
+        _dirty.update(_snapshots)
+
+    @staticmethod
+    async def refresh_stale(min_age_seconds: float = 0.0) -> int:
+        """Recompute, one user at a time, the snapshots that are stale or at least ``min_age_seconds`` old.
+
+        Returns how many were refreshed.
+        """
+        cutoff = time.monotonic() - min_age_seconds
+        user_ids = [
+            user_id
+            for user_id, snapshot in _snapshots.items()
+            if user_id in _dirty or snapshot.computed_at <= cutoff
+        ]
+        for user_id in user_ids:
+            await InsightsService._start_refresh(user_id, background=True)
+        return len(user_ids)
+
+    @staticmethod
+    async def shutdown() -> None:
+        """Cancel pending timers and running recomputations."""
+        for timer in _timers.values():
+            timer.cancel()
+        _timers.clear()
+        tasks = list(_refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        _snapshots.clear()
+        _dirty.clear()
+
+    @staticmethod
+    def stats() -> dict[str, int]:
+        return {
+            "snapshots": len(_snapshots),
+            "stale": len(_dirty & _snapshots.keys()),
+            "pending_refreshes": len(_timers),
+            "running_refreshes": len(_refreshing),
+        }
@@ -0,0 +1,77 @@
+from app.core.cache import DataScope, data_versions
+from app.core.config import get_settings
+from app.core.scheduler import CronSchedule, IntervalSchedule, Scheduler
+from app.db.session import ReadSessionLocal, SessionLocal
+from app.services.gamification_service import GamificationService
+from app.services.insights_service import InsightsService
+from app.services.mood_service import MoodService
+from app.services.recommendation_service import RecommendationService
+from app.services.rollup_service import RollupService
+
+settings = get_settings()
+
+
+class MaintenanceService:
+    """Periodic upkeep run by the in-process scheduler; every job opens its own session."""
+
+    @staticmethod
+    async def nightly_rollup() -> None:
+        """Rebuild the daily rollups from raw logs and score any logs still missing a mood."""
+        async with SessionLocal() as session:
+            rows = await RollupService.rebuild(session)
+            scored = await MoodService.backfill(session)
+        print(f"Nightly rollup: {rows} rollup rows, {scored} logs scored")
+
+    @staticmethod
+    async def midnight_rollover() -> None:
+        """Drop cached results and insights computed before midnight.
+
+        Stored streaks are left alone: current_streak() already reports 0 for a streak
+        whose last period is not today's.
+        """
+        data_versions.bump(DataScope.HABITS, DataScope.HABIT_LOGS, DataScope.GAMIFICATION)
+        InsightsService.invalidate_all()
+
+    @staticmethod
+    async def reset_week_counters() -> None:
+        """Start the new week's check-in counter used by the Perfect Week badge."""
+        async with SessionLocal() as session:
+            await GamificationService.reset_week_counters(session)
+
+    @staticmethod
+    async def prewarm_caches() -> None:
+        """Recompute insights snapshots that are stale or would expire before the next run."""
+        await InsightsService.refresh_stale(settings.insights_max_age_seconds - settings.cache_prewarm_interval_seconds)
+
+    @staticmethod
+    async def refresh_recommendations() -> None:
+        """Rebuild the habit recommendation model if habits or logs changed since the last build."""
+        async with ReadSessionLocal() as session:
+            await RecommendationService.rebuild(session)
+
+    @staticmethod
+    def register_jobs(scheduler: Scheduler) -> None:
+        jitter = settings.scheduler_jitter_seconds
+        scheduler.add_job(
+            "nightly_rollup",
+            MaintenanceService.nightly_rollup,
+            CronSchedule(minute=0, hour=settings.nightly_rollup_hour),
+            jitter,
+        )
+        # Right after midnight, without jitter: streaks and week counters are date-bound
+        scheduler.add_job("midnight_rollover", MaintenanceService.midnight_rollover, CronSchedule(minute=0, hour=0))
+        scheduler.add_job(
+            "week_counter_reset", MaintenanceService.reset_week_counters, CronSchedule(minute=0, hour=0, weekday=0)
+        )
+        scheduler.add_job(
+            "cache_prewarm",
+            MaintenanceService.prewarm_caches,
+            IntervalSchedule(settings.cache_prewarm_interval_seconds),
+            jitter,
+        )
+        scheduler.add_job(
+            "recommendation_refresh",
+            MaintenanceService.refresh_recommendations,
+            IntervalSchedule(settings.recommendation_refresh_seconds),
+            jitter,
+        )
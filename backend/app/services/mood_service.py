@@ -0,0 +1,147 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from enum import Enum
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import DataScope, data_versions
+from app.db.expressions import week_start_expression
+from app.models.habit_log import HabitLog
+from app.services.ai_service import AIService
+
+# Logs scored per round trip by the backfill
+BACKFILL_BATCH_SIZE = 1000
+
+
+class MoodPeriod(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+
+
+class MoodService:
+    """Stores the mood of each log's notes at write time and aggregates it in SQL."""
+
+    @staticmethod
+    def score(notes: str | None) -> tuple[str | None, float | None]:
+        """Sentiment label and signed score (-confidence, 0 or +confidence) of a note; Nones without notes."""
+        if not notes:
+            return None, None
+        analysis = AIService.analyze_mood_from_notes(notes)
+        sign = {"positive": 1, "negative": -1}.get(analysis["sentiment"], 0)
+        return analysis["sentiment"], sign * analysis["confidence"]
+
+    @staticmethod
+    def apply(log: HabitLog) -> None:
+        """Set the sentiment columns of a log from its current notes."""
+        log.sentiment, log.sentiment_score = MoodService.score(log.notes)
+
+    @staticmethod
+    async def backfill(db: AsyncSession) -> int:
+        """Score every log that has notes but no sentiment yet. Returns how many were scored."""
+        scored = 0
+        last_id = 0
+        while True:
+            result = await db.execute(
+                select(HabitLog.id, HabitLog.notes)
+                .where(HabitLog.id > last_id, HabitLog.notes.is_not(None), HabitLog.sentiment.is_(None))
+                .order_by(HabitLog.id)
+                .limit(BACKFILL_BATCH_SIZE)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            params = []
+            for log_id, notes in rows:
+                label, score = MoodService.score(notes)
+                if label is not None:
+                    params.append({"id": log_id, "sentiment": label, "sentiment_score": score})
+            if params:
+                # ORM bulk UPDATE by primary key: one executemany per batch
+                await db.execute(update(HabitLog), params)
+            await db.commit()
+            scored += len(params)
+            last_id = rows[-1].id
+
+        if scored:
+            data_versions.bump(DataScope.HABIT_LOGS)
+        return scored
+
+    @staticmethod
+    async def get_timeline(
+        db: AsyncSession,
+        user_id: int,
+        period: MoodPeriod = MoodPeriod.DAY,
+        days: int = 90,
+        habit_id: int | None = None,
+    ) -> list[dict[str, str | int | float]]:
+        """Average sentiment and label counts per day or ISO week over the last ``days`` days."""
+        since = date.today() - timedelta(days=days)
+        bucket = HabitLog.log_day
+        if period == MoodPeriod.WEEK:
+            bucket = week_start_expression(db.bind.dialect.name, HabitLog.log_day)
+            if bucket is None:
+                return await MoodService._get_weekly_timeline_python(db, user_id, since, habit_id)
+
+        return [
+            {
+                "period_start": str(row.period_start),
+                "entries": row.entries,
+                "average_score": round((row.score_total or 0.0) / row.entries, 3),
+                "positive": row.positive,
+                "negative": row.negative,
+                "neutral": row.neutral,
+            }
+            for row in await MoodService._timeline_rows(db, user_id, since, habit_id, bucket)
+        ]
+
+    @staticmethod
+    async def _timeline_rows(db: AsyncSession, user_id: int, since: date, habit_id: int | None, bucket) -> list:
+        """Entry count, score total and label counts of scored logs per ``bucket``, oldest first."""
+        query = select(
+            bucket.label("period_start"),
+            func.count(HabitLog.id).label("entries"),
+            func.sum(HabitLog.sentiment_score).label("score_total"),
+            func.sum(case((HabitLog.sentiment == "positive", 1), else_=0)).label("positive"),
+            func.sum(case((HabitLog.sentiment == "negative", 1), else_=0)).label("negative"),
+            func.sum(case((HabitLog.sentiment == "neutral", 1), else_=0)).label("neutral"),
+        ).where(
+            HabitLog.user_id == user_id,
+            HabitLog.log_date >= datetime.combine(since, datetime.min.time()),
+            HabitLog.sentiment.is_not(None),
+        )
+        if habit_id:
+            query = query.where(HabitLog.habit_id == habit_id)
+
+        result = await db.execute(query.group_by(bucket).order_by(bucket))
+        return result.all()
+
+    @staticmethod
+    async def _get_weekly_timeline_python(
+        db: AsyncSession, user_id: int, since: date, habit_id: int | None = None
+    ) -> list[dict[str, str | int | float]]:
+        """Fallback for dialects without a week expression: total per day in SQL, fold days into weeks here.
+
+        Days carry their unrounded score totals, so a week averages its logs rather
+        than its days' rounded averages.
+        """
+        weeks = defaultdict(lambda: {"entries": 0, "score_total": 0.0, "positive": 0, "negative": 0, "neutral": 0})
+        for day in await MoodService._timeline_rows(db, user_id, since, habit_id, HabitLog.log_day):
+            day_start = date.fromisoformat(str(day.period_start))
+            week = weeks[day_start - timedelta(days=day_start.weekday())]
+            week["entries"] += day.entries
+            week["score_total"] += day.score_total or 0.0
+            for label in ("positive", "negative", "neutral"):
+                week[label] += getattr(day, label)
+        return [
+            {
+                "period_start": week_start.isoformat(),
+                "entries": week["entries"],
+                "average_score": round(week["score_total"] / week["entries"], 3),
+                "positive": week["positive"],
+                "negative": week["negative"],
+                "neutral": week["neutral"],
+            }
+            for week_start, week in sorted(weeks.items())
+        ]
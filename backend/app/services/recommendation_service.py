@@ -0,0 +1,192 @@
+import asyncio
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import numpy as np
+from sqlalchemy import Row, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import DataScope, data_versions
+from app.core.config import get_settings
+from app.models.habit import Habit, HabitFrequency
+from app.models.habit_daily_rollup import HabitDailyRollup
+
+settings = get_settings()
+
+# Users whose habit vectors are multiplied at once while building the matrix
+_USER_CHUNK_SIZE = 1024
+
+
+def habit_key(name: str) -> str:
+    """Case- and whitespace-insensitive identity of a habit name."""
+    return " ".join(name.lower().split())
+
+
+@dataclass
+class RecommendationModel:
+    """Top-k most related habits of every known habit name, precomputed from co-occurrence."""
+
+    keys: list[str]
+    suggestions: list[dict[str, str]]
+    index: dict[str, int]
+    neighbours: np.ndarray  # (items, k) item indices, best first
+    scores: np.ndarray  # (items, k) similarities, 0 where there is no neighbour
+    users: int
+    built_at: datetime
+    versions: tuple[int, ...]
+
+
+# Replaced wholesale by each rebuild, so readers never see a half-built model
+_model: RecommendationModel | None = None
+
+
+def _completion_weight(frequency: HabitFrequency, start_date: date, active_days: int, today: date) -> float:
+    """0.5 for a habit that is never done up to 1.0 for one done every period since it started."""
+    days = max(1, (today - start_date).days + 1)
+    periods = days if frequency == HabitFrequency.DAILY else max(1, days // 7)
+    return 0.5 + 0.5 * min(1.0, active_days / periods)
+
+
+def _build_model(rows: Sequence[Row], versions: tuple[int, ...]) -> RecommendationModel | None:
+    """The model for ``rows`` of (user_id, name, category, frequency, start_date, days); None without co-occurrences."""
+    # Habit names held by enough users to co-occur with anything, most popular first
+    today = date.today()
+    holders: dict[str, set[int]] = {}
+    for row in rows:
+        holders.setdefault(habit_key(row.name), set()).add(row.user_id)
+    popular = sorted(
+        (key for key, users in holders.items() if len(users) >= settings.recommendation_min_users),
+        key=lambda key: len(holders[key]),
+        reverse=True,
+    )[: settings.recommendation_max_items]
+    index = {key: position for position, key in enumerate(popular)}
+
+    suggestions: list[dict[str, str] | None] = [None] * len(popular)
+    user_positions: dict[int, int] = {}
+    entries: list[tuple[int, int, float]] = []
+    for row in rows:
+        item = index.get(habit_key(row.name))
+        if item is None:
+            continue
+        if suggestions[item] is None:
+            suggestions[item] = {"name": row.name, "category": row.category.value, "frequency": row.frequency.value}
+        user = user_positions.setdefault(row.user_id, len(user_positions))
+        entries.append((user, item, _completion_weight(row.frequency, row.start_date, row.days, today)))
+
+    if not entries:
+        return None
+
+    entry_array = np.array(entries, dtype=np.float64)
+    users = entry_array[:, 0].astype(np.int64)
+    items = entry_array[:, 1].astype(np.int64)
+    weights = entry_array[:, 2].astype(np.float32)
+
+    n_items = len(popular)
+    cooccurrence = np.zeros((n_items, n_items), dtype=np.float32)
+    order = np.argsort(users, kind="stable")
+    users, items, weights = users[order], items[order], weights[order]
+    for chunk_start in range(0, len(user_positions), _USER_CHUNK_SIZE):
+        lo, hi = np.searchsorted(users, [chunk_start, chunk_start + _USER_CHUNK_SIZE])
+        vectors = np.zeros((_USER_CHUNK_SIZE, n_items), dtype=np.float32)
+        # A user with the same habit name twice keeps its best weight
+        np.maximum.at(vectors, (users[lo:hi] - chunk_start, items[lo:hi]), weights[lo:hi])
+        cooccurrence += vectors.T @ vectors
+
+    norms = np.sqrt(np.diag(cooccurrence)).copy()
+    norms[norms == 0] = 1.0
+    similarity = cooccurrence / norms[:, None] / norms[None, :]
+    np.fill_diagonal(similarity, 0.0)
+
+    k = min(settings.recommendation_neighbours, max(1, n_items - 1))
+    neighbours = np.argpartition(-similarity, k - 1, axis=1)[:, :k] if n_items > 1 else np.zeros((1, 1), np.int64)
+    scores = np.take_along_axis(similarity, neighbours, axis=1)
+    best_first = np.argsort(-scores, axis=1)
+    neighbours = np.take_along_axis(neighbours, best_first, axis=1)
+    scores = np.take_along_axis(scores, best_first, axis=1)
+
+    return RecommendationModel(
+        keys=popular,
+        suggestions=suggestions,
+        index=index,
+        neighbours=neighbours,
+        scores=scores,
+        users=len(user_positions),
+        built_at=datetime.now(),
+        versions=versions,
+    )
+
+
+class RecommendationService:
+    """Suggests habits that people with similar habits keep up.
+
+    Every user is a vector over habit names, weighted by how consistently each habit
+    is checked in. The item-item co-occurrence matrix of those vectors is cosine
+    normalised and reduced to each habit's top-k neighbours, so a request only merges
+    the neighbour lists of the user's own habits.
+    """
+
+    @staticmethod
+    async def rebuild(db: AsyncSession, force: bool = False) -> RecommendationModel | None:
+        """Recompute the model from all users' habits, unless no habit or log changed since the last build."""
+        global _model
+        versions = data_versions.get(DataScope.HABITS, DataScope.HABIT_LOGS)
+        if _model is not None and _model.versions == versions and not force:
+            return _model
+
+        active_days = (
+            select(HabitDailyRollup.habit_id, func.count().label("days"))
+            .group_by(HabitDailyRollup.habit_id)
+            .subquery()
+        )
+        result = await db.execute(
+            select(
+                Habit.user_id,
+                Habit.name,
+                Habit.category,
+                Habit.frequency,
+                Habit.start_date,
+                func.coalesce(active_days.c.days, 0).label("days"),
+            )
+            .outerjoin(active_days, active_days.c.habit_id == Habit.id)
+            .order_by(Habit.id)
+        )
+        rows = result.all()
+
+        # The matrix work is CPU-bound, so it runs off the event loop
+        _model = await asyncio.to_thread(_build_model, rows, versions)
+        return _model
+
+    @staticmethod
+    def recommend(habit_names: Iterable[str], limit: int = 5) -> list[dict[str, str]]:
+        """Habits related to ``habit_names`` that the user doesn't have yet, best first.
+
+        Empty until the model is built or when none of the names are known to it.
+        """
+        model = _model
+        if model is None:
+            return []
+
+        owned = {habit_key(name) for name in habit_names}
+        rows = [model.index[key] for key in owned if key in model.index]
+        if not rows:
+            return []
+
+        totals: dict[int, float] = {}
+        for item, score in zip(model.neighbours[rows].ravel().tolist(), model.scores[rows].ravel().tolist()):
+            if score > 0 and model.keys[item] not in owned:
+                totals[item] = totals.get(item, 0.0) + score
+        ranked = sorted(totals, key=lambda item: (-totals[item], item))[:limit]
+        return [model.suggestions[item] for item in ranked]
+
+    @staticmethod
+    def stats() -> dict[str, int | str | None]:
+        model = _model
+        if model is None:
+            return {"items": 0, "users": 0, "neighbours": 0, "built_at": None}
+        return {
+            "items": len(model.keys),
+            "users": model.users,
+            "neighbours": int(model.neighbours.shape[1]),
+            "built_at": model.built_at.isoformat(),
+        }
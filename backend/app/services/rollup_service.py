@@ -0,0 +1,108 @@
+from collections.abc import Collection
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import DataScope, data_versions
+from app.models.habit_daily_rollup import HabitDailyRollup
+from app.models.habit_log import HabitLog
+from app.services.completion_index import completion_index
+
+
+class RollupService:
+    """Keeps the habit_daily_rollup table in step with habit_logs."""
+
+    @staticmethod
+    async def record_checkin(db: AsyncSession, user_id: int, habit_id: int, log_date: datetime) -> HabitDailyRollup:
+        """Count a new check-in in its day bucket."""
+        row = await db.get(HabitDailyRollup, (habit_id, log_date.date()))
+        if not row:
+            row = HabitDailyRollup(
+                habit_id=habit_id,
+                user_id=user_id,
+                day=log_date.date(),
+                checkin_count=1,
+                first_log_at=log_date,
+                last_log_at=log_date,
+            )
+            db.add(row)
+            return row
+
+        row.checkin_count += 1
+        row.first_log_at = min(row.first_log_at, log_date)
+        row.last_log_at = max(row.last_log_at, log_date)
+        return row
+
+    @staticmethod
+    async def record_removal(db: AsyncSession, habit_id: int, log_date: datetime) -> None:
+        """Remove a deleted (and already flushed) check-in from its day bucket."""
+        row = await db.get(HabitDailyRollup, (habit_id, log_date.date()))
+        if not row:
+            return
+
+        row.checkin_count -= 1
+        if row.checkin_count <= 0:
+            # Flush so a check-in re-added to this day starts a fresh row
+            await db.delete(row)
+            await db.flush()
+            return
+
+        if log_date in (row.first_log_at, row.last_log_at):
+            # The removed log bounded the day, so read the new bounds back
+            day_start = datetime.combine(row.day, datetime.min.time())
+            result = await db.execute(
+                select(func.min(HabitLog.log_date), func.max(HabitLog.log_date)).where(
+                    HabitLog.habit_id == habit_id,
+                    HabitLog.log_date >= day_start,
+                    HabitLog.log_date < day_start + timedelta(days=1),
+                )
+            )
+            row.first_log_at, row.last_log_at = result.one()
+
+    @staticmethod
+    async def rebuild(db: AsyncSession) -> int:
+        """Rebuild the whole rollup table from raw habit logs. Returns the number of rows written."""
+        await RollupService.stage_rebuild(db)
+        await db.commit()
+        data_versions.bump(DataScope.HABIT_LOGS)
+        completion_index.clear()
+
+        count_result = await db.execute(select(func.count()).select_from(HabitDailyRollup))
+        return count_result.scalar() or 0
+
+    @staticmethod
+    async def stage_rebuild(db: AsyncSession, habit_ids: Collection[int] | None = None) -> None:
+        """Recompute rollup rows from raw logs, for all habits or only ``habit_ids``, without committing."""
+        clear = delete(HabitDailyRollup)
+        grouped = select(
+            HabitLog.habit_id,
+            HabitLog.user_id,
+            HabitLog.log_day,
+            func.count(HabitLog.id),
+            func.min(HabitLog.log_date),
+            func.max(HabitLog.log_date),
+        ).group_by(HabitLog.habit_id, HabitLog.user_id, HabitLog.log_day)
+        if habit_ids is not None:
+            clear = clear.where(HabitDailyRollup.habit_id.in_(habit_ids))
+            grouped = grouped.where(HabitLog.habit_id.in_(habit_ids))
+
+        await db.execute(clear)
+        await db.execute(
+            insert(HabitDailyRollup).from_select(
+                ["habit_id", "user_id", "day", "checkin_count", "first_log_at", "last_log_at"],
+                grouped,
+            )
+        )
+        await db.flush()
+
+    @staticmethod
+    async def rebuild_if_empty(db: AsyncSession) -> None:
+        """Backfill the rollup table for databases created before it existed."""
+        rollup_result = await db.execute(select(HabitDailyRollup.habit_id).limit(1))
+        if rollup_result.first() is not None:
+            return
+
+        logs_result = await db.execute(select(HabitLog.id).limit(1))
+        if logs_result.first() is not None:
+            await RollupService.rebuild(db)
@@ -0,0 +1,134 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.habit import Habit, HabitFrequency
+from app.models.habit_log import HabitLog
+from app.models.habit_streak import HabitStreak
+
+
+def period_length(frequency: HabitFrequency) -> timedelta:
+    """Length of one streak period for the given frequency."""
+    return timedelta(days=1) if frequency == HabitFrequency.DAILY else timedelta(days=7)
+
+
+def period_start(day: date, frequency: HabitFrequency) -> date:
+    """First day of the period (the day itself, or Monday of its week) containing ``day``."""
+    if frequency == HabitFrequency.DAILY:
+        return day
+    return day - timedelta(days=day.weekday())
+
+
+class StreakService:
+    """Maintains the persisted per-habit streak state so reads never scan log history."""
+
+    @staticmethod
+    def current_streak(state: HabitStreak, frequency: HabitFrequency, today: date | None = None) -> int:
+        """Current streak from a stored state; a streak is only alive if today's period is done."""
+        if not state.last_period_start:
+            return 0
+        today = today or date.today()
+        if state.last_period_start != period_start(today, frequency):
+            return 0
+        return state.current_streak
+
+    @staticmethod
+    async def get_state(db: AsyncSession, habit_id: int) -> HabitStreak | None:
+        """Get the stored streak state for a habit."""
+        return await db.get(HabitStreak, habit_id)
+
+    @staticmethod
+    async def recompute(db: AsyncSession, habit: Habit) -> HabitStreak:
+        """Rebuild the streak state of a habit from its full log history."""
+        first_period = period_start(habit.start_date, habit.frequency)
+        result = await db.execute(
+            select(HabitLog.log_day)
+            .where(
+                HabitLog.habit_id == habit.id,
+                HabitLog.log_day >= (habit.start_date if habit.frequency == HabitFrequency.DAILY else first_period),
+            )
+            .distinct()
+        )
+        periods = sorted({period_start(log_day, habit.frequency) for log_day in result.scalars().all()})
+
+        step = period_length(habit.frequency)
+        current = longest = 0
+        previous = None
+        for period in periods:
+            current = current + 1 if previous is not None and period - previous == step else 1
+            longest = max(longest, current)
+            previous = period
+
+        state = await StreakService.get_state(db, habit.id)
+        if not state:
+            state = HabitStreak(habit_id=habit.id)
+            db.add(state)
+        state.current_streak = current
+        state.longest_streak = longest
+        state.last_period_start = previous
+        state.updated_at = datetime.utcnow()
+        return state
+
+    @staticmethod
+    async def record_checkin(db: AsyncSession, habit: Habit, log_day: date) -> HabitStreak:
+        """Fold a new check-in into the streak state of its habit."""
+        state = await StreakService.get_state(db, habit.id)
+        if not state:
+            return await StreakService.recompute(db, habit)
+
+        if log_day < habit.start_date and habit.frequency == HabitFrequency.DAILY:
+            return state
+        period = period_start(log_day, habit.frequency)
+        if period < period_start(habit.start_date, habit.frequency):
+            return state
+
+        step = period_length(habit.frequency)
+        last = state.last_period_start
+        if last is None or period > last + step:
+            state.current_streak = 1
+            state.last_period_start = period
+        elif period == last + step:
+            state.current_streak += 1
+            state.last_period_start = period
+        elif period < last - step * (state.current_streak - 1):
+            # Back-dated before the current run: it may bridge a gap, so rebuild
+            return await StreakService.recompute(db, habit)
+        else:
+            # Period already counted in the current run
+            return state
+
+        state.longest_streak = max(state.longest_streak, state.current_streak)
+        state.updated_at = datetime.utcnow()
+        return state
+
+    @staticmethod
+    async def record_removal(db: AsyncSession, habit: Habit, log_day: date) -> HabitStreak:
+        """Update the streak state after a check-in on ``log_day`` was removed."""
+        period = period_start(log_day, habit.frequency)
+        remaining = await db.execute(
+            select(HabitLog.id)
+            .where(
+                HabitLog.habit_id == habit.id,
+                HabitLog.log_day >= period,
+                HabitLog.log_day < period + period_length(habit.frequency),
+            )
+            .limit(1)
+        )
+        state = await StreakService.get_state(db, habit.id)
+        if state and remaining.first() is not None:
+            # Another check-in still covers this period
+            return state
+        return await StreakService.recompute(db, habit)
+
+    @staticmethod
+    async def backfill_missing(db: AsyncSession) -> int:
+        """Build streak states for habits that have none yet. Returns how many were built."""
+        result = await db.execute(
+            select(Habit).outerjoin(HabitStreak, HabitStreak.habit_id == Habit.id).where(HabitStreak.habit_id.is_(None))
+        )
+        habits = result.scalars().all()
+        for habit in habits:
+            await StreakService.recompute(db, habit)
+        await db.commit()
+        return len(habits)
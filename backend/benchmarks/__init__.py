@@ -0,0 +1,10 @@
+"""Latency, SQL and memory benchmarks for every API route.
+
+Run from ``backend/``::
+
+    python -m benchmarks run --habits 30 --years 3 --output baseline.json
+    python -m benchmarks run --compare baseline.json
+
+The app is driven in-process through an ASGI client against a throwaway SQLite
+database filled by a deterministic data generator.
+"""
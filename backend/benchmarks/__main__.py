@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark every API route in-process.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Generate a dataset, benchmark every route and write a JSON baseline")
+    run.add_argument("--habits", type=int, default=20, help="Habits to generate")
+    run.add_argument("--years", type=float, default=2.0, help="Years of check-in history per habit")
+    run.add_argument("--users", type=int, default=1, help="Users the habits are spread over")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--notes-rate", type=float, default=0.5, help="Share of check-ins with notes")
+    run.add_argument("--note-words", type=int, nargs=2, default=(3, 25), metavar=("MIN", "MAX"))
+    run.add_argument(
+        "--category-mix",
+        default=None,
+        help="Relative category weights, e.g. health=3,fitness=2,work=1 (default: uniform)",
+    )
+    run.add_argument("--iterations", type=int, default=50, help="Timed requests per scenario")
+    run.add_argument("--warmup", type=int, default=3, help="Untimed requests per scenario")
+    run.add_argument("--only", nargs="+", metavar="SCENARIO", help="Run only these scenarios")
+    run.add_argument("--cache", action="store_true", help="Keep the response cache on")
+    run.add_argument("--output", type=Path, help="Write the results here")
+    run.add_argument("--compare", type=Path, metavar="BASELINE", help="Fail on regressions against this baseline")
+    run.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown (default: 0.2)")
+
+    compare = commands.add_parser("compare", help="Compare two result files")
+    compare.add_argument("baseline", type=Path)
+    compare.add_argument("current", type=Path)
+    compare.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown (default: 0.2)")
+    return parser.parse_args(argv)
+
+
+def _report(baseline: dict, current: dict, threshold: float) -> int:
+    from benchmarks.runner import compare
+
+    regressions = compare(baseline, current, threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regressions against the baseline (threshold {threshold:.0%})")
+    return 1 if regressions else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    if args.command == "compare":
+        return _report(json.loads(args.baseline.read_text()), json.loads(args.current.read_text()), args.threshold)
+
+    # Settings are read on import, so the throwaway database must be chosen first
+    workdir = tempfile.mkdtemp(prefix="habit-hero-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{workdir}/bench.db"
+    os.environ["CACHE_ENABLED"] = "true" if args.cache else "false"
+    os.environ["SCHEDULER_ENABLED"] = "false"
+    os.environ["DEBUG"] = "false"
+    os.environ["PROFILE_DIR"] = f"{workdir}/profiles"
+
+    from app.models.habit import HabitCategory
+    from benchmarks.data import DataConfig
+    from benchmarks.runner import run
+
+    config = DataConfig(
+        habits=args.habits,
+        years=args.years,
+        users=args.users,
+        seed=args.seed,
+        notes_rate=args.notes_rate,
+        note_words=tuple(args.note_words),
+    )
+    if args.category_mix:
+        mix = dict(part.split("=") for part in args.category_mix.split(","))
+        config.category_mix = {HabitCategory(name.strip()).value: float(weight) for name, weight in mix.items()}
+
+    results = asyncio.run(run(config, iterations=args.iterations, warmup=args.warmup, only=args.only))
+    if results["meta"]["uncovered_routes"]:
+        print(f"Routes without a scenario: {', '.join(results['meta']['uncovered_routes'])}")
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Wrote {args.output}")
+    if args.compare:
+        return _report(json.loads(args.compare.read_text()), results, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import random
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import insert
+
+from app.db.session import SessionLocal
+from app.models.habit import Habit, HabitCategory, HabitFrequency
+from app.models.habit_log import HabitLog
+from app.services.ai_service import NEGATIVE_KEYWORDS, POSITIVE_KEYWORDS
+from app.services.gamification_service import GamificationService
+from app.services.mood_service import MoodService
+from app.services.rollup_service import RollupService
+from app.services.streak_service import StreakService
+
+# Rows per executemany batch while loading
+INSERT_BATCH_SIZE = 5000
+
+FILLER_WORDS = (
+    "today", "morning", "evening", "session", "felt", "after", "work", "quick", "long", "again",
+    "before", "lunch", "with", "friends", "alone", "outside", "home", "slow", "steady", "finally",
+)
+HABIT_NAMES = {
+    HabitCategory.HEALTH: ("Drink water", "Take vitamins", "Sleep 8 hours", "No sugar", "Floss"),
+    HabitCategory.FITNESS: ("Morning run", "Stretching", "Strength training", "Yoga", "10k steps"),
+    HabitCategory.LEARNING: ("Read 30 minutes", "Practice guitar", "Duolingo", "Online course", "Write code"),
+    HabitCategory.MENTAL_HEALTH: ("Meditation", "Journaling", "Gratitude list", "Walk outside", "Digital detox"),
+    HabitCategory.PRODUCTIVITY: ("Plan the day", "Inbox zero", "Weekly review", "Deep work block", "Tidy desk"),
+    HabitCategory.WORK: ("Take breaks", "Review tasks", "Stand-up notes", "Learn a tool", "Update timesheet"),
+}
+
+
+@dataclass
+class DataConfig:
+    """Shape of the generated dataset; the same config and seed always give the same rows."""
+
+    habits: int = 20
+    years: float = 2.0
+    users: int = 1
+    seed: int = 42
+    # Chance that a day (daily habits) or week (weekly habits) gets a check-in
+    checkin_rate: float = 0.7
+    weekly_share: float = 0.25
+    notes_rate: float = 0.5
+    note_words: tuple[int, int] = (3, 25)
+    category_mix: dict[str, float] = field(
+        default_factory=lambda: {category.value: 1.0 for category in HabitCategory}
+    )
+    end_date: date = field(default_factory=date.today)
+
+    def as_dict(self) -> dict:
+        config = asdict(self)
+        config["end_date"] = self.end_date.isoformat()
+        return config
+
+
+def _note(rng: random.Random, config: DataConfig) -> str | None:
+    if rng.random() >= config.notes_rate:
+        return None
+    words = [rng.choice(FILLER_WORDS) for _ in range(rng.randint(*config.note_words))]
+    # Roughly one mood keyword per eight words, either way
+    for _ in range(max(1, len(words) // 8)):
+        words[rng.randrange(len(words))] = rng.choice(POSITIVE_KEYWORDS + NEGATIVE_KEYWORDS)
+    return " ".join(words).capitalize()
+
+
+def generate(config: DataConfig) -> tuple[list[dict], list[dict]]:
+    """Habit rows and their log rows, with ids assigned from 1."""
+    rng = random.Random(config.seed)
+    categories = [HabitCategory(name) for name in config.category_mix]
+    weights = list(config.category_mix.values())
+    start = config.end_date - timedelta(days=int(config.years * 365))
+
+    habits = []
+    logs = []
+    for habit_id in range(1, config.habits + 1):
+        category = rng.choices(categories, weights)[0]
+        frequency = HabitFrequency.WEEKLY if rng.random() < config.weekly_share else HabitFrequency.DAILY
+        habit_start = start + timedelta(days=rng.randrange(0, 60))
+        user_id = 1 + (habit_id - 1) % config.users
+        habits.append({
+            "id": habit_id,
+            "user_id": user_id,
+            "name": f"{rng.choice(HABIT_NAMES[category])} #{habit_id}",
+            "frequency": frequency,
+            "category": category,
+            "start_date": habit_start,
+            "description": None,
+            "created_at": datetime.combine(habit_start, time(8)),
+            "updated_at": datetime.combine(habit_start, time(8)),
+        })
+
+        step = 1 if frequency == HabitFrequency.DAILY else 7
+        for offset in range(0, (config.end_date - habit_start).days + 1, step):
+            if rng.random() >= config.checkin_rate:
+                continue
+            day = habit_start + timedelta(days=offset + (rng.randrange(step) if step > 1 else 0))
+            if day > config.end_date:
+                continue
+            log_date = datetime.combine(day, time(rng.randrange(6, 23), rng.randrange(60)))
+            notes = _note(rng, config)
+            sentiment, sentiment_score = MoodService.score(notes)
+            logs.append({
+                "habit_id": habit_id,
+                "user_id": user_id,
+                "log_date": log_date,
+                "log_day": day,
+                "notes": notes,
+                "sentiment": sentiment,
+                "sentiment_score": sentiment_score,
+                "created_at": log_date,
+            })
+    return habits, logs
+
+
+async def load(config: DataConfig) -> dict[str, int]:
+    """Insert a generated dataset into the (empty, initialised) database and build every derived table."""
+    habits, logs = generate(config)
+    async with SessionLocal() as session:
+        await session.execute(insert(Habit), habits)
+        for batch_start in range(0, len(logs), INSERT_BATCH_SIZE):
+            await session.execute(insert(HabitLog), logs[batch_start : batch_start + INSERT_BATCH_SIZE])
+        await session.commit()
+
+        await RollupService.rebuild(session)
+        await StreakService.backfill_missing(session)
+        await GamificationService.rebuild_all_counters(session)
+    return {"habits": len(habits), "logs": len(logs), "users": config.users}
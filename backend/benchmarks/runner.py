@@ -0,0 +1,178 @@
+import gc
+import math
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+
+import httpx
+import numpy as np
+from sqlalchemy import select
+
+from app.core.scheduler import scheduler
+from app.db.query_stats import track_queries
+from app.db.session import SessionLocal
+from app.main import app
+from app.models.habit_log import HabitLog
+from app.services.maintenance_service import MaintenanceService
+from app.services.recommendation_service import RecommendationService
+from benchmarks.data import DataConfig, load
+from benchmarks.scenarios import SCENARIOS, BenchContext, Scenario, uncovered_routes
+
+# Timings below this many milliseconds never count as a regression, whatever the ratio
+DEFAULT_NOISE_FLOOR_MS = 2.0
+# Peak memory may grow this much on top of the threshold before it counts
+MEMORY_SLACK_KIB = 64
+
+
+async def _send(client: httpx.AsyncClient, scenario: Scenario, ctx: BenchContext) -> tuple[float, int, int]:
+    """Latency in seconds, SQL statement count and status code of one request."""
+    spec = await scenario.build(client, ctx)
+    with track_queries() as stats:
+        started = time.perf_counter()
+        response = await client.request(
+            spec.method, spec.url, json=spec.json, content=spec.content, headers=spec.headers
+        )
+        elapsed = time.perf_counter() - started
+    return elapsed, stats.statements, response.status_code
+
+
+async def _measure(
+    client: httpx.AsyncClient, scenario: Scenario, ctx: BenchContext, iterations: int, warmup: int, memory_iterations: int
+) -> dict:
+    for _ in range(warmup):
+        await _send(client, scenario, ctx)
+
+    latencies = []
+    statements = []
+    errors = 0
+    for _ in range(iterations):
+        elapsed, count, status_code = await _send(client, scenario, ctx)
+        latencies.append(elapsed * 1000)
+        statements.append(count)
+        if status_code >= 400:
+            errors += 1
+
+    # Tracing slows everything down, so peak memory gets its own pass
+    peak = 0
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for _ in range(memory_iterations):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            await _send(client, scenario, ctx)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+    return {
+        "route": scenario.route_key,
+        "iterations": iterations,
+        "errors": errors,
+        "p50_ms": round(p50, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "mean_ms": round(float(np.mean(latencies)), 3),
+        "sql_statements_mean": round(float(np.mean(statements)), 2),
+        "sql_statements_max": int(max(statements)),
+        "peak_memory_kib": round(peak / 1024, 1),
+    }
+
+
+async def run(
+    config: DataConfig,
+    iterations: int = 50,
+    warmup: int = 3,
+    memory_iterations: int = 3,
+    only: list[str] | None = None,
+) -> dict:
+    """Load a dataset and benchmark every scenario, returning the baseline document."""
+    scenarios = [scenario for scenario in SCENARIOS if not only or scenario.name in only]
+
+    async with app.router.lifespan_context(app):
+        load_started = time.perf_counter()
+        dataset = await load(config)
+        async with SessionLocal() as session:
+            await RecommendationService.rebuild(session, force=True)
+            result = await session.execute(
+                select(HabitLog.habit_id, HabitLog.id).where(HabitLog.user_id == 1).order_by(HabitLog.id)
+            )
+            logs = result.all()
+        dataset["load_seconds"] = round(time.perf_counter() - load_started, 2)
+        if not logs:
+            raise ValueError("The dataset has no logs for user 1; increase --habits or --years")
+
+        # Jobs are registered so they can be triggered, but never run on their own
+        if not scheduler.jobs:
+            MaintenanceService.register_jobs(scheduler)
+
+        # The busiest habit of the default user, and a sample of its logs
+        counts: dict[int, int] = {}
+        for habit_id, _ in logs:
+            counts[habit_id] = counts.get(habit_id, 0) + 1
+        habit_id = max(counts, key=counts.get)
+        log_ids = [log_id for log_habit_id, log_id in logs if log_habit_id == habit_id]
+        log_ids = log_ids[:: max(1, len(log_ids) // 50)]
+        ctx = BenchContext(habit_id=habit_id, log_ids=log_ids)
+
+        results = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for scenario in scenarios:
+                scenario_iterations = max(1, math.ceil(iterations * scenario.weight))
+                results[scenario.name] = await _measure(
+                    client,
+                    scenario,
+                    ctx,
+                    scenario_iterations,
+                    min(warmup, scenario_iterations),
+                    min(memory_iterations, scenario_iterations),
+                )
+                print(
+                    f"{scenario.name:32} p50 {results[scenario.name]['p50_ms']:9.2f} ms"
+                    f"  p99 {results[scenario.name]['p99_ms']:9.2f} ms"
+                    f"  sql {results[scenario.name]['sql_statements_mean']:6.1f}"
+                )
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": iterations,
+            "data": config.as_dict(),
+            "dataset": dataset,
+            "uncovered_routes": uncovered_routes(app, SCENARIOS),
+        },
+        "scenarios": results,
+    }
+
+
+def compare(
+    baseline: dict, current: dict, threshold: float = 0.2, noise_floor_ms: float = DEFAULT_NOISE_FLOOR_MS
+) -> list[str]:
+    """Regressions of ``current`` against ``baseline``, one message per metric that got worse.
+
+    Latency and memory regress when they grow by more than ``threshold`` (a fraction);
+    latencies under ``noise_floor_ms`` and memory growth under ``MEMORY_SLACK_KIB`` are ignored. Any extra
+    SQL statement or failed request is a regression.
+    """
+    regressions = []
+    for name, before in baseline["scenarios"].items():
+        after = current["scenarios"].get(name)
+        if after is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if after[metric] > noise_floor_ms and after[metric] > before[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} {before[metric]} -> {after[metric]}")
+        if after["sql_statements_mean"] > before["sql_statements_mean"]:
+            regressions.append(
+                f"{name}: sql_statements_mean {before['sql_statements_mean']} -> {after['sql_statements_mean']}"
+            )
+        if after["peak_memory_kib"] > before["peak_memory_kib"] * (1 + threshold) + MEMORY_SLACK_KIB:
+            regressions.append(f"{name}: peak_memory_kib {before['peak_memory_kib']} -> {after['peak_memory_kib']}")
+        if after["errors"] > before["errors"]:
+            regressions.append(f"{name}: errors {before['errors']} -> {after['errors']}")
+    return regressions
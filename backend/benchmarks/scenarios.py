@@ -0,0 +1,277 @@
+import cProfile
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+
+from app.core.profiling import profile_store
+from app.core.scheduler import scheduler
+
+# Job run by the POST /admin/jobs/{name}/run scenario; cheap and side-effect free
+BENCHMARK_JOB = "cache_prewarm"
+
+
+@dataclass
+class BenchContext:
+    """Ids of the loaded dataset that scenarios address."""
+
+    habit_id: int
+    log_ids: list[int]
+    counter: int = 0
+
+    def next(self) -> int:
+        self.counter += 1
+        return self.counter
+
+
+@dataclass
+class RequestSpec:
+    method: str
+    url: str
+    json: object | None = None
+    content: bytes | None = None
+    headers: dict[str, str] | None = None
+
+
+@dataclass
+class Scenario:
+    """One measured request shape against one route.
+
+    ``build`` runs before each timed request and is not measured, so routes that consume
+    their target (deletes) can create it first.
+    """
+
+    name: str
+    method: str
+    route: str
+    build: Callable[[httpx.AsyncClient, BenchContext], Awaitable[RequestSpec]]
+    # Fraction of the run's iteration count; heavy maintenance routes run fewer times
+    weight: float = 1.0
+
+    @property
+    def route_key(self) -> str:
+        return f"{self.method} {self.route}"
+
+
+def _get(url: str) -> Callable[[httpx.AsyncClient, BenchContext], Awaitable[RequestSpec]]:
+    async def build(client: httpx.AsyncClient, ctx: BenchContext) -> RequestSpec:
+        return RequestSpec("GET", url.format(habit_id=ctx.habit_id, log_id=ctx.log_ids[ctx.next() % len(ctx.log_ids)]))
+
+    return build
+
+
+def _simple(method: str, url: str) -> Callable[[httpx.AsyncClient, BenchContext], Awaitable[RequestSpec]]:
+    async def build(client: httpx.AsyncClient, ctx: BenchContext) -> RequestSpec:
+        return RequestSpec(method, url)
+
+    return build
+
+
+async def _create_habit(client: httpx.AsyncClient, ctx: BenchContext) -> int:
+    response = await client.post(
+        "/api/habits/",
+        json={"name": f"Benchmark habit {ctx.next()}", "frequency": "daily", "category": "health"},
+    )
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def _build_habit_create(client: httpx.AsyncClient, ctx: BenchContext) -> RequestSpec:
+    return RequestSpec(
+        "POST",
+        "/api/habits/",
+        json={"name": f"Benchmark habit {ctx.next()}", "frequency": "daily", "category": "fitness"},
+    )
+
+
+async def _build_habit_update(client: httpx.AsyncClient, ctx: BenchContext) -> RequestSpec:
+    return RequestSpec("PUT", f"/api/habits/{ctx.habit_id}", json={"description": f"Revision {ctx.next()}"})
+
+
+async def _build_habit_delete(client: httpx.AsyncClient, ctx: BenchContext) -> RequestSpec:
+    return RequestSpec("DELETE", f"/api/habits/{await _create_habit(client, ctx)}")
+
+
+def _checkin_time(ctx: BenchContext) -> str:
+    # Spread check-ins over past days so they don't all land on the same rollup row
+    return (datetime.now() - timedelta(days=ctx.next() % 400, minutes=ctx.counter)).isoformat()
+
+
+async def _build_log_create(client: httpx.AsyncClient, ctx: BenchContext) -> RequestSpec:
+    return RequestSpec(
+        "POST",
+        "/api/habit-logs/",
+        json={"habit_id": ctx.habit_id, "log_date": _checkin_time(ctx), "notes": "Felt great, good session"},
+    )
+
+
+async def _build_log_bulk(client: httpx.AsyncClient, ctx: BenchContext) -> RequestSpec:
+    lines = [
+        json.dumps({"habit_id": ctx.habit_id, "log_date": _checkin_time(ctx), "notes": "Imported, tired but done"})
+        for _ in range(100)
+    ]
+    return RequestSpec(
+        "POST",
+        "/api/habit-logs/bulk",
+        content="\n".join(lines).encode(),
+        headers={"content-type": "application/x-ndjson"},
+    )
+
+
+async def _build_log_update(client: httpx.AsyncClient, ctx: BenchContext) -> RequestSpec:
+    log_id = ctx.log_ids[ctx.next() % len(ctx.log_ids)]
+    return RequestSpec("PUT", f"/api/habit-logs/{log_id}", json={"notes": f"Edited note {ctx.counter}, happy"})
+
+
+async def _build_log_delete(client: httpx.AsyncClient, ctx: BenchContext) -> RequestSpec:
+    response = await client.post("/api/habit-logs/", json={"habit_id": ctx.habit_id, "log_date": _checkin_time(ctx)})
+    response.raise_for_status()
+    return RequestSpec("DELETE", f"/api/habit-logs/{response.json()['id']}")
+
+
+async def _build_mood(client: httpx.AsyncClient, ctx: BenchContext) -> RequestSpec:
+    return RequestSpec("POST", "/api/ai/analyze-mood", json={"notes": "Tired and stressed but proud I kept going"})
+
+
+async def _build_mood_batch(client: httpx.AsyncClient, ctx: BenchContext) -> RequestSpec:
+    return RequestSpec("POST", "/api/ai/analyze-mood/batch", json={"habit_id": ctx.habit_id})
+
+
+async def _build_job_run(client: httpx.AsyncClient, ctx: BenchContext) -> RequestSpec:
+    # A run still going from the previous iteration would answer 409
+    running = scheduler.jobs[BENCHMARK_JOB].running
+    if running is not None:
+        await running
+    return RequestSpec("POST", f"/api/admin/jobs/{BENCHMARK_JOB}/run")
+
+
+def _not_modified(url: str) -> Callable[[httpx.AsyncClient, BenchContext], Awaitable[RequestSpec]]:
+    """A revalidation of ``url`` by a client that already holds its current ETag."""
+
+    async def build(client: httpx.AsyncClient, ctx: BenchContext) -> RequestSpec:
+        response = await client.get(url.format(habit_id=ctx.habit_id))
+        etag = response.headers["ETag"]
+        return RequestSpec("GET", response.request.url.raw_path.decode(), headers={"If-None-Match": etag})
+
+    return build
+
+
+async def _build_profile_download(client: httpx.AsyncClient, ctx: BenchContext) -> RequestSpec:
+    profiles = profile_store.list()
+    name = profiles[0]["name"] if profiles else profile_store.save(cProfile.Profile(), "GET", "/benchmark")
+    return RequestSpec("GET", f"/api/admin/profiles/{name}")
+
+
+SCENARIOS = [
+    Scenario("health", "GET", "/api/health", _get("/api/health")),
+    # Habits
+    Scenario("habits.list", "GET", "/api/habits/", _get("/api/habits/")),
+    Scenario("habits.get", "GET", "/api/habits/{habit_id}", _get("/api/habits/{habit_id}")),
+    Scenario("habits.list_not_modified", "GET", "/api/habits/", _not_modified("/api/habits/")),
+    Scenario("habits.create", "POST", "/api/habits/", _build_habit_create),
+    Scenario("habits.update", "PUT", "/api/habits/{habit_id}", _build_habit_update),
+    Scenario("habits.delete", "DELETE", "/api/habits/{habit_id}", _build_habit_delete),
+    # Habit logs
+    Scenario("habit_logs.create", "POST", "/api/habit-logs/", _build_log_create),
+    Scenario("habit_logs.bulk", "POST", "/api/habit-logs/bulk", _build_log_bulk, weight=0.25),
+    Scenario("habit_logs.list", "GET", "/api/habit-logs/habit/{habit_id}", _get("/api/habit-logs/habit/{habit_id}")),
+    Scenario("habit_logs.get", "GET", "/api/habit-logs/{log_id}", _get("/api/habit-logs/{log_id}")),
+    Scenario("habit_logs.update", "PUT", "/api/habit-logs/{log_id}", _build_log_update),
+    Scenario("habit_logs.delete", "DELETE", "/api/habit-logs/{log_id}", _build_log_delete),
+    Scenario(
+        "habit_logs.streak",
+        "GET",
+        "/api/habit-logs/habit/{habit_id}/streak",
+        _get("/api/habit-logs/habit/{habit_id}/streak"),
+    ),
+    Scenario(
+        "habit_logs.success_rate",
+        "GET",
+        "/api/habit-logs/habit/{habit_id}/success-rate",
+        _get("/api/habit-logs/habit/{habit_id}/success-rate"),
+    ),
+    # Analytics
+    Scenario("analytics.best_days", "GET", "/api/analytics/best-days", _get("/api/analytics/best-days")),
+    Scenario(
+        "analytics.checkins_by_date",
+        "GET",
+        "/api/analytics/checkins-by-date",
+        _get("/api/analytics/checkins-by-date?days=365"),
+    ),
+    Scenario("analytics.category_stats", "GET", "/api/analytics/category-stats", _get("/api/analytics/category-stats")),
+    Scenario("analytics.overall", "GET", "/api/analytics/overall", _get("/api/analytics/overall")),
+    Scenario(
+        "analytics.overall_not_modified",
+        "GET",
+        "/api/analytics/overall",
+        _not_modified("/api/analytics/overall"),
+    ),
+    Scenario(
+        "analytics.rolling_success",
+        "GET",
+        "/api/analytics/rolling-success",
+        _get("/api/analytics/rolling-success?days=365"),
+    ),
+    Scenario("analytics.heatmap", "GET", "/api/analytics/heatmap", _get("/api/analytics/heatmap?years=2")),
+    Scenario(
+        "analytics.week_over_week",
+        "GET",
+        "/api/analytics/week-over-week",
+        _get("/api/analytics/week-over-week?weeks=52"),
+    ),
+    # AI
+    Scenario("ai.suggest_habits", "GET", "/api/ai/suggest-habits", _get("/api/ai/suggest-habits")),
+    Scenario("ai.analyze_mood", "POST", "/api/ai/analyze-mood", _build_mood),
+    Scenario("ai.analyze_mood_batch", "POST", "/api/ai/analyze-mood/batch", _build_mood_batch),
+    Scenario("ai.mood_timeline", "GET", "/api/ai/mood-timeline", _get("/api/ai/mood-timeline?period=week&days=365")),
+    Scenario("ai.motivational_quote", "GET", "/api/ai/motivational-quote", _get("/api/ai/motivational-quote")),
+    Scenario("ai.progress_insights", "GET", "/api/ai/progress-insights", _get("/api/ai/progress-insights")),
+    # Gamification
+    Scenario("gamification.stats", "GET", "/api/gamification/stats", _get("/api/gamification/stats")),
+    Scenario(
+        "gamification.check_badges",
+        "POST",
+        "/api/gamification/check-badges",
+        _simple("POST", "/api/gamification/check-badges"),
+    ),
+    # Export
+    Scenario("export.pdf", "GET", "/api/export/pdf", _get("/api/export/pdf"), weight=0.25),
+    Scenario("export.habits", "GET", "/api/export/habits", _get("/api/export/habits?format=csv")),
+    Scenario("export.habit_logs", "GET", "/api/export/habit-logs", _get("/api/export/habit-logs"), weight=0.25),
+    # Admin
+    Scenario(
+        "admin.rollup_rebuild",
+        "POST",
+        "/api/admin/rollup/rebuild",
+        _simple("POST", "/api/admin/rollup/rebuild"),
+        weight=0.1,
+    ),
+    Scenario("admin.mood_backfill", "POST", "/api/admin/mood/backfill", _simple("POST", "/api/admin/mood/backfill")),
+    Scenario("admin.cache_stats", "GET", "/api/admin/cache", _get("/api/admin/cache")),
+    Scenario("admin.cache_clear", "DELETE", "/api/admin/cache", _simple("DELETE", "/api/admin/cache")),
+    Scenario("admin.completion_index", "GET", "/api/admin/completion-index", _get("/api/admin/completion-index")),
+    Scenario("admin.insights", "GET", "/api/admin/insights", _get("/api/admin/insights")),
+    Scenario("admin.recommendations", "GET", "/api/admin/recommendations", _get("/api/admin/recommendations")),
+    Scenario("admin.jobs", "GET", "/api/admin/jobs", _get("/api/admin/jobs")),
+    Scenario("admin.jobs_run", "POST", "/api/admin/jobs/{name}/run", _build_job_run),
+    Scenario("admin.profiles", "GET", "/api/admin/profiles", _get("/api/admin/profiles")),
+    Scenario("admin.profile_download", "GET", "/api/admin/profiles/{name}", _build_profile_download),
+    Scenario("admin.query_stats", "GET", "/api/admin/query-stats", _get("/api/admin/query-stats")),
+    Scenario("admin.query_stats_reset", "DELETE", "/api/admin/query-stats", _simple("DELETE", "/api/admin/query-stats")),
+]
+
+
+def uncovered_routes(app: FastAPI, scenarios: list[Scenario]) -> list[str]:
+    """API routes no scenario exercises, so new endpoints can't silently go unbenchmarked."""
+    covered = {scenario.route_key for scenario in scenarios}
+    routes = {
+        f"{method} {route.path}"
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.path.startswith("/api")
+        for method in route.methods
+    }
+    return sorted(routes - covered)
@@ -0,0 +1,60 @@
+import os
+
+# Settings are read on import, so every test gets the same in-memory database (one
+# shared connection) and no background scheduler
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite://"
+os.environ["SCHEDULER_ENABLED"] = "false"
+os.environ["DEBUG"] = "false"
+os.environ["SLOW_REQUEST_THRESHOLD_MS"] = "0"
+
+from collections.abc import AsyncIterator
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import DataScope, data_versions, response_cache
+from app.core.config import get_settings
+from app.db.base import init_db
+from app.db.session import SessionLocal, _engine
+from app.main import app
+from app.models import Base
+from app.services.completion_index import completion_index
+from app.services.insights_service import InsightsService
+
+
+@pytest.fixture(scope="session")
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+async def database(anyio_backend: str) -> AsyncIterator[None]:
+    """Migrate the database before each test, then empty it and drop all in-process state."""
+    await init_db()
+    yield
+    await InsightsService.shutdown()
+    async with _engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            await connection.execute(table.delete())
+    response_cache.clear()
+    completion_index.clear()
+    data_versions.bump(DataScope.HABITS, DataScope.HABIT_LOGS, DataScope.GAMIFICATION)
+
+
+@pytest.fixture
+def user_header(monkeypatch) -> None:
+    """Trust X-User-Id, as a deployment behind an authenticating gateway does."""
+    monkeypatch.setattr(get_settings(), "user_id_header_enabled", True)
+
+
+@pytest.fixture
+async def session() -> AsyncIterator[AsyncSession]:
+    async with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+async def client() -> AsyncIterator[httpx.AsyncClient]:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
@@ -0,0 +1,106 @@
+import random
+from collections import Counter
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.db.expressions import weekday_expression
+from app.models.habit import HabitFrequency
+from app.models.habit_daily_rollup import HabitDailyRollup
+from app.models.habit_log import HabitLog
+from app.schemas.habit import HabitCreate
+from app.schemas.habit_log import HabitLogCreate
+from app.services.analytics_service import DAY_NAMES, AnalyticsService
+from app.services.habit_log_service import HabitLogService
+from app.services.habit_service import HabitService
+
+pytestmark = pytest.mark.anyio
+
+USERS = (1, 2)
+OFFSETS = (timezone.utc, timezone(timedelta(hours=5, minutes=30)), timezone(timedelta(hours=-8)))
+
+
+async def _seed(session) -> dict[int, list[int]]:
+    """Daily and weekly habits for two users with 39 days of logs ending two days ago, several per day, at mixed UTC offsets."""
+    rng = random.Random(3)
+    start = date.today() - timedelta(days=40)
+    habit_ids = {}
+    for user_id in USERS:
+        habit_ids[user_id] = []
+        for frequency in (HabitFrequency.DAILY, HabitFrequency.WEEKLY, HabitFrequency.DAILY):
+            habit = await HabitService.create(
+                session, user_id, HabitCreate(name=f"{frequency.value} {user_id}", frequency=frequency, start_date=start)
+            )
+            habit_ids[user_id].append(habit.id)
+            for offset in range(39):
+                for _ in range(rng.choice((0, 0, 1, 1, 2, 3))):
+                    logged_at = datetime.combine(
+                        start + timedelta(days=offset), time(rng.randrange(24), rng.randrange(60)), rng.choice(OFFSETS)
+                    )
+                    await HabitLogService.create(session, user_id, HabitLogCreate(habit_id=habit.id, log_date=logged_at))
+    return habit_ids
+
+
+async def _log_days(session, user_id: int, habit_id: int | None) -> list[date]:
+    query = select(HabitLog.log_date).where(HabitLog.user_id == user_id)
+    if habit_id:
+        query = query.where(HabitLog.habit_id == habit_id)
+    return [log_date.date() for log_date in (await session.execute(query)).scalars()]
+
+
+async def test_best_days_sql_matches_python(session):
+    habit_ids = await _seed(session)
+    # Otherwise get_best_days would take the Python path as well
+    assert weekday_expression(session.bind.dialect.name, HabitDailyRollup.day) is not None
+
+    for user_id in USERS:
+        for habit_id in (None, *habit_ids[user_id]):
+            expected = Counter(DAY_NAMES[day.weekday()] for day in await _log_days(session, user_id, habit_id))
+            in_sql = await AnalyticsService.get_best_days(session, user_id, habit_id)
+            in_python = await AnalyticsService._get_best_days_python(session, user_id, habit_id)
+            assert in_sql == in_python == dict(expected)
+            # The SQL path orders Monday to Sunday
+            assert list(in_sql) == [name for name in DAY_NAMES if name in in_sql]
+
+
+async def test_checkins_by_date_sql_matches_python(session):
+    habit_ids = await _seed(session)
+
+    for user_id in USERS:
+        for habit_id in (None, *habit_ids[user_id]):
+            for days in (7, 30):
+                since = date.today() - timedelta(days=days)
+                expected = Counter(
+                    day.isoformat() for day in await _log_days(session, user_id, habit_id) if day >= since
+                )
+                in_sql = await AnalyticsService.get_checkins_by_date(session, user_id, habit_id, days)
+                assert in_sql == dict(sorted(expected.items()))
+                assert list(in_sql) == sorted(in_sql)
+
+
+async def test_other_users_logs_are_not_counted(session):
+    habit_ids = await _seed(session)
+
+    assert await AnalyticsService.get_best_days(session, 1, habit_ids[2][0]) == {}
+    assert await AnalyticsService.get_checkins_by_date(session, 1, habit_ids[2][0]) == {}
+    assert await AnalyticsService.get_best_days(session, 3) == {}
+
+
+async def test_checkins_before_a_weekly_habit_started_do_not_use_up_its_week(session):
+    this_monday = date.today() - timedelta(days=date.today().weekday())
+    started = this_monday - timedelta(days=12)  # a Wednesday two weeks back
+    habit = await HabitService.create(
+        session, 1, HabitCreate(name="Swim", frequency=HabitFrequency.WEEKLY, start_date=started)
+    )
+    # Monday of the start week, before the habit started, then the Thursday after it did
+    for day in (started - timedelta(days=2), started + timedelta(days=1)):
+        await HabitLogService.create(session, 1, HabitLogCreate(habit_id=habit.id, log_date=datetime.combine(day, time(8))))
+
+    result = await AnalyticsService.get_rolling_success(session, 1, days=30, habit_id=habit.id)
+
+    weekly_rates = result["habits"][0]["rolling_success"]["7"]
+    first = date.fromisoformat(result["start_date"])
+    assert weekly_rates[(started - first).days - 1] is None
+    assert weekly_rates[(started - first).days] == 0.0
+    assert weekly_rates[(started - first).days + 1] == 100.0
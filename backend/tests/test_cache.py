@@ -0,0 +1,38 @@
+from datetime import date
+
+import pytest
+
+from app.core import cache
+from app.core.cache import DataScope, cached, data_versions
+
+pytestmark = pytest.mark.anyio
+
+
+class _Tomorrow(date):
+    @classmethod
+    def today(cls) -> date:
+        return date.fromordinal(date.today().toordinal() + 1)
+
+
+async def test_daily_entries_expire_at_midnight(monkeypatch):
+    calls = []
+
+    @cached(DataScope.HABIT_LOGS, daily=True)
+    async def relative_to_today(days: int) -> int:
+        calls.append(days)
+        return len(calls)
+
+    @cached(DataScope.HABIT_LOGS)
+    async def timeless(days: int) -> int:
+        calls.append(days)
+        return len(calls)
+
+    assert await relative_to_today(days=7) == await relative_to_today(days=7) == 1
+    assert await timeless(days=7) == await timeless(days=7) == 2
+
+    monkeypatch.setattr(cache, "date", _Tomorrow)
+    assert await relative_to_today(days=7) == 3
+    assert await timeless(days=7) == 2
+
+    data_versions.bump(DataScope.HABIT_LOGS)
+    assert await timeless(days=7) == 4
@@ -0,0 +1,93 @@
+from datetime import date
+
+import pytest
+
+from app.core import cache
+
+pytestmark = pytest.mark.anyio
+
+READ_ROUTES = (
+    "/api/habits/",
+    "/api/habits/{habit_id}",
+    "/api/habit-logs/habit/{habit_id}",
+    "/api/habit-logs/habit/{habit_id}/streak",
+    "/api/analytics/overall",
+    "/api/analytics/rolling-success",
+    "/api/gamification/stats",
+    "/api/ai/mood-timeline",
+)
+
+
+class _Tomorrow(date):
+    @classmethod
+    def today(cls) -> date:
+        return date.fromordinal(date.today().toordinal() + 1)
+
+
+@pytest.fixture
+async def habit_id(client) -> int:
+    habit = (await client.post("/api/habits/", json={"name": "Run", "start_date": "2024-01-01"})).json()
+    await client.post("/api/habit-logs/", json={"habit_id": habit["id"], "log_date": "2024-03-01T07:00:00Z", "notes": "Great"})
+    return habit["id"]
+
+
+@pytest.mark.parametrize("route", READ_ROUTES)
+async def test_unchanged_responses_revalidate_with_304(client, habit_id, route):
+    url = route.format(habit_id=habit_id)
+    first = await client.get(url)
+    assert first.status_code == 200, first.text
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    again = await client.get(url, headers={"If-None-Match": etag})
+
+    assert (again.status_code, again.content) == (304, b"")
+    assert again.headers["ETag"] == etag
+
+
+async def test_weak_and_listed_tags_match(client, habit_id):
+    etag = (await client.get("/api/habits/")).headers["ETag"]
+
+    for if_none_match in (f"W/{etag}", f'"stale", {etag}', f'W/"stale",W/{etag}'):
+        response = await client.get("/api/habits/", headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304, if_none_match
+    assert (await client.get("/api/habits/", headers={"If-None-Match": '"stale"'})).status_code == 200
+
+
+async def test_tags_are_per_url_and_query(client, habit_id):
+    await client.post("/api/habits/", json={"name": "Read", "start_date": "2024-01-01"})
+    everything = await client.get("/api/habits/")
+    one = await client.get("/api/habits/", params={"limit": 1})
+
+    assert everything.headers["ETag"] != one.headers["ETag"]
+    stale = await client.get("/api/habits/", params={"limit": 1}, headers={"If-None-Match": everything.headers["ETag"]})
+    assert stale.status_code == 200
+    assert len(stale.json()) == 1
+
+
+async def test_writes_change_the_tags_of_what_they_touch(client, habit_id):
+    logs_url = f"/api/habit-logs/habit/{habit_id}"
+    logs_etag = (await client.get(logs_url)).headers["ETag"]
+    stats_etag = (await client.get("/api/gamification/stats")).headers["ETag"]
+    habits_etag = (await client.get("/api/habits/")).headers["ETag"]
+
+    await client.post("/api/habit-logs/", json={"habit_id": habit_id, "log_date": "2024-03-02T07:00:00Z"})
+
+    logs = await client.get(logs_url, headers={"If-None-Match": logs_etag})
+    assert logs.status_code == 200
+    assert len(logs.json()) == 2
+    assert (await client.get("/api/gamification/stats", headers={"If-None-Match": stats_etag})).status_code == 200
+
+    await client.put(f"/api/habits/{habit_id}", json={"name": "Morning run"})
+    habits = await client.get("/api/habits/", headers={"If-None-Match": habits_etag})
+    assert habits.status_code == 200
+    assert habits.json()[0]["name"] == "Morning run"
+
+
+async def test_tags_change_at_midnight(client, habit_id, monkeypatch):
+    url = f"/api/habit-logs/habit/{habit_id}/streak"
+    etag = (await client.get(url)).headers["ETag"]
+
+    monkeypatch.setattr(cache, "date", _Tomorrow)
+
+    assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 200
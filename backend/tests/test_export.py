@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+
+import pytest
+
+from app.services import export_service
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def habit_ids(client, monkeypatch, user_header) -> list[int]:
+    """Two habits of the default user with 7 and 3 logs, one of another user's; batches of 3."""
+    monkeypatch.setattr(export_service, "EXPORT_BATCH_SIZE", 3)
+    ids = []
+    for name, count, user_id in (("Walk", 7, 1), ("Stretch", 3, 1), ("Other", 2, 2)):
+        headers = {"X-User-Id": str(user_id)}
+        habit = (await client.post("/api/habits/", json={"name": name, "start_date": "2024-01-01"}, headers=headers)).json()
+        rows = [{"habit_id": habit["id"], "log_date": f"2024-01-{day:02d}T08:00:00", "notes": f"{name} {day}"} for day in range(1, count + 1)]
+        response = await client.post("/api/habit-logs/bulk", json=rows, headers=headers)
+        assert response.json()["inserted"] == count
+        ids.append(habit["id"])
+    return ids
+
+
+async def test_ndjson_export_streams_every_log_in_order(client, habit_ids):
+    response = await client.get("/api/export/habit-logs")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["content-disposition"] == 'attachment; filename="habit-logs.ndjson"'
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert len(records) == 10
+    assert [(record["log_date"], record["id"]) for record in records] == sorted(
+        (record["log_date"], record["id"]) for record in records
+    )
+    assert {record["habit_id"] for record in records} == set(habit_ids[:2])
+
+
+async def test_csv_export_has_a_header_and_one_row_per_log(client, habit_ids):
+    response = await client.get("/api/export/habit-logs", params={"format": "csv", "habit_id": habit_ids[0]})
+
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 7
+    assert list(rows[0]) == ["log_date", "notes", "id", "habit_id", "sentiment", "sentiment_score", "created_at"]
+    assert [row["notes"] for row in rows] == [f"Walk {day}" for day in range(1, 8)]
+
+
+async def test_habit_export_is_per_user_and_revalidates(client, habit_ids):
+    response = await client.get("/api/export/habits", headers={"X-User-Id": "2"})
+    assert [json.loads(line)["name"] for line in response.text.splitlines()] == ["Other"]
+
+    etag = response.headers["ETag"]
+    unchanged = await client.get("/api/export/habits", headers={"X-User-Id": "2", "If-None-Match": etag})
+    assert (unchanged.status_code, unchanged.content) == (304, b"")
+
+
+async def test_empty_exports(client):
+    assert (await client.get("/api/export/habit-logs")).text == ""
+    assert (await client.get("/api/export/habits", params={"format": "csv"})).text.splitlines() == [
+        "name,frequency,category,start_date,description,id,created_at,updated_at"
+    ]
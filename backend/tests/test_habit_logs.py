@@ -0,0 +1,42 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models.habit_daily_rollup import HabitDailyRollup
+from app.models.habit_log import HabitLog
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_same_day_utc_checkins_share_a_rollup_row(client, session):
+    start = date.today() - timedelta(days=10)
+    habit = (await client.post("/api/habits/", json={"name": "Read", "start_date": start.isoformat()})).json()
+    day = date.today() - timedelta(days=3)
+
+    # What the frontend sends: new Date().toISOString()
+    for time_of_day in ("09:30:00.000Z", "08:15:00.000Z"):
+        response = await client.post(
+            "/api/habit-logs/", json={"habit_id": habit["id"], "log_date": f"{day.isoformat()}T{time_of_day}"}
+        )
+        assert response.status_code == 201, response.text
+
+    row = await session.get(HabitDailyRollup, (habit["id"], day))
+    assert row.checkin_count == 2
+    assert row.first_log_at == datetime.combine(day, datetime.min.time()).replace(hour=8, minute=15)
+    assert row.last_log_at == datetime.combine(day, datetime.min.time()).replace(hour=9, minute=30)
+
+
+async def test_offset_dates_are_stored_as_naive_utc(client, session):
+    habit = (await client.post("/api/habits/", json={"name": "Run", "start_date": "2024-01-01"})).json()
+    created = await client.post("/api/habit-logs/", json={"habit_id": habit["id"], "log_date": "2024-03-10T01:00:00+02:00"})
+    assert created.status_code == 201, created.text
+
+    updated = await client.put(f"/api/habit-logs/{created.json()['id']}", json={"log_date": "2024-03-12T23:30:00-01:00"})
+    assert updated.status_code == 200, updated.text
+
+    log = (await session.execute(select(HabitLog))).scalar_one()
+    assert log.log_date == datetime(2024, 3, 13, 0, 30)
+    assert log.log_day == date(2024, 3, 13)
+    rollups = (await session.execute(select(HabitDailyRollup.day, HabitDailyRollup.checkin_count))).all()
+    assert rollups == [(date(2024, 3, 13), 1)]
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.habit_daily_rollup import HabitDailyRollup
+from app.models.habit_log import HabitLog
+from app.services import import_service
+from app.services.gamification_service import GamificationService
+from app.services.import_service import ImportService, iter_json_array
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def habit_id(client) -> int:
+    response = await client.post("/api/habits/", json={"name": "Swim", "start_date": "2024-01-01"})
+    return response.json()["id"]
+
+
+def _rows(habit_id: int) -> list[dict]:
+    return [
+        {"habit_id": habit_id, "log_date": "2024-02-01T07:00:00Z", "notes": "Great swim, felt amazing"},
+        {"habit_id": habit_id, "log_date": "2024-02-02T07:00:00"},
+        {"habit_id": 999, "log_date": "2024-02-03T07:00:00"},
+        {"habit_id": habit_id, "log_date": "not a date"},
+        {"habit_id": habit_id, "log_date": "2024-02-02T19:30:00+01:00"},
+    ]
+
+
+async def _import(client, content_type: str, body: bytes) -> dict:
+    response = await client.post("/api/habit-logs/bulk", content=body, headers={"Content-Type": content_type})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _encode(content_type: str, rows: list[dict]) -> bytes:
+    if content_type == "application/json":
+        return json.dumps(rows).encode()
+    if content_type == "application/x-ndjson":
+        return "\n".join(json.dumps(row) for row in rows).encode() + b"\n"
+    lines = ["habit_id,log_date,notes"] + [f"{row['habit_id']},{row['log_date']},{row.get('notes', '')}" for row in rows]
+    return "\n".join(lines).encode()
+
+
+@pytest.mark.parametrize("content_type", ["application/json", "application/x-ndjson", "text/csv"])
+async def test_every_format_imports_valid_rows_and_reports_the_rest(client, session, habit_id, content_type):
+    result = await _import(client, content_type, _encode(content_type, _rows(habit_id)))
+
+    assert (result["inserted"], result["failed"]) == (3, 2)
+    assert [error["row"] for error in result["errors"]] == [3, 4]
+    assert result["errors"][0]["errors"] == ["habit_id: Habit 999 not found"]
+
+    logs = (await session.execute(select(HabitLog.log_day, HabitLog.sentiment).order_by(HabitLog.log_date))).all()
+    assert [str(log_day) for log_day, _ in logs] == ["2024-02-01", "2024-02-02", "2024-02-02"]
+    assert logs[0].sentiment == "positive"
+    rollups = (await session.execute(select(HabitDailyRollup.day, HabitDailyRollup.checkin_count))).all()
+    assert sorted((str(day), count) for day, count in rollups) == [("2024-02-01", 1), ("2024-02-02", 2)]
+
+
+async def test_invalid_ndjson_lines_are_reported_by_row(client, habit_id):
+    body = b'{"habit_id": %d, "log_date": "2024-02-01T07:00:00"}\n{oops\n\n' % habit_id
+    result = await _import(client, "application/x-ndjson", body)
+    assert (result["inserted"], result["failed"]) == (1, 1)
+    assert result["errors"][0]["row"] == 2
+    assert result["errors"][0]["errors"][0].startswith("Invalid JSON")
+
+
+async def test_malformed_bodies_and_unknown_types_are_rejected(client):
+    response = await client.post("/api/habit-logs/bulk", content=b'{"habit_id": 1}', headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+    response = await client.post("/api/habit-logs/bulk", content=b"<logs/>", headers={"Content-Type": "application/xml"})
+    assert response.status_code == 415
+
+
+async def test_imports_earn_no_checkin_xp(client, habit_id):
+    rows = [{"habit_id": habit_id, "log_date": f"2024-03-{day:02d}T07:00:00"} for day in range(1, 13)]
+    first = await _import(client, "application/json", json.dumps(rows).encode())
+    again = await _import(client, "application/json", json.dumps(rows).encode())
+
+    # Only the one-off badge bonuses; importing the same history again adds nothing
+    assert {badge["id"] for badge in first["new_badges"]} >= {"checkin_10"}
+    assert first["xp_awarded"] == sum(badge["xp"] for badge in first["new_badges"])
+    assert (again["xp_awarded"], again["new_badges"], again["total_xp"]) == (0, [], first["total_xp"])
+
+
+async def test_failed_import_rolls_back_every_batch(session, habit_id, monkeypatch):
+    monkeypatch.setattr(import_service, "IMPORT_CHUNK_SIZE", 2)
+
+    async def fail(*args, **kwargs):
+        raise RuntimeError("award failed")
+
+    monkeypatch.setattr(GamificationService, "award_import", fail)
+    rows = [{"habit_id": habit_id, "log_date": f"2024-03-{day:02d}T07:00:00"} for day in range(1, 6)]
+    with pytest.raises(RuntimeError):
+        await ImportService.import_logs(session, 1, iter_json_array(json.dumps(rows).encode()))
+    await session.rollback()
+
+    assert (await session.execute(select(func.count()).select_from(HabitLog))).scalar() == 0
+    assert (await session.execute(select(func.count()).select_from(HabitDailyRollup))).scalar() == 0
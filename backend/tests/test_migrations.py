@@ -0,0 +1,167 @@
+from collections.abc import AsyncIterator
+from datetime import date
+
+import pytest
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.db.migrations import (
+    DATA_MIGRATIONS,
+    LATEST_VERSION,
+    MIGRATIONS,
+    pending_data_migrations,
+    run_data_migrations,
+    run_migrations,
+    schema_version,
+)
+from app.models.gamification import UserStats
+from app.models.habit_daily_rollup import HabitDailyRollup
+from app.models.habit_log import HabitLog
+from app.models.habit_streak import HabitStreak
+
+pytestmark = pytest.mark.anyio
+
+# The schema the first release created, before any migration existed
+BASELINE_SCHEMA = (
+    """CREATE TABLE habits (
+        id INTEGER NOT NULL, name VARCHAR(200) NOT NULL, frequency VARCHAR(6) NOT NULL,
+        category VARCHAR(13) NOT NULL, start_date DATE NOT NULL, description TEXT,
+        created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL, PRIMARY KEY (id))""",
+    "CREATE INDEX ix_habits_name ON habits (name)",
+    "CREATE INDEX ix_habits_id ON habits (id)",
+    """CREATE TABLE habit_logs (
+        id INTEGER NOT NULL, habit_id INTEGER NOT NULL, log_date DATETIME NOT NULL, notes TEXT,
+        created_at DATETIME NOT NULL, PRIMARY KEY (id),
+        FOREIGN KEY(habit_id) REFERENCES habits (id) ON DELETE CASCADE)""",
+    "CREATE INDEX ix_habit_logs_id ON habit_logs (id)",
+    "CREATE INDEX ix_habit_logs_log_date ON habit_logs (log_date)",
+    "CREATE INDEX ix_habit_logs_habit_id ON habit_logs (habit_id)",
+    """CREATE TABLE user_stats (
+        id INTEGER NOT NULL, total_xp INTEGER NOT NULL, level INTEGER NOT NULL, badges_earned VARCHAR,
+        created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL, PRIMARY KEY (id))""",
+    "CREATE INDEX ix_user_stats_id ON user_stats (id)",
+)
+BASELINE_ROWS = (
+    "INSERT INTO habits VALUES (1, 'Run', 'DAILY', 'FITNESS', '2024-03-01', NULL, '2024-03-01 08:00:00', '2024-03-01 08:00:00')",
+    "INSERT INTO habits VALUES (2, 'Read', 'WEEKLY', 'LEARNING', '2024-03-01', NULL, '2024-03-01 08:00:00', '2024-03-01 08:00:00')",
+    "INSERT INTO habit_logs VALUES (1, 1, '2024-03-01 07:00:00.000000', 'Great run, felt amazing', '2024-03-01 07:00:00')",
+    "INSERT INTO habit_logs VALUES (2, 1, '2024-03-02 07:00:00.000000', NULL, '2024-03-02 07:00:00')",
+    "INSERT INTO habit_logs VALUES (3, 1, '2024-03-02 19:00:00.000000', 'Tired and sore', '2024-03-02 19:00:00')",
+    "INSERT INTO habit_logs VALUES (4, 2, '2024-03-05 21:00:00.000000', NULL, '2024-03-05 21:00:00')",
+    "INSERT INTO user_stats VALUES (1, 35, 1, '[\"first_checkin\"]', '2024-03-01 07:00:00', '2024-03-05 21:00:00')",
+    "INSERT INTO user_stats VALUES (2, 0, 1, '[]', '2024-03-01 07:00:00', '2024-03-01 07:00:00')",
+)
+
+
+@pytest.fixture
+async def legacy_engine(tmp_path) -> AsyncIterator[AsyncEngine]:
+    """A file database in the baseline schema, with a few habits, logs and two stats rows."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}")
+    async with engine.begin() as connection:
+        for statement in BASELINE_SCHEMA + BASELINE_ROWS:
+            await connection.execute(text(statement))
+    yield engine
+    await engine.dispose()
+
+
+async def _migrate(engine: AsyncEngine) -> list[int]:
+    """What init_db does, against ``engine``."""
+    async with engine.begin() as connection:
+        applied = await connection.run_sync(run_migrations)
+        pending = await connection.run_sync(pending_data_migrations)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        return applied + await run_data_migrations(session, pending)
+
+
+def _schema(connection) -> dict:
+    """Columns and index names of the migrated tables."""
+    inspector = inspect(connection)
+    return {
+        table: (
+            {column["name"] for column in inspector.get_columns(table)},
+            {index["name"] for index in inspector.get_indexes(table)},
+        )
+        for table in ("habits", "habit_logs", "habit_daily_rollup", "user_stats")
+    }
+
+
+async def test_schema_migrations_upgrade_the_baseline(legacy_engine):
+    async with legacy_engine.begin() as connection:
+        assert await connection.run_sync(run_migrations) == [version for version, _ in MIGRATIONS]
+        schema = await connection.run_sync(_schema)
+        versions = set((await connection.execute(select(schema_version.c.version))).scalars())
+        pending = await connection.run_sync(pending_data_migrations)
+
+    habit_columns, habit_indexes = schema["habits"]
+    log_columns, log_indexes = schema["habit_logs"]
+    stats_columns, _ = schema["user_stats"]
+    # 1: stats counters
+    assert {"habit_count", "category_count", "total_checkins", "week_checkins", "week_start", "max_streak"} <= stats_columns
+    # 2: log_day, with the composite indexes replacing the habit_id one
+    assert "log_day" in log_columns
+    assert {"ix_habit_logs_habit_id_log_date", "ix_habit_logs_habit_id_log_day"} <= log_indexes
+    assert "ix_habit_logs_habit_id" not in log_indexes
+    # 3: user_id everywhere, with its indexes
+    assert all("user_id" in schema[table][0] for table in schema)
+    assert {"ix_habits_user_id_created_at", "ix_habits_user_id_category"} <= habit_indexes
+    assert "ix_habit_logs_user_id_log_date" in log_indexes
+    # 4: sentiment columns
+    assert {"sentiment", "sentiment_score"} <= log_columns
+
+    assert versions == {version for version, _ in MIGRATIONS}
+    assert [version for version, _ in pending] == [version for version, _ in DATA_MIGRATIONS]
+
+    async with legacy_engine.connect() as connection:
+        log_days = dict((await connection.execute(select(HabitLog.id, HabitLog.log_day))).all())
+        assert log_days == {
+            1: date(2024, 3, 1),
+            2: date(2024, 3, 2),
+            3: date(2024, 3, 2),
+            4: date(2024, 3, 5),
+        }
+        habit_users = set((await connection.execute(text("SELECT user_id FROM habits"))).scalars())
+        log_users = set((await connection.execute(select(HabitLog.user_id))).scalars())
+        assert habit_users == log_users == {1}
+        # The duplicate stats row is dropped; the one single-user installs read is kept
+        stats = (await connection.execute(select(UserStats.id, UserStats.user_id, UserStats.total_xp))).all()
+        assert stats == [(1, 1, 35)]
+        assert (await connection.execute(select(UserStats.habit_count))).scalar() == 0
+
+
+async def test_schema_migrations_resume_after_the_recorded_version(legacy_engine):
+    # A database last started between releases: migrations 1 and 2 are already applied
+    async with legacy_engine.begin() as connection:
+        for _, migrate in MIGRATIONS[:2]:
+            await connection.run_sync(migrate)
+        await connection.execute(text("CREATE TABLE schema_version (version INTEGER NOT NULL, PRIMARY KEY (version))"))
+        await connection.execute(text("INSERT INTO schema_version VALUES (1), (2)"))
+
+    async with legacy_engine.begin() as connection:
+        assert await connection.run_sync(run_migrations) == [3, 4]
+    async with legacy_engine.begin() as connection:
+        assert await connection.run_sync(run_migrations) == []
+
+
+async def test_derived_data_is_backfilled_once(legacy_engine):
+    assert await _migrate(legacy_engine) == list(range(1, LATEST_VERSION + 1))
+
+    async with async_sessionmaker(legacy_engine)() as session:
+        rollups = (await session.execute(select(HabitDailyRollup.day, HabitDailyRollup.checkin_count))).all()
+        assert sorted(rollups) == [(date(2024, 3, 1), 1), (date(2024, 3, 2), 2), (date(2024, 3, 5), 1)]
+        assert (await session.execute(select(func.count()).select_from(HabitStreak))).scalar() == 2
+        stats = (await session.execute(select(UserStats))).scalar_one()
+        assert (stats.habit_count, stats.total_checkins) == (2, 4)
+        sentiments = dict((await session.execute(select(HabitLog.id, HabitLog.sentiment))).all())
+        assert (sentiments[1], sentiments[2], sentiments[3]) == ("positive", None, "negative")
+
+    # Every later start finds nothing to do
+    assert await _migrate(legacy_engine) == []
+
+
+async def test_new_database_needs_no_backfill(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'new.db'}")
+    assert await _migrate(engine) == []
+    async with engine.connect() as connection:
+        versions = set((await connection.execute(select(schema_version.c.version))).scalars())
+    await engine.dispose()
+    assert versions == {LATEST_VERSION} | {version for version, _ in DATA_MIGRATIONS}
@@ -0,0 +1,72 @@
+import random
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.db.expressions import week_start_expression
+from app.models.habit_log import HabitLog
+from app.schemas.habit import HabitCreate
+from app.schemas.habit_log import HabitLogCreate
+from app.services.habit_log_service import HabitLogService
+from app.services.habit_service import HabitService
+from app.services.mood_service import MoodPeriod, MoodService
+
+pytestmark = pytest.mark.anyio
+
+NOTES = (
+    "Great run, felt amazing",
+    "Good and proud",
+    "Tired",
+    "Tired and stressed, hard day",
+    "Great but tired",
+    "Happy",
+    None,
+)
+
+
+async def _seed(session) -> list[int]:
+    """Two habits with 60 days of logs, up to four a day, with notes of mixed sentiment."""
+    rng = random.Random(16)
+    start = date.today() - timedelta(days=61)
+    habit_ids = []
+    for name in ("Run", "Read"):
+        habit = await HabitService.create(session, 1, HabitCreate(name=name, start_date=start))
+        habit_ids.append(habit.id)
+        for offset in range(60):
+            for _ in range(rng.choice((0, 1, 2, 3, 4))):
+                logged_at = datetime.combine(start + timedelta(days=offset), time(rng.randrange(24)))
+                log_in = HabitLogCreate(habit_id=habit.id, log_date=logged_at, notes=rng.choice(NOTES))
+                await HabitLogService.create(session, 1, log_in)
+    return habit_ids
+
+
+async def _expected_weeks(session, since: date, habit_id: int | None) -> list[tuple[str, int, float]]:
+    """(week start, entries, average score) straight from the scored logs."""
+    query = select(HabitLog.log_day, HabitLog.sentiment_score).where(
+        HabitLog.sentiment.is_not(None), HabitLog.log_day >= since
+    )
+    if habit_id:
+        query = query.where(HabitLog.habit_id == habit_id)
+    weeks = defaultdict(list)
+    for log_day, score in (await session.execute(query)).all():
+        weeks[log_day - timedelta(days=log_day.weekday())].append(score)
+    return [(week.isoformat(), len(scores), round(sum(scores) / len(scores), 3)) for week, scores in sorted(weeks.items())]
+
+
+async def test_weekly_timeline_sql_matches_python(session):
+    habit_ids = await _seed(session)
+    # Otherwise get_timeline would take the Python path as well
+    assert week_start_expression(session.bind.dialect.name, HabitLog.log_day) is not None
+
+    for habit_id in (None, *habit_ids):
+        for days in (30, 90):
+            since = date.today() - timedelta(days=days)
+            in_sql = await MoodService.get_timeline(session, 1, MoodPeriod.WEEK, days, habit_id)
+            in_python = await MoodService._get_weekly_timeline_python(session, 1, since, habit_id)
+            assert in_sql == in_python
+            expected = await _expected_weeks(session, since, habit_id)
+            assert [(week["period_start"], week["entries"], week["average_score"]) for week in in_sql] == expected
+            for week in in_sql:
+                assert week["positive"] + week["negative"] + week["neutral"] == week["entries"]
@@ -0,0 +1,80 @@
+import base64
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.models.habit import Habit
+
+pytestmark = pytest.mark.anyio
+
+
+async def _walk(client, url: str, limit: int) -> list[list[dict]]:
+    """Every page of ``url``, following X-Next-Cursor until it is absent."""
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit} | ({"cursor": cursor} if cursor else {})
+        response = await client.get(url, params=params)
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(datetime(2024, 3, 1, 7, 30, 15, 123456), 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (datetime(2024, 3, 1, 7, 30, 15, 123456), 42)
+
+
+async def test_habit_pages_cover_every_habit_once(client, session):
+    ids = [
+        (await client.post("/api/habits/", json={"name": f"Habit {n}", "start_date": "2024-01-01"})).json()["id"]
+        for n in range(7)
+    ]
+    # Habits created in the same instant are ordered by id
+    await session.execute(update(Habit).where(Habit.id.in_(ids[1:5])).values(created_at=datetime(2024, 1, 1)))
+    await session.commit()
+
+    pages = await _walk(client, "/api/habits/", limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    walked = [habit["id"] for page in pages for habit in page]
+    assert walked == [ids[6], ids[5], ids[0], ids[4], ids[3], ids[2], ids[1]]
+    everything = (await client.get("/api/habits/")).json()
+    assert walked == [habit["id"] for habit in everything]
+
+
+async def test_log_pages_are_stable_across_new_checkins(client):
+    habit_id = (await client.post("/api/habits/", json={"name": "Run", "start_date": "2024-01-01"})).json()["id"]
+    for log_date in ("2024-03-01T07:00:00Z", "2024-03-02T07:00:00Z", "2024-03-02T07:00:00Z", "2024-03-03T07:00:00Z"):
+        response = await client.post("/api/habit-logs/", json={"habit_id": habit_id, "log_date": log_date})
+        assert response.status_code == 201, response.text
+
+    url = f"/api/habit-logs/habit/{habit_id}"
+    first = await client.get(url, params={"limit": 2})
+    assert [log["log_date"][:10] for log in first.json()] == ["2024-03-03", "2024-03-02"]
+
+    # A newer check-in arriving between pages doesn't shift the next one, as an offset would
+    await client.post("/api/habit-logs/", json={"habit_id": habit_id, "log_date": "2024-03-04T07:00:00Z"})
+    second = await client.get(url, params={"limit": 2, "cursor": first.headers[NEXT_CURSOR_HEADER]})
+
+    assert [log["log_date"][:10] for log in second.json()] == ["2024-03-02", "2024-03-01"]
+    assert NEXT_CURSOR_HEADER not in second.headers
+    seen = [log["id"] for log in first.json() + second.json()]
+    assert len(set(seen)) == 4
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["not a cursor", base64.urlsafe_b64encode(b'{"id": 1}').decode(), encode_cursor(datetime(2024, 1, 1), 1)[:-3]],
+)
+async def test_malformed_cursors_are_rejected(client, cursor):
+    habit_id = (await client.post("/api/habits/", json={"name": "Run", "start_date": "2024-01-01"})).json()["id"]
+
+    for url in ("/api/habits/", f"/api/habit-logs/habit/{habit_id}"):
+        response = await client.get(url, params={"cursor": cursor})
+        assert response.status_code == 400, (url, response.text)
+        assert "Invalid cursor" in response.json()["detail"]
@@ -0,0 +1,70 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.db.query_stats import _count_fetched_rows, assert_max_queries, track_queries
+from app.models.habit_log import HabitLog
+
+pytestmark = pytest.mark.anyio
+
+# SQL statements each route may run on a cold cache, whatever the number of habits and logs
+QUERY_BUDGETS = {
+    "/api/habits/": 1,
+    "/api/habit-logs/habit/{habit_id}": 1,
+    "/api/habit-logs/habit/{habit_id}/streak": 1,
+    "/api/habit-logs/habit/{habit_id}/success-rate": 2,
+    "/api/analytics/best-days": 1,
+    "/api/analytics/checkins-by-date": 1,
+    "/api/analytics/category-stats": 2,
+    "/api/analytics/overall": 3,
+    "/api/analytics/rolling-success": 2,
+    "/api/analytics/heatmap": 2,
+    "/api/analytics/week-over-week": 2,
+    "/api/gamification/stats": 2,
+    "/api/ai/progress-insights": 5,
+    "/api/ai/mood-timeline": 1,
+}
+
+
+@pytest.fixture
+async def habit_id(client) -> int:
+    """Five daily and weekly habits with a check-in every third day for three weeks."""
+    start = date.today() - timedelta(days=20)
+    for position in range(5):
+        frequency = "weekly" if position % 2 else "daily"
+        habit = await client.post(
+            "/api/habits/", json={"name": f"Habit {position}", "frequency": frequency, "start_date": start.isoformat()}
+        )
+        for offset in range(0, 21, 3):
+            log_date = f"{(start + timedelta(days=offset)).isoformat()}T07:30:00Z"
+            response = await client.post(
+                "/api/habit-logs/", json={"habit_id": habit.json()["id"], "log_date": log_date, "notes": "Felt great"}
+            )
+            assert response.status_code == 201, response.text
+    return habit.json()["id"]
+
+
+@pytest.mark.parametrize("route, budget", QUERY_BUDGETS.items())
+async def test_route_stays_within_query_budget(client, habit_id, route, budget):
+    with assert_max_queries(budget):
+        response = await client.get(route.format(habit_id=habit_id))
+    assert response.status_code == 200, response.text
+
+
+async def test_not_modified_runs_no_queries(client, habit_id):
+    etag = (await client.get("/api/analytics/overall")).headers["ETag"]
+    with assert_max_queries(0):
+        response = await client.get("/api/analytics/overall", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+async def test_tracking_leaves_results_unbuffered(session, habit_id):
+    # Counting rows would freeze every SELECT result, and break yield_per streaming
+    assert not event.contains(Session, "do_orm_execute", _count_fetched_rows)
+    with track_queries() as stats:
+        result = await session.stream_scalars(select(HabitLog).execution_options(yield_per=10))
+        logs = [log async for log in result]
+    assert len(logs) == 35
+    assert (stats.statements, stats.rows) == (1, 0)
@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+
+from app.services import recommendation_service
+from app.services.recommendation_service import RecommendationService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def habits(client, user_header, monkeypatch) -> None:
+    """Users 2 and 3 run and juggle; user 1 only runs. No model is built yet."""
+    monkeypatch.setattr(recommendation_service, "_model", None)
+    for user_id, names in ((1, ["Run"]), (2, ["Run", "Juggle"]), (3, ["Run", "Juggle"])):
+        for name in names:
+            response = await client.post(
+                "/api/habits/", json={"name": name, "start_date": "2024-01-01"}, headers={"X-User-Id": str(user_id)}
+            )
+            assert response.status_code == 201, response.text
+
+
+async def test_rebuild_computes_off_the_event_loop(session, habits, monkeypatch):
+    threads = []
+    build_model = recommendation_service._build_model
+
+    def spy(*args):
+        threads.append(threading.get_ident())
+        return build_model(*args)
+
+    monkeypatch.setattr(recommendation_service, "_build_model", spy)
+    model = await RecommendationService.rebuild(session)
+
+    assert model is not None and model.users == 3
+    assert threads and threads[0] != threading.get_ident()
+    assert [suggestion["name"] for suggestion in RecommendationService.recommend(["Run"])] == ["Juggle"]
+
+
+async def test_cached_suggestions_follow_a_rebuilt_model(client, session, habits):
+    before = await client.get("/api/ai/suggest-habits")
+    assert "Juggle" not in [suggestion["name"] for suggestion in before.json()["suggestions"]]
+
+    # A rebuild changes suggestions without any habit being written
+    await RecommendationService.rebuild(session)
+
+    after = await client.get("/api/ai/suggest-habits")
+    assert after.json()["suggestions"][0]["name"] == "Juggle"
+    assert after.headers["ETag"] != before.headers["ETag"]
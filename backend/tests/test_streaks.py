@@ -0,0 +1,67 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.models.habit import Habit
+from app.services.maintenance_service import MaintenanceService
+from app.services.streak_service import StreakService
+
+pytestmark = pytest.mark.anyio
+
+
+async def _check_in(client, habit_id: int, day: date) -> dict:
+    response = await client.post("/api/habit-logs/", json={"habit_id": habit_id, "log_date": f"{day.isoformat()}T00:00:00Z"})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+async def _create_habit(client) -> int:
+    start = date.today() - timedelta(days=30)
+    response = await client.post("/api/habits/", json={"name": "Meditate", "start_date": start.isoformat()})
+    return response.json()["id"]
+
+
+async def test_checkins_after_midnight_rollover_rejoin_the_run(client, session):
+    habit_id = await _create_habit(client)
+    today = date.today()
+    for offset in range(12, 2, -1):
+        await _check_in(client, habit_id, today - timedelta(days=offset))
+
+    await MaintenanceService.midnight_rollover()
+    for offset in (2, 1, 0):
+        checkin = await _check_in(client, habit_id, today - timedelta(days=offset))
+
+    assert checkin["streak"] == 13
+    state = await StreakService.get_state(session, habit_id)
+    assert (state.current_streak, state.longest_streak, state.last_period_start) == (13, 13, today)
+    recomputed = await StreakService.recompute(session, await session.get(Habit, habit_id))
+    assert (recomputed.current_streak, recomputed.longest_streak) == (13, 13)
+
+
+async def test_future_checkins_are_rejected(client, session):
+    habit_id = await _create_habit(client)
+    today = date.today()
+    for offset in (2, 1, 0):
+        await _check_in(client, habit_id, today - timedelta(days=offset))
+
+    tomorrow = await client.post(
+        "/api/habit-logs/", json={"habit_id": habit_id, "log_date": f"{(today + timedelta(days=1)).isoformat()}T00:00:00Z"}
+    )
+    assert tomorrow.status_code == 422
+
+    log_id = (await client.get(f"/api/habit-logs/habit/{habit_id}")).json()[0]["id"]
+    moved = await client.put(f"/api/habit-logs/{log_id}", json={"log_date": f"{(today + timedelta(days=3)).isoformat()}T00:00:00Z"})
+    assert moved.status_code == 422
+
+    assert (await client.get(f"/api/habit-logs/habit/{habit_id}/streak")).json()["streak"] == 3
+    state = await StreakService.get_state(session, habit_id)
+    assert state.last_period_start == today
+
+
+async def test_slightly_fast_client_clocks_check_in_now(client):
+    habit_id = await _create_habit(client)
+    ahead = (datetime.now(timezone.utc) + timedelta(minutes=1)).isoformat()
+
+    response = await client.post("/api/habit-logs/", json={"habit_id": habit_id, "log_date": ahead})
+    assert response.status_code == 201, response.text
+    assert datetime.fromisoformat(response.json()["log_date"]) <= datetime.utcnow()
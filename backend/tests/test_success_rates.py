@@ -0,0 +1,63 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.habit import HabitFrequency
+from app.services import habit_log_service
+from app.services.habit_log_service import HabitLogService
+
+pytestmark = pytest.mark.anyio
+
+
+async def _habit(client, frequency: str, start_date: date) -> int:
+    response = await client.post(
+        "/api/habits/", json={"name": f"{frequency} habit", "frequency": frequency, "start_date": start_date.isoformat()}
+    )
+    return response.json()["id"]
+
+
+async def _success_rate(client, habit_id: int, *days: date) -> float:
+    for day in days:
+        response = await client.post("/api/habit-logs/", json={"habit_id": habit_id, "log_date": f"{day.isoformat()}T00:00:00Z"})
+        assert response.status_code == 201, response.text
+    return (await client.get(f"/api/habit-logs/habit/{habit_id}/success-rate")).json()["success_rate"]
+
+
+class _Wednesday(date):
+    """Last week's Wednesday as today: on Sundays every range covers whole weeks."""
+
+    @classmethod
+    def today(cls) -> date:
+        real_today = date.today()
+        return real_today - timedelta(days=real_today.weekday() + 5)
+
+
+async def test_weekly_rate_expects_every_iso_week_in_range(client, monkeypatch):
+    monkeypatch.setattr(habit_log_service, "date", _Wednesday)
+    today = _Wednesday.today()
+    # Sunday of last week: three days ago, yet two ISO weeks
+    start = today - timedelta(days=3)
+    habit_id = await _habit(client, "weekly", start)
+
+    assert await _success_rate(client, habit_id, start) == 50.0
+    assert await _success_rate(client, habit_id, today) == 100.0
+
+
+async def test_daily_rate_never_exceeds_100(client):
+    today = date.today()
+    habit_id = await _habit(client, "daily", today - timedelta(days=1))
+
+    assert await _success_rate(client, habit_id, today) == 50.0
+    assert await _success_rate(client, habit_id, today - timedelta(days=1)) == 100.0
+    # Future check-ins stored before they were rejected still count as completed days
+    assert HabitLogService._calculate_success_rate(HabitFrequency.DAILY, today - timedelta(days=1), 3) == 100.0
+
+
+async def test_bulk_stats_use_the_same_rate(client, session):
+    today = date.today()
+    start = today - timedelta(days=today.weekday() + 1)
+    habit_id = await _habit(client, "weekly", start)
+    await _success_rate(client, habit_id, start, today)
+
+    stats = await HabitLogService.get_stats_for_habits(session, 1, [habit_id])
+    assert stats[habit_id]["success_rate"] == 100.0
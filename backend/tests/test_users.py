@@ -0,0 +1,72 @@
+import pytest
+
+from app.core.config import get_settings
+
+pytestmark = pytest.mark.anyio
+
+USER_1 = {"X-User-Id": "1"}
+USER_2 = {"X-User-Id": "2"}
+
+
+async def test_user_header_is_refused_unless_enabled(client):
+    response = await client.get("/api/habits/", headers=USER_2)
+    assert response.status_code == 400
+
+    created = await client.post("/api/habits/", json={"name": "Run", "start_date": "2024-01-01"})
+    assert created.status_code == 201
+    assert [habit["name"] for habit in (await client.get("/api/habits/")).json()] == ["Run"]
+
+
+async def test_users_only_see_and_change_their_own_data(client, user_header):
+    habit = (await client.post("/api/habits/", json={"name": "Run", "start_date": "2024-01-01"}, headers=USER_2)).json()
+    log = await client.post(
+        "/api/habit-logs/", json={"habit_id": habit["id"], "log_date": "2024-03-01T07:00:00Z"}, headers=USER_2
+    )
+    assert log.status_code == 201, log.text
+    log_id = log.json()["id"]
+
+    # The default user (no header) and user 1 are the same user
+    for headers in ({}, USER_1):
+        assert (await client.get("/api/habits/", headers=headers)).json() == []
+        assert (await client.get(f"/api/habits/{habit['id']}", headers=headers)).status_code == 404
+        assert (await client.get(f"/api/habit-logs/{log_id}", headers=headers)).status_code == 404
+        assert (await client.get(f"/api/habit-logs/habit/{habit['id']}", headers=headers)).json() == []
+
+    checkin = await client.post(
+        "/api/habit-logs/", json={"habit_id": habit["id"], "log_date": "2024-03-02T07:00:00Z"}, headers=USER_1
+    )
+    assert checkin.status_code == 404
+    assert (await client.put(f"/api/habits/{habit['id']}", json={"name": "Mine"}, headers=USER_1)).status_code == 404
+    assert (await client.delete(f"/api/habit-logs/{log_id}", headers=USER_1)).status_code == 404
+    assert (await client.delete(f"/api/habits/{habit['id']}", headers=USER_1)).status_code == 404
+
+    owned = await client.get(f"/api/habit-logs/habit/{habit['id']}", headers=USER_2)
+    assert [entry["id"] for entry in owned.json()] == [log_id]
+    assert (await client.get(f"/api/habits/{habit['id']}", headers=USER_2)).json()["name"] == "Run"
+
+
+async def test_cached_responses_and_etags_are_per_user(client, user_header):
+    habit = (await client.post("/api/habits/", json={"name": "Run", "start_date": "2024-01-01"}, headers=USER_2)).json()
+    await client.post("/api/habit-logs/", json={"habit_id": habit["id"], "log_date": "2024-03-01T07:00:00Z"}, headers=USER_2)
+
+    theirs = await client.get("/api/gamification/stats", headers=USER_2)
+    mine = await client.get("/api/gamification/stats", headers=USER_1)
+    assert theirs.json()["total_xp"] > 0
+    assert mine.json()["total_xp"] == 0
+
+    # One user's tag never revalidates another user's response
+    assert theirs.headers["ETag"] != mine.headers["ETag"]
+    reused = await client.get("/api/gamification/stats", headers=USER_1 | {"If-None-Match": theirs.headers["ETag"]})
+    assert reused.status_code == 200
+    assert reused.json()["total_xp"] == 0
+
+
+async def test_admin_routes_need_the_admin_token(client, monkeypatch):
+    assert (await client.get("/api/admin/cache")).status_code == 404
+
+    monkeypatch.setattr(get_settings(), "admin_token", "s3cret")
+    missing = await client.get("/api/admin/cache")
+    assert missing.status_code == 401
+    assert missing.headers["WWW-Authenticate"] == "Bearer"
+    assert (await client.get("/api/admin/cache", headers={"Authorization": "Bearer wrong"})).status_code == 401
+    assert (await client.get("/api/admin/cache", headers={"Authorization": "Bearer s3cret"})).status_code == 200
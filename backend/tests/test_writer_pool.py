@@ -0,0 +1,88 @@
+import json
+from collections.abc import AsyncIterator
+
+import anyio
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from app.core.config import Settings
+from app.db.migrations import run_migrations
+from app.db.session import _create_engines, get_read_db, get_write_db
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def writer(tmp_path) -> AsyncIterator[AsyncEngine]:
+    """Routes on a file database with split engines: one writer connection, as in production."""
+    settings = Settings(database_url=f"sqlite+aiosqlite:///{tmp_path / 'app.db'}", sqlite_writer_timeout_seconds=0.5)
+    writer, reader = _create_engines(settings)
+    async with writer.begin() as connection:
+        await connection.run_sync(run_migrations)
+
+    def override(engine: AsyncEngine):
+        sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+        async def get_db():
+            async with sessions() as session:
+                yield session
+
+        return get_db
+
+    app.dependency_overrides[get_write_db] = override(writer)
+    app.dependency_overrides[get_read_db] = override(reader)
+    yield writer
+    app.dependency_overrides.clear()
+    await writer.dispose()
+    await reader.dispose()
+
+
+async def _create_habit(client) -> int:
+    response = await client.post("/api/habits/", json={"name": "Swim", "start_date": "2024-01-01"})
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def test_slow_upload_does_not_hold_the_writer(client, writer):
+    habit_id = await _create_habit(client)
+    first_line_sent = anyio.Event()
+    finish_upload = anyio.Event()
+
+    async def stalled_body() -> AsyncIterator[bytes]:
+        yield json.dumps({"habit_id": habit_id, "log_date": "2024-02-01T07:00:00Z"}).encode() + b"\n"
+        first_line_sent.set()
+        await finish_upload.wait()
+        yield json.dumps({"habit_id": habit_id, "log_date": "2024-02-02T07:00:00Z"}).encode() + b"\n"
+
+    results = {}
+
+    async def upload() -> None:
+        results["import"] = await client.post(
+            "/api/habit-logs/bulk", content=stalled_body(), headers={"Content-Type": "application/x-ndjson"}
+        )
+
+    async with anyio.create_task_group() as tasks:
+        tasks.start_soon(upload)
+        await first_line_sent.wait()
+        # Other writes go through while the upload is still arriving
+        with anyio.fail_after(5):
+            checkin = await client.post("/api/habit-logs/", json={"habit_id": habit_id, "log_date": "2024-03-01T07:00:00Z"})
+        assert checkin.status_code == 201, checkin.text
+        finish_upload.set()
+
+    assert results["import"].status_code == 200, results["import"].text
+    assert results["import"].json()["inserted"] == 2
+
+
+async def test_busy_writer_answers_503(client, writer):
+    habit_id = await _create_habit(client)
+
+    # Hold the only writer connection, as a long transaction would
+    async with writer.connect() as connection:
+        await connection.exec_driver_sql("SELECT 1")
+        with anyio.fail_after(5):
+            response = await client.post("/api/habit-logs/", json={"habit_id": habit_id, "log_date": "2024-03-01T07:00:00Z"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -1,4 +1,4 @@
-import type { HabitLog, HabitLogCreate, HabitLogUpdate } from '../types/habitLog'
+import type { CheckInResult, HabitLog, HabitLogCreate, HabitLogUpdate } from '../types/habitLog'
 import { getApiBaseUrl } from '../utils/apiConfig'
 
 const API_BASE_URL = getApiBaseUrl('habit-logs')
@@ -20,7 +20,7 @@ class HabitLogService {
     return response.json()
   }
 
-  async create(log: HabitLogCreate): Promise<HabitLog> {
+  async create(log: HabitLogCreate): Promise<CheckInResult> {
     const response = await fetch(API_BASE_URL, {
       method: 'POST',
       headers: {
@@ -3,9 +3,27 @@ export interface HabitLog {
   habit_id: number
   log_date: string
   notes: string | null
+  sentiment: string | null
+  sentiment_score: number | null
   created_at: string
 }
 
+export interface CheckInBadge {
+  id: string
+  name: string
+  description: string
+  xp: number
+}
+
+export interface CheckInResult extends HabitLog {
+  streak: number
+  xp_awarded: number
+  total_xp: number
+  level: number
+  xp_to_next_level: number
+  new_badges: CheckInBadge[]
+}
+
 export interface HabitLogCreate {
   habit_id: number
   log_date?: string